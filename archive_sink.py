@@ -0,0 +1,322 @@
+import io
+import os
+import sys
+import json
+import struct
+import time
+import hashlib
+import tarfile
+import zipfile
+import argparse
+import threading
+import zlib
+
+# Pridedamų įrašų indekso failo plėtinys (šalia paketo failo)
+INDEX_SUFFIX = ".idx"
+
+
+class DirectorySink:
+    """Kiekvienas rezultatas - atskiras failas kataloge (kaip iki šiol)"""
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        os.makedirs(output_dir, exist_ok=True)
+
+    def contains(self, name):
+        return os.path.exists(self.location(name))
+
+    def location(self, name):
+        return os.path.join(self.output_dir, name)
+
+    def write(self, name, data):
+        path = self.location(name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def close(self):
+        pass
+
+
+def readable_zip(path):
+    """Ar archyvo centrinis katalogas sveikas"""
+    try:
+        zipfile.ZipFile(path).close()
+        return True
+    except zipfile.BadZipFile:
+        return False
+
+
+def recover_zip(path):
+    """Atkuria nutraukto (neuždaryto) ZIP archyvo centrinį katalogą
+
+    Be centrinio katalogo archyvas neperskaitomas, todėl vietiniai įrašų
+    antraštės skaitomos nuo pradžių: paliekami tik pilni įrašai su teisinga
+    CRC, failas nukerpamas po paskutinio jų, o centrinis katalogas
+    įrašomas iš naujo. Grąžina atkurtų įrašų skaičių.
+    """
+    infos = []
+    end = 0
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        while True:
+            header = f.read(zipfile.sizeFileHeader)
+            if len(header) < zipfile.sizeFileHeader or header[:4] != zipfile.stringFileHeader:
+                break
+            fields = struct.unpack(zipfile.structFileHeader, header)
+            flags, method, crc = fields[3], fields[4], fields[7]
+            compressed_size, file_size, name_length, extra_length = fields[8], fields[9], fields[10], fields[11]
+            # Tik tai, ką rašo ZipSink: be suspaudimo, be duomenų deskriptoriaus ir ZIP64 dydžių
+            if method != zipfile.ZIP_STORED or flags & 0x08 or compressed_size == 0xFFFFFFFF:
+                break
+            name = f.read(name_length)
+            extra = f.read(extra_length)
+            data_start = end + zipfile.sizeFileHeader + name_length + extra_length
+            if data_start + compressed_size > size:
+                break
+            if zlib.crc32(f.read(compressed_size)) != crc:
+                break
+            info = zipfile.ZipInfo(name.decode('utf-8' if flags & 0x800 else 'cp437'),
+                                   ((fields[6] >> 9) + 1980, (fields[6] >> 5) & 0xF, fields[6] & 0x1F,
+                                    fields[5] >> 11, (fields[5] >> 5) & 0x3F, (fields[5] & 0x1F) * 2))
+            info.compress_type = method
+            info.flag_bits = flags
+            info.CRC = crc
+            info.compress_size = compressed_size
+            info.file_size = file_size
+            info.extra = extra
+            info.header_offset = end
+            infos.append(info)
+            end = data_start + compressed_size
+
+    with open(path, 'r+b') as f:
+        f.truncate(end)
+        # Naujas archyvas tame pačiame faile: įrašai jau vietoje, uždarant įrašomas centrinis katalogas
+        archive = zipfile.ZipFile(f, 'w', zipfile.ZIP_STORED, allowZip64=True)
+        archive.start_dir = end
+        for info in infos:
+            archive.filelist.append(info)
+            archive.NameToInfo[info.filename] = info
+        archive.close()
+    return len(infos)
+
+
+def recover_tar(path):
+    """Nukerpa tar archyvą po paskutinio pilno įrašo (nutrauktas rašymas); grąžina įrašų skaičių"""
+    end = 0
+    count = 0
+    size = os.path.getsize(path)
+    try:
+        with tarfile.open(path, 'r:') as archive:
+            while True:
+                member = archive.next()
+                if member is None:
+                    break
+                blocks = -(-member.size // tarfile.BLOCKSIZE)
+                member_end = member.offset_data + blocks * tarfile.BLOCKSIZE
+                if member_end > size:
+                    break
+                end = member_end
+                count += 1
+    except tarfile.ReadError:
+        pass  # Nepilna antraštė - archyvas baigiasi ties paskutiniu pilnu įrašu
+    with open(path, 'r+b') as f:
+        f.truncate(end)
+        # Archyvo pabaigos žymė - be jos tarfile append režimu neatidaro
+        f.seek(end)
+        f.write(b"\0" * tarfile.BLOCKSIZE * 2)
+    return count
+
+
+class ZipSink:
+    """Rezultatai rašomi į ZIP archyvą (be suspaudimo - PNG/JPEG jau suspausti)
+
+    Esamas archyvas papildomas, jau esantys įrašai praleidžiami. Jei
+    ankstesnis paleidimas buvo nutrauktas neuždarius archyvo, jis pirmiausia
+    atkuriamas (recover_zip). Atmintyje laikomas tik rašomas įrašas ir
+    pavadinimų sąrašas.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        if os.path.exists(path) and not readable_zip(path):
+            recover_zip(path)
+        self.archive = zipfile.ZipFile(path, 'a' if os.path.exists(path) else 'w', zipfile.ZIP_STORED,
+                                       allowZip64=True)
+        self.names = set(self.archive.namelist())
+
+    def location(self, name):
+        return f"{self.path}:{name}"
+
+    def contains(self, name):
+        return name in self.names
+
+    def write(self, name, data):
+        info = zipfile.ZipInfo(name, time.localtime()[:6])
+        info.compress_type = zipfile.ZIP_STORED
+        with self.lock:
+            self.archive.writestr(info, data)
+            self.names.add(name)
+        return self.location(name)
+
+    def close(self):
+        with self.lock:
+            self.archive.close()
+
+
+class TarSink:
+    """Rezultatai rašomi į nesuspaustą tar archyvą (papildomas append režimu)
+
+    Prieš papildant archyvas nukerpamas po paskutinio pilno įrašo
+    (recover_tar), todėl nutrauktas rašymas tęsiamas be klaidų.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        if os.path.exists(path):
+            recover_tar(path)
+        self.archive = tarfile.open(path, 'a' if os.path.exists(path) else 'w')
+        self.names = set(self.archive.getnames())
+
+    def location(self, name):
+        return f"{self.path}:{name}"
+
+    def contains(self, name):
+        return name in self.names
+
+    def write(self, name, data):
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        with self.lock:
+            self.archive.addfile(info, io.BytesIO(data))
+            self.names.add(name)
+        return self.location(name)
+
+    def close(self):
+        with self.lock:
+            self.archive.close()
+
+
+class BundleSink:
+    """Vienas tik pridedamas duomenų failas ir JSON eilučių indeksas
+
+    Įrašas pirmiausia įrašomas į duomenų failą, tik po to - į indeksą,
+    todėl nutraukus darbą indeksas niekada nerodo į nepilną įrašą. Atidarant
+    iš naujo duomenų failas nukerpamas iki paskutinio indeksuoto įrašo
+    pabaigos ir darbas tęsiamas (praleidžiant jau esančius įrašus).
+    """
+    def __init__(self, path, sync=False):
+        self.path = path
+        self.index_path = path + INDEX_SUFFIX
+        self.sync = sync
+        self.lock = threading.Lock()
+        self.entries = {}
+
+        end = 0
+        for entry in read_index(self.index_path):
+            self.entries[entry['name']] = entry
+            end = max(end, entry['offset'] + entry['size'])
+
+        self.data = open(path, 'r+b' if os.path.exists(path) else 'w+b')
+        # Nepilnas paskutinis įrašas (nutrauktas rašymas) atmetamas
+        self.data.truncate(end)
+        self.data.seek(end)
+        self.index = open(self.index_path, 'a', encoding='utf-8')
+
+    def location(self, name):
+        return f"{self.path}:{name}"
+
+    def contains(self, name):
+        return name in self.entries
+
+    def write(self, name, data):
+        with self.lock:
+            offset = self.data.tell()
+            self.data.write(data)
+            self.data.flush()
+            if self.sync:
+                os.fsync(self.data.fileno())
+            entry = {'name': name, 'offset': offset, 'size': len(data), 'sha1': hashlib.sha1(data).hexdigest()}
+            self.index.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self.index.flush()
+            if self.sync:
+                os.fsync(self.index.fileno())
+            self.entries[name] = entry
+        return self.location(name)
+
+    def close(self):
+        with self.lock:
+            self.data.close()
+            self.index.close()
+
+
+def read_index(index_path):
+    """Paketo indekso įrašai; nepilna paskutinė eilutė praleidžiama"""
+    if not os.path.exists(index_path):
+        return []
+    entries = []
+    with open(index_path, encoding='utf-8') as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            entries.append(json.loads(line))
+    return entries
+
+
+class BundleReader:
+    """Paketo skaitymas pagal indeksą (be viso failo skaitymo)"""
+    def __init__(self, path):
+        self.path = path
+        # Vėlesnis įrašas tuo pačiu vardu pakeičia ankstesnį
+        self.entries = {entry['name']: entry for entry in read_index(path + INDEX_SUFFIX)}
+
+    def names(self):
+        return list(self.entries)
+
+    def read(self, name, verify=True):
+        entry = self.entries[name]
+        with open(self.path, 'rb') as f:
+            f.seek(entry['offset'])
+            data = f.read(entry['size'])
+        if verify and hashlib.sha1(data).hexdigest() != entry['sha1']:
+            raise ValueError(f"Pažeistas įrašas: {name}")
+        return data
+
+
+SINKS = {
+    '.zip': ZipSink,
+    '.tar': TarSink,
+    '.bundle': BundleSink
+}
+
+
+def open_sink(path):
+    """Išvestis pagal kelią: .zip, .tar, .bundle arba katalogas"""
+    sink_class = SINKS.get(os.path.splitext(path)[1].lower())
+    if sink_class is None:
+        return DirectorySink(path)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return sink_class(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Paketo (.bundle) turinys ir išskleidimas")
+    parser.add_argument("bundle")
+    parser.add_argument("--extract", metavar="KATALOGAS", help="Išskleisti visus įrašus į katalogą")
+    args = parser.parse_args(argv)
+
+    reader = BundleReader(args.bundle)
+    for name in reader.names():
+        entry = reader.entries[name]
+        if args.extract:
+            os.makedirs(args.extract, exist_ok=True)
+            with open(os.path.join(args.extract, os.path.basename(name)), 'wb') as f:
+                f.write(reader.read(name))
+        print(f"{entry['size']:10} {name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,472 @@
+import io
+import os
+import sys
+import json
+import time
+import queue
+import argparse
+import tempfile
+import threading
+from PIL import Image
+from fingerprint import Fingerprinter
+from render_cache import DiskRenderCache
+from template_renderer import TemplateRenderer, SourceCache, DEFAULT_BLUR_AMOUNT
+from tiled_processing import TiledExecutor
+from archive_sink import open_sink
+from shm_transport import ProcessBatchRenderer
+from metrics import JOBS, QUEUE_DEPTH, RENDER_SECONDS, ENCODED_BYTES
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.bmp', '.tif', '.tiff')
+DEFAULT_ARTIST = "NIKLAS DEE"
+
+# Etapų pabaigos žymė eilėse
+_DONE = object()
+
+
+class BatchJob:
+    """Vienas paketinio eksporto viršelis"""
+    def __init__(self, image_path, title, artist, blur_amount=DEFAULT_BLUR_AMOUNT):
+        self.image_path = image_path
+        self.title = title
+        self.artist = artist
+        self.blur_amount = blur_amount
+        self.stem = os.path.splitext(os.path.basename(image_path))[0]
+        # Užpildoma etapuose
+        self.processed_image = None
+        self.simple_image = None
+        self.frames = None  # FrameLease, kai piešta procesuose (vaizdai - bendroje atmintyje)
+        self.paths = []
+        self.error = None
+        self.skipped = False
+
+    def output_names(self, extension):
+        """Išvesties pavadinimai kaip GUI eksporte"""
+        return f"{self.stem}.{extension}", f"{self.stem}_paprasta.{extension}"
+
+    def release_images(self):
+        """Atlaisvina vaizdus (ir bendros atminties slotus, jei jie paskolinti)"""
+        self.processed_image = self.simple_image = None
+        if self.frames is not None:
+            self.frames.release()
+            self.frames = None
+
+
+def assign_unique_stems(jobs):
+    """Vienodiems failų vardams iš skirtingų katalogų (d1/x.jpg, d2/x.png) suteikia skirtingus
+
+    Pasikartojęs vardas gauna užduoties eilės numerį (x_1); vardai lyginami
+    neatsižvelgiant į raidžių dydį, kaip Windows failų sistemoje.
+    """
+    used = set()
+    for index, job in enumerate(jobs):
+        stem = job.stem
+        while stem.lower() in used:
+            stem = f"{stem}_{index}"
+        job.stem = stem
+        used.add(stem.lower())
+    return jobs
+
+
+class StageStats:
+    """Etapo laikai: darbas, laukimas įvesties ir blokavimas dėl pilnos išvesties eilės"""
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.lock = threading.Lock()
+        self.items = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.starved = 0.0
+        self.blocked = 0.0
+
+    def add(self, busy=0.0, starved=0.0, blocked=0.0, items=0, errors=0):
+        with self.lock:
+            self.busy += busy
+            self.starved += starved
+            self.blocked += blocked
+            self.items += items
+            self.errors += errors
+
+    def report(self, wall):
+        capacity = wall * self.workers
+        return {
+            'workers': self.workers,
+            'items': self.items,
+            'errors': self.errors,
+            'busy_s': round(self.busy, 3),
+            # Dalis darbininkų laiko: dirbta / laukta įvesties / laukta vietos kitoje eilėje
+            'utilisation': round(self.busy / capacity, 3) if capacity else 0.0,
+            'starved': round(self.starved / capacity, 3) if capacity else 0.0,
+            'blocked': round(self.blocked / capacity, 3) if capacity else 0.0
+        }
+
+
+class BatchPipeline:
+    """Paketinis eksportas etapais: skaitymas/dekodavimas -> piešimas -> kodavimas/rašymas
+
+    Etapus jungia ribotos eilės, kiekvienas etapas turi savo darbininkų
+    skaičių, todėl disko skaitymas, PNG kodavimas ir rašymas vyksta tuo
+    pačiu metu, kai piešiamas kitas viršelis. Dekoduoti šaltiniai
+    perduodami piešėjams per bendrą SourceCache, o su processes > 0 -
+    piešimo procesams per bendros atminties žiedą (žr. shm_transport).
+    Rezultatai rašomi į katalogą arba archyvą (žr. archive_sink); jau
+    esantys praleidžiami.
+    """
+    STAGES = ('decode', 'render', 'encode')
+
+    def __init__(self, output, decode_workers=1, render_workers=2, encode_workers=2, queue_size=4,
+                 image_format='png', compress_level=6, disk_cache=None, sink=None, effects=None,
+                 skip_existing=True, processes=0):
+        # Katalogas arba .zip/.tar/.bundle archyvas
+        self.sink = sink or open_sink(output)
+        self.skip_existing = skip_existing
+        # Fono efektai visiems viršeliams (None - be efektų)
+        self.effects = effects
+        # Piešiant procesuose render etapo gijos tik pateikia užduotis ir laukia rezultatų
+        if processes:
+            render_workers = processes
+        self.workers = {'decode': decode_workers, 'render': render_workers, 'encode': encode_workers}
+        for name, count in self.workers.items():
+            if count < 1:
+                raise ValueError(f"Etapui {name} reikia bent vieno darbininko")
+        self.queue_size = queue_size
+        self.image_format = image_format
+        self.compress_level = compress_level
+
+        self.fingerprinter = Fingerprinter(background=False)
+        self.disk_cache = disk_cache if disk_cache is not None else DiskRenderCache()
+        # Talpa - visi dekoduoti, bet dar nenupiešti šaltiniai (eilėje ir vykdomi)
+        self.source_cache = SourceCache(max_entries=queue_size + decode_workers + render_workers)
+        self.tiled = TiledExecutor()
+        self.local = threading.local()
+        self.stats = {}
+        self.wall = 0.0
+        self.processes = (ProcessBatchRenderer(processes, effects=effects, disk_cache=self.disk_cache)
+                          if processes else None)
+
+    def renderer(self):
+        """Grąžina šios gijos piešėją (kaip RenderService)"""
+        renderer = getattr(self.local, 'renderer', None)
+        if renderer is None:
+            renderer = TemplateRenderer(self.fingerprinter, self.disk_cache, self.tiled, self.source_cache)
+            renderer.effects = self.effects
+            self.local.renderer = renderer
+        return renderer
+
+    # Etapai
+
+    def decode(self, job):
+        """Skaito failą, skaičiuoja turinio antspaudą ir dekoduoja šaltinį"""
+        fingerprint = self.fingerprinter.content(job.image_path)
+        if self.source_cache.get(fingerprint) is None:
+            with RENDER_SECONDS.time(stage="decode"):
+                source = Image.open(job.image_path).convert("RGB")
+            self.source_cache.put(fingerprint, source)
+
+    def render(self, job):
+        """Piešia viršelį ir paprastą 9:16 versiją"""
+        if self.processes is not None:
+            fingerprint = self.fingerprinter.content(job.image_path)
+            future = self.processes.submit(job.image_path, job.title, job.artist, job.blur_amount,
+                                           source=self.source_cache.get(fingerprint), fingerprint=fingerprint)
+            # Kadrai lieka bendroje atmintyje - koduojami vietoje, slotai atlaisvinami po kodavimo
+            job.frames = future.result()
+            job.processed_image, job.simple_image = job.frames.processed, job.frames.simple
+            return
+        renderer = self.renderer()
+        job.processed_image = renderer.create_template(job.image_path, job.title, job.artist, job.blur_amount)
+        job.simple_image = renderer.create_simple_9_16(job.image_path)
+
+    def encode(self, job):
+        """Koduoja abu vaizdus ir įrašo juos; grąžina įrašymo trukmę"""
+        outputs = zip((job.processed_image, job.simple_image), job.output_names(self.extension))
+        encoded = []
+        try:
+            for image, name in outputs:
+                buffer = io.BytesIO()
+                if self.image_format == 'jpeg':
+                    # JPEG koduojamas ir tiesiai iš RGBX kadro bendroje atmintyje
+                    image.save(buffer, format='JPEG', quality=95)
+                else:
+                    # PNG neturi RGBX režimo - kadras perpakuojamas į RGB
+                    if image.mode == 'RGBX':
+                        image = image.convert('RGB')
+                    image.save(buffer, format='PNG', compress_level=self.compress_level)
+                data = buffer.getvalue()
+                ENCODED_BYTES.observe(len(data), format=self.image_format)
+                encoded.append((name, data))
+        finally:
+            # Vaizdai nebereikalingi - atlaisvinama atmintis ir slotai
+            job.release_images()
+
+        start = time.perf_counter()
+        for name, data in encoded:
+            # Nutraukus darbą tarp dviejų failų pirmasis jau gali būti archyve
+            if self.skip_existing and self.sink.contains(name):
+                job.paths.append(self.sink.location(name))
+            else:
+                job.paths.append(self.sink.write(name, data))
+        return time.perf_counter() - start
+
+    @property
+    def extension(self):
+        return 'jpg' if self.image_format == 'jpeg' else self.image_format
+
+    def pending_jobs(self, jobs):
+        """Užduotys, kurių rezultatų dar nėra išvestyje (tęsiant nutrauktą eksportą)"""
+        if not self.skip_existing:
+            return list(jobs)
+        pending = []
+        for job in jobs:
+            names = job.output_names(self.extension)
+            if all(self.sink.contains(name) for name in names):
+                job.skipped = True
+                job.paths = [self.sink.location(name) for name in names]
+                JOBS.inc(source="batch", event="skipped")
+            else:
+                pending.append(job)
+        return pending
+
+    # Vykdymas
+
+    def run_stage(self, name, func, inbox, outbox, finished):
+        """Vieno etapo darbininko ciklas"""
+        stats = self.stats[name]
+        while True:
+            waited = time.perf_counter()
+            job = inbox.get()
+            started = time.perf_counter()
+            if job is _DONE:
+                stats.add(starved=started - waited)
+                finished(outbox)
+                return
+            QUEUE_DEPTH.set(inbox.qsize(), source=f"batch_{name}")
+
+            errors = 0
+            if job.error is None:
+                try:
+                    func(job)
+                except Exception as e:
+                    job.error = f"{name}: {e}"
+                    job.release_images()
+                    errors = 1
+                    JOBS.inc(source="batch", event="failed")
+            done = time.perf_counter()
+            RENDER_SECONDS.observe(done - started, stage=f"batch_{name}")
+
+            outbox.put(job)
+            stats.add(busy=done - started, starved=started - waited, blocked=time.perf_counter() - done,
+                      items=1, errors=errors)
+
+    def stage_finisher(self, name, next_workers):
+        """Paskutinis baigęs etapo darbininkas perduoda pabaigos žymes kitam etapui"""
+        remaining = [self.workers[name]]
+        lock = threading.Lock()
+
+        def finished(outbox):
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                for _ in range(next_workers):
+                    outbox.put(_DONE)
+        return finished
+
+    def run(self, jobs, progress=None):
+        """Vykdo užduotis etapais; grąžina užduotis ta pačia tvarka
+
+        progress(užduotis) kviečiamas šioje gijoje kiekvienai baigtai užduočiai.
+        """
+        jobs = assign_unique_stems(list(jobs))
+        pending = self.pending_jobs(jobs)
+        self.stats = {name: StageStats(name, self.workers[name]) for name in self.STAGES}
+
+        # Įvesties eilė taip pat ribota - skaitymas neaplenkia piešimo per daug
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.STAGES]
+        results = queue.Queue()
+        outboxes = queues[1:] + [results]
+        threads = []
+        start = time.perf_counter()
+        for index, name in enumerate(self.STAGES):
+            next_workers = self.workers[self.STAGES[index + 1]] if index + 1 < len(self.STAGES) else 1
+            finished = self.stage_finisher(name, next_workers)
+            for worker in range(self.workers[name]):
+                thread = threading.Thread(target=self.run_stage, name=f"batch-{name}-{worker}",
+                                          args=(name, getattr(self, name), queues[index], outboxes[index], finished),
+                                          daemon=True)
+                thread.start()
+                threads.append(thread)
+
+        def feed():
+            for job in pending:
+                JOBS.inc(source="batch", event="queued")
+                queues[0].put(job)
+            for _ in range(self.workers['decode']):
+                queues[0].put(_DONE)
+        feeder = threading.Thread(target=feed, name="batch-feed", daemon=True)
+        feeder.start()
+
+        while True:
+            job = results.get()
+            if job is _DONE:
+                break
+            if progress is not None:
+                progress(job)
+        for thread in threads + [feeder]:
+            thread.join()
+        self.wall = time.perf_counter() - start
+        return jobs
+
+    def run_sequential(self, jobs):
+        """Tie patys etapai paeiliui vienoje gijoje (palyginimui)"""
+        jobs = assign_unique_stems(list(jobs))
+        pending = self.pending_jobs(jobs)
+        self.stats = {name: StageStats(name, 1) for name in self.STAGES}
+        start = time.perf_counter()
+        for job in pending:
+            for name in self.STAGES:
+                if job.error is not None:
+                    break
+                began = time.perf_counter()
+                try:
+                    getattr(self, name)(job)
+                except Exception as e:
+                    job.error = f"{name}: {e}"
+                    job.release_images()
+                    self.stats[name].add(errors=1)
+                self.stats[name].add(busy=time.perf_counter() - began, items=1)
+        self.wall = time.perf_counter() - start
+        return jobs
+
+    def close(self):
+        """Uždaro išvestį ir sustabdo piešimo procesus"""
+        try:
+            self.sink.close()
+        finally:
+            if self.processes is not None:
+                self.processes.close()
+                self.processes = None
+
+    def report(self):
+        """Etapų užimtumas paskutiniame paleidime"""
+        return {
+            'wall_s': round(self.wall, 3),
+            'stages': {name: stats.report(self.wall) for name, stats in self.stats.items()}
+        }
+
+
+def collect_images(paths):
+    """Failai ir katalogų vaizdai (surikiuoti)"""
+    images = []
+    for path in paths:
+        if os.path.isdir(path):
+            images.extend(sorted(os.path.join(path, name) for name in os.listdir(path)
+                                 if name.lower().endswith(IMAGE_EXTENSIONS)))
+        else:
+            images.append(path)
+    return images
+
+
+def print_report(report, file=sys.stderr):
+    print(f"Laikas: {report['wall_s']:.2f} s", file=file)
+    print(f"  {'etapas':8} {'gijos':>5} {'kiekis':>6} {'darbas':>7} {'laukia':>7} {'blokuota':>8}", file=file)
+    for name, stage in report['stages'].items():
+        print(f"  {name:8} {stage['workers']:5} {stage['items']:6} {stage['utilisation']:7.0%} "
+              f"{stage['starved']:7.0%} {stage['blocked']:8.0%}", file=file)
+
+
+def benchmark(count=12, **options):
+    """Sintetinis paketas: nuoseklus vykdymas prieš etapų konvejerį"""
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for index in range(count):
+            path = os.path.join(directory, f"source_{index}.jpg")
+            Image.effect_noise((3000, 3000), 40 + index).convert("RGB").save(path, quality=92)
+            paths.append(path)
+        reports = {}
+        for mode in ('sequential', 'pipeline'):
+            # Tuščias disko kešas - kiekvienas viršelis piešiamas iš naujo
+            pipeline = BatchPipeline(os.path.join(directory, mode),
+                                     disk_cache=DiskRenderCache(os.path.join(directory, f"cache_{mode}"), max_bytes=0),
+                                     **options)
+            jobs = [BatchJob(path, f"DAINA {index}", DEFAULT_ARTIST) for index, path in enumerate(paths)]
+            if mode == 'sequential':
+                pipeline.run_sequential(jobs)
+            else:
+                pipeline.run(jobs)
+            pipeline.close()
+            reports[mode] = pipeline.report()
+            print(f"[{mode}]", file=sys.stderr)
+            print_report(reports[mode])
+        speedup = reports['sequential']['wall_s'] / reports['pipeline']['wall_s']
+        print(f"Pagreitėjimas: {speedup:.2f}x", file=sys.stderr)
+    return reports
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Paketinis viršelių eksportas etapų konvejeriu")
+    parser.add_argument("paths", nargs='*', help="Vaizdai arba katalogai")
+    parser.add_argument("--out", default="covers",
+                        help="Išvesties katalogas arba archyvas (.zip, .tar, .bundle); esami rezultatai praleidžiami")
+    parser.add_argument("--title", help="Pavadinimas (numatytasis - failo vardas)")
+    parser.add_argument("--artist", default=DEFAULT_ARTIST)
+    parser.add_argument("--blur", type=int, default=DEFAULT_BLUR_AMOUNT)
+    parser.add_argument("--format", choices=('png', 'jpeg'), default='png')
+    parser.add_argument("--compress-level", type=int, default=6, help="PNG zlib lygis (0-9)")
+    parser.add_argument("--decode-workers", type=int, default=1)
+    parser.add_argument("--render-workers", type=int, default=2)
+    parser.add_argument("--encode-workers", type=int, default=2)
+    parser.add_argument("--processes", type=int, default=0,
+                        help="Piešti N procesų (šaltiniai ir rezultatai - per bendrą atmintį)")
+    parser.add_argument("--queue-size", type=int, default=4, help="Eilės tarp etapų dydis")
+    parser.add_argument("--sequential", action='store_true', help="Vykdyti be konvejerio (palyginimui)")
+    parser.add_argument("--report", help="Įrašyti etapų užimtumą į JSON failą")
+    parser.add_argument("--benchmark", type=int, metavar="N", help="Sintetinis N vaizdų palyginimas")
+    args = parser.parse_args(argv)
+
+    options = {
+        'decode_workers': args.decode_workers,
+        'render_workers': args.render_workers,
+        'encode_workers': args.encode_workers,
+        'queue_size': args.queue_size,
+        'processes': args.processes,
+        'image_format': args.format,
+        'compress_level': args.compress_level
+    }
+    if args.benchmark:
+        benchmark(args.benchmark, **options)
+        return 0
+    if not args.paths:
+        parser.error("nenurodyti vaizdai")
+
+    jobs = [BatchJob(path, args.title or os.path.splitext(os.path.basename(path))[0].upper(), args.artist, args.blur)
+            for path in collect_images(args.paths)]
+    pipeline = BatchPipeline(args.out, **options)
+    try:
+        if args.sequential:
+            pipeline.run_sequential(jobs)
+        else:
+            pipeline.run(jobs)
+    finally:
+        pipeline.close()
+
+    failed = 0
+    skipped = sum(1 for job in jobs if job.skipped)
+    if skipped:
+        print(f"Praleista (jau eksportuota): {skipped}", file=sys.stderr)
+    for job in jobs:
+        if job.error:
+            failed += 1
+            print(f"{job.image_path}: {job.error}", file=sys.stderr)
+        for path in job.paths:
+            print(path)
+    report = pipeline.report()
+    print_report(report)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
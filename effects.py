@@ -0,0 +1,276 @@
+import os
+import sys
+import time
+import threading
+from collections import OrderedDict
+import numpy as np
+from PIL import Image, ImageFilter
+from fingerprint import file_content_hash
+
+
+class EffectSettings:
+    """Fono efektų nustatymai (visi 0 - efektai išjungti)
+
+    vignette ir grain: 0..1, brightness ir contrast: -1..1,
+    lut_path - .cube formato 3D LUT failas spalvų korekcijai, lut_hash - jo
+    turinio maišas (jei nenurodytas, apskaičiuojamas vieną kartą).
+    """
+    def __init__(self, vignette=0.0, grain=0.0, brightness=0.0, contrast=0.0, lut_path=None, grain_seed=0,
+                 lut_hash=None):
+        self.vignette = float(vignette)
+        self.grain = float(grain)
+        self.brightness = float(brightness)
+        self.contrast = float(contrast)
+        self.lut_path = lut_path or None
+        self.grain_seed = int(grain_seed)
+        self.lut_hash = lut_hash if self.lut_path else None
+
+    def key(self):
+        return (round(self.vignette, 4), round(self.grain, 4), round(self.brightness, 4),
+                round(self.contrast, 4), self.lut_path, self.grain_seed)
+
+    def __eq__(self, other):
+        return isinstance(other, EffectSettings) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    @property
+    def has_curve(self):
+        return self.brightness != 0 or self.contrast != 0
+
+    def is_identity(self):
+        return not (self.vignette or self.grain or self.has_curve or self.lut_path)
+
+    def params(self):
+        """Parametrai kešo raktui; LUT identifikuojamas pagal turinį, o ne kelią"""
+        return {
+            'vignette': round(self.vignette, 4),
+            'grain': round(self.grain, 4),
+            'grain_seed': self.grain_seed,
+            'brightness': round(self.brightness, 4),
+            'contrast': round(self.contrast, 4),
+            'lut': self.lut_content_hash()
+        }
+
+    def lut_content_hash(self):
+        if self.lut_path and self.lut_hash is None:
+            self.lut_hash = file_content_hash(self.lut_path)
+        return self.lut_hash
+
+
+def load_cube_lut(path):
+    """Nuskaito .cube 3D LUT failą į Pillow Color3DLUT"""
+    size = None
+    domain_min = (0.0, 0.0, 0.0)
+    domain_max = (1.0, 1.0, 1.0)
+    table = []
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            parts = line.split()
+            keyword = parts[0].upper()
+            if keyword == 'LUT_3D_SIZE':
+                size = int(parts[1])
+            elif keyword == 'DOMAIN_MIN':
+                domain_min = tuple(float(value) for value in parts[1:4])
+            elif keyword == 'DOMAIN_MAX':
+                domain_max = tuple(float(value) for value in parts[1:4])
+            elif keyword in ('TITLE', 'LUT_1D_SIZE', 'LUT_3D_INPUT_RANGE'):
+                if keyword == 'LUT_1D_SIZE':
+                    raise ValueError("1D LUT failai nepalaikomi")
+            else:
+                table.extend(float(value) for value in parts[:3])
+
+    if size is None or len(table) != size ** 3 * 3:
+        raise ValueError(f"Neteisingas .cube failas: {path}")
+    # Išvesties reikšmės normalizuojamos į 0..1 (.cube eilės tvarka - raudona kinta greičiausiai, kaip ir Pillow)
+    values = np.asarray(table, dtype=np.float32).reshape(-1, 3)
+    low = np.asarray(domain_min, dtype=np.float32)
+    high = np.asarray(domain_max, dtype=np.float32)
+    values = (values - low) / np.maximum(high - low, 1e-6)
+    return ImageFilter.Color3DLUT(size, values.ravel().tolist())
+
+
+def curve_function(brightness, contrast):
+    """Šviesumo/kontrasto kreivė 0..1 reikšmėms"""
+    gain = 1.0 + contrast
+
+    def curve(value):
+        return min(1.0, max(0.0, (value - 0.5) * gain + 0.5 + brightness))
+
+    return curve
+
+
+def curve_table(brightness, contrast):
+    """Kreivė kaip 256 reikšmių lentelė Image.point() operacijai"""
+    curve = curve_function(brightness, contrast)
+    return [int(round(curve(value / 255.0) * 255)) for value in range(256)]
+
+
+class EffectPipeline:
+    """Fono efektų grandinė su sulietais etapais
+
+    Spalvų etapai (3D LUT ir kreivė) sujungiami į vieną paiešką lentelėje:
+    kreivė pritaikoma LUT lentelės reikšmėms, todėl vaizdas apdorojamas
+    vienu Color3DLUT (arba vienu point()) praėjimu. Erdviniai etapai
+    (vinjetė ir grūdėtumas) sujungiami į vieną NumPy praėjimą
+    (daugyba iš kaukės + triukšmas). Kešuojami LUT, vienetinio stiprumo
+    vinjetės kritimas ir vienetinis triukšmas kiekvienam dydžiui (stiprumas
+    pritaikomas piešiant); kiekviename keše - tik max_entries naujausių įrašų.
+    """
+    def __init__(self, max_entries=4):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.luts = OrderedDict()
+        self.vignettes = OrderedDict()
+        self.grains = OrderedDict()
+
+    def cached(self, cache, key, build):
+        with self.lock:
+            value = cache.get(key)
+            if value is not None:
+                cache.move_to_end(key)
+                return value
+        value = build()
+        with self.lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > self.max_entries:
+                cache.popitem(last=False)
+        return value
+
+    def colour_lut(self, settings):
+        """Grąžina sulietą spalvų LUT (Color3DLUT), kreivės lentelę arba None"""
+        if settings.lut_path:
+            key = (settings.lut_path, os.stat(settings.lut_path).st_mtime_ns, settings.brightness, settings.contrast)
+
+            def build():
+                lut = load_cube_lut(settings.lut_path)
+                if settings.has_curve:
+                    curve = curve_function(settings.brightness, settings.contrast)
+                    lut = lut.transform(lambda r, g, b: (curve(r), curve(g), curve(b)))
+                return lut
+            return self.cached(self.luts, key, build)
+        if settings.has_curve:
+            return curve_table(settings.brightness, settings.contrast) * 3
+        return None
+
+    def vignette_falloff(self, size):
+        """Vienetinio stiprumo vinjetės kritimas (aukštis x plotis), float32"""
+        def build():
+            width, height = size
+            x = np.linspace(-1.0, 1.0, width, dtype=np.float32)
+            y = np.linspace(-1.0, 1.0, height, dtype=np.float32)
+            # Elipsinis atstumas nuo centro (kampuose = 1)
+            distance = (x[np.newaxis, :] ** 2 + y[:, np.newaxis] ** 2) / 2.0
+            return (np.clip(distance * 1.5 - 0.25, 0.0, 1.0) ** 1.5).astype(np.float32)
+        return self.cached(self.vignettes, size, build)
+
+    def vignette_mask(self, size, strength):
+        """Vinjetės daugiklių kaukė (aukštis x plotis), float32"""
+        mask = self.vignette_falloff(size) * np.float32(-strength)
+        mask += np.float32(1.0)
+        return mask
+
+    def unit_noise(self, size, seed):
+        """Vienetinis vienspalvis triukšmas (aukštis x plotis), float32"""
+        def build():
+            width, height = size
+            return np.random.default_rng(seed).standard_normal((height, width), dtype=np.float32)
+        return self.cached(self.grains, (size, seed), build)
+
+    def grain_noise(self, size, amount, seed):
+        """Vienspalvis grūdėtumo triukšmas (aukštis x plotis), float32"""
+        return self.unit_noise(size, seed) * np.float32(amount * 24.0)
+
+    def apply(self, image, settings):
+        """Pritaiko efektus RGB vaizdui ir grąžina naują vaizdą"""
+        if settings is None or settings.is_identity():
+            return image
+
+        # 1 praėjimas: visi spalvų etapai viena lentele
+        lut = self.colour_lut(settings)
+        if isinstance(lut, ImageFilter.Color3DLUT):
+            image = image.filter(lut)
+        elif lut is not None:
+            image = image.point(lut)
+
+        # 2 praėjimas: vinjetė ir grūdėtumas kartu
+        if settings.vignette or settings.grain:
+            pixels = np.asarray(image, dtype=np.float32)
+            if settings.vignette:
+                np.multiply(pixels, self.vignette_mask(image.size, settings.vignette)[:, :, np.newaxis], out=pixels)
+            if settings.grain:
+                np.add(pixels, self.grain_noise(image.size, settings.grain, settings.grain_seed)[:, :, np.newaxis],
+                       out=pixels)
+            np.clip(pixels, 0, 255, out=pixels)
+            image = Image.fromarray(pixels.astype(np.uint8), "RGB")
+        return image
+
+
+def apply_unfused(image, settings, pipeline, lut=None):
+    """Etapai po vieną (palyginimui): kiekvienas etapas - atskiras praėjimas"""
+    if lut is not None:
+        image = image.filter(lut)
+    if settings.has_curve:
+        image = image.point(curve_table(settings.brightness, settings.contrast) * 3)
+    if settings.vignette:
+        pixels = np.asarray(image, dtype=np.float32)
+        pixels = pixels * pipeline.vignette_mask(image.size, settings.vignette)[:, :, np.newaxis]
+        image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8), "RGB")
+    if settings.grain:
+        pixels = np.asarray(image, dtype=np.float32)
+        pixels = pixels + pipeline.grain_noise(image.size, settings.grain, settings.grain_seed)[:, :, np.newaxis]
+        image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8), "RGB")
+    return image
+
+
+def write_identity_cube(path, size=17):
+    """Įrašo tapatumo .cube LUT (testavimui ir kaip pavyzdys)"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"LUT_3D_SIZE {size}\n")
+        for b in range(size):
+            for g in range(size):
+                for r in range(size):
+                    f.write(f"{r / (size - 1):.6f} {g / (size - 1):.6f} {b / (size - 1):.6f}\n")
+
+
+def benchmark(image_path=None, repeats=5):
+    """Palygina sulietą efektų grandinę su etapais po vieną"""
+    import tempfile
+    if image_path:
+        image = Image.open(image_path).convert("RGB").resize((1080, 1920))
+    else:
+        image = Image.effect_noise((1080, 1920), 64).convert("RGB")
+
+    with tempfile.TemporaryDirectory() as directory:
+        lut_path = os.path.join(directory, "identity.cube")
+        write_identity_cube(lut_path)
+        settings = EffectSettings(vignette=0.6, grain=0.3, brightness=0.05, contrast=0.2, lut_path=lut_path)
+        pipeline = EffectPipeline()
+        pipeline.apply(image, settings)  # Sušildyti kešus
+        lut = load_cube_lut(lut_path)
+
+        results = {}
+        for name, func in (('po vieną', lambda: apply_unfused(image, settings, pipeline, lut)),
+                           ('sulieta', lambda: pipeline.apply(image, settings))):
+            best = None
+            for _ in range(repeats):
+                start = time.perf_counter()
+                func()
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            results[name] = best
+            print(f"{name:10} {best * 1000:8.1f} ms")
+
+        fused = np.asarray(pipeline.apply(image, settings), dtype=np.int16)
+        unfused = np.asarray(apply_unfused(image, settings, pipeline, lut), dtype=np.int16)
+        print(f"didžiausias skirtumas: {int(np.abs(fused - unfused).max())} (apvalinimas tarp etapų)")
+    return results
+
+
+if __name__ == "__main__":
+    benchmark(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,151 @@
+import os
+import sys
+import hashlib
+import threading
+from threading import Thread
+
+
+def file_content_hash(path, chunk_size=1024 * 1024):
+    """Apskaičiuoja failo turinio maišą skaitant jį dalimis"""
+    hasher = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def stat_key(path):
+    """Greitas failo būsenos raktas: kelias, dydis, pakeitimo laikai ir inode"""
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_size, stat.st_mtime_ns, stat.st_ctime_ns, stat.st_ino)
+
+
+class Fingerprinter:
+    """Failų antspaudai kešams: greitas stat patikrinimas ir turinio maišas
+
+    Antspaudas yra arba turinio maišas ("c:..."), arba, kol maišas dar
+    neapskaičiuotas, stat raktas ("s:..."). Turinio maišas leidžia pakartotinai
+    naudoti kešą po failo pervadinimo ar nukopijavimo, o stat raktas
+    užtikrina, kad perrašytas failas nebus laikomas tuo pačiu.
+    """
+    def __init__(self, hash_contents=True, background=True):
+        # hash_contents=False - naudoti tik stat raktus (be failo skaitymo)
+        # background=True - turinio maišą skaičiuoti fone, o ne kviečiančioje gijoje
+        self.hash_contents = hash_contents
+        self.background = background
+        self.lock = threading.Lock()
+
+        # stat raktas -> turinio maišas
+        self.content_hashes = {}
+        # stat raktai, kurių maišas šiuo metu skaičiuojamas
+        self.pending = {}
+        # stat raktas -> papildomi callback, užregistruoti skaičiavimui jau vykstant
+        self.waiters = {}
+
+    def quick(self, path):
+        """Grąžina stat antspaudą (neskaito failo turinio)"""
+        key = stat_key(path)
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return f"s:{digest}"
+
+    def content(self, path):
+        """Grąžina turinio antspaudą, jei reikia - apskaičiuoja jį šioje gijoje"""
+        key = stat_key(path)
+        with self.lock:
+            digest = self.content_hashes.get(key)
+            thread = self.pending.get(key)
+        if digest is None and thread is not None:
+            # Maišas jau skaičiuojamas fone - palaukti jo, o ne skaityti failą dar kartą
+            thread.join()
+            with self.lock:
+                digest = self.content_hashes.get(key)
+        if digest is None:
+            digest = file_content_hash(path)
+            with self.lock:
+                self.content_hashes[key] = digest
+        return f"c:{digest}"
+
+    def remember(self, path, fingerprint):
+        """Įsimena kitur (pvz., kitame procese) apskaičiuotą turinio antspaudą"""
+        if fingerprint is None or not fingerprint.startswith("c:"):
+            return
+        key = stat_key(path)
+        with self.lock:
+            self.content_hashes[key] = fingerprint[2:]
+
+    def fingerprint(self, path):
+        """Grąžina geriausią šiuo metu turimą antspaudą neblokuojant ilgam"""
+        if not self.hash_contents:
+            return self.quick(path)
+        if not self.background:
+            return self.content(path)
+
+        key = stat_key(path)
+        with self.lock:
+            digest = self.content_hashes.get(key)
+        if digest is not None:
+            return f"c:{digest}"
+
+        # Maišo dar nėra - paleisti jo skaičiavimą fone ir kol kas grąžinti stat antspaudą
+        self.hash_async(path)
+        return self.quick(path)
+
+    def hash_async(self, path, callback=None):
+        """Paleidžia turinio maišo skaičiavimą fono gijoje
+
+        callback(path, antspaudas) kviečiamas fono gijoje, kai maišas
+        apskaičiuotas (arba iš karto, jei jis jau žinomas).
+        """
+        key = stat_key(path)
+        with self.lock:
+            if key in self.content_hashes:
+                if callback:
+                    callback(path, f"c:{self.content_hashes[key]}")
+                return None
+            if key in self.pending:
+                if callback:
+                    self.waiters.setdefault(key, []).append(callback)
+                return self.pending[key]
+
+            thread = Thread(target=self._hash_worker, args=(path, key, callback), daemon=True)
+            self.pending[key] = thread
+        thread.start()
+        return thread
+
+    def _hash_worker(self, path, key, callback):
+        try:
+            digest = file_content_hash(path)
+        except OSError as e:
+            print(f"Klaida skaičiuojant failo maišą: {e}", file=sys.stderr)
+            digest = None
+        with self.lock:
+            if digest is not None:
+                self.content_hashes[key] = digest
+            self.pending.pop(key, None)
+            callbacks = ([callback] if callback else []) + self.waiters.pop(key, [])
+        if digest is not None:
+            for waiter in callbacks:
+                waiter(path, f"c:{digest}")
+
+    def canonical(self, path, fingerprint):
+        """Paverčia stat antspaudą turinio antspaudu, jei maišas jau žinomas"""
+        if fingerprint is None or not fingerprint.startswith("s:"):
+            return fingerprint
+        try:
+            key = stat_key(path)
+        except OSError:
+            return fingerprint
+        if self.quick(path) != fingerprint:
+            return fingerprint
+        with self.lock:
+            digest = self.content_hashes.get(key)
+        return f"c:{digest}" if digest is not None else fingerprint
+
+    def same(self, path, first, second):
+        """Patikrina, ar du to paties failo antspaudai reiškia tą patį turinį"""
+        if first is None or second is None:
+            return False
+        return first == second or self.canonical(path, first) == self.canonical(path, second)
@@ -0,0 +1,229 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+# Benchmark'as paleidžiamas be ekrano
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+from PIL import Image
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QObject, QEvent, QTimer, QEventLoop
+from PyQt5.QtTest import QTest
+from render_cache import DiskRenderCache
+
+
+def typing(widget_name, text, interval_ms):
+    """Scenarijus: tekstas įvedamas po vieną simbolį tikrais klavišų paspaudimais"""
+    def build(window):
+        widget = getattr(window, widget_name)
+        steps = [(0, lambda: widget.clear())]
+        for index, char in enumerate(text):
+            steps.append(((index + 1) * interval_ms, lambda char=char: QTest.keyClicks(widget, char)))
+        return steps
+    return build
+
+
+def slider(widget_getter, values, interval_ms):
+    """Scenarijus: slankiklis nustatomas į reikšmes nurodytu intervalu (kaip tempiant)"""
+    def build(window):
+        widget = widget_getter(window)
+        return [(index * interval_ms, lambda value=value: widget.setValue(value))
+                for index, value in enumerate(values)]
+    return build
+
+
+SCENARIOS = {
+    'title_typing': typing('title_input', "VASAROS NAKTIS", 120),
+    'artist_fast_typing': typing('artist_input', "GREITAS ATLIKEJAS", 40),
+    'blur_drag': slider(lambda window: window.blur_slider, list(range(60, 18, -2)), 16),
+    'blur_steps': slider(lambda window: window.blur_slider, [30, 45, 70, 85], 700),
+    'vignette_drag': slider(lambda window: window.effect_sliders['vignette'], list(range(0, 61, 5)), 30),
+}
+
+
+class PaintProbe(QObject):
+    """Įvykių filtras: fiksuoja, kada peržiūroje nupiešiamas naujas kadras"""
+    def __init__(self, window, on_frame):
+        super().__init__()
+        self.window = window
+        self.on_frame = on_frame
+        self.last_source = window.preview_label.source
+
+    def eventFilter(self, obj, event):
+        if event.type() != QEvent.Paint:
+            return False
+        # Apdoroti paint įvykį čia, kad būtų matuojama iki nupiešto kadro
+        obj.event(event)
+        source = self.window.preview_label.source
+        if source is not None and source is not self.last_source:
+            self.last_source = source
+            self.on_frame(time.perf_counter(), self.window.processed_key)
+        return True
+
+
+class ScenarioRun:
+    """Vieno scenarijaus vykdymas: įvestys, kadrai ir vėlinimai"""
+    def __init__(self, window, app, steps, settle_ms):
+        self.window = window
+        self.app = app
+        self.steps = steps
+        self.settle_ms = settle_ms
+        self.inputs = []  # [laikas, laukiamas raktas, atsakymo laikas arba None, ar parodytas būtent šis]
+        self.frames = 0
+        # Vaizdas scenarijaus metu nekinta - turinio antspaudas skaičiuojamas vieną kartą
+        self.fingerprint = window.fingerprinter.content(window.input_image_path)
+
+    def expected_key(self):
+        window = self.window
+        title = window.title_input.text() or "TAU MICH AUF"
+        artist = window.artist_input.text() or "NIKLAS DEE"
+        return window.renderer.render_key(self.fingerprint, title, artist, window.blur_amount)
+
+    def perform(self, action):
+        before = self.window.processed_key
+        # Laikas matuojamas nuo įvesties, o ne nuo jos apdorojimo pabaigos
+        started = time.perf_counter()
+        action()
+        key = self.expected_key()
+        if key == before and not self.inputs:
+            return  # Įvestis nieko nepakeitė (pvz., ta pati reikšmė)
+        self.inputs.append([started, key, None, False])
+
+    def on_frame(self, timestamp, key):
+        self.frames += 1
+        # Naujausia įvestis, kurios būseną rodo kadras
+        shown = None
+        for index, item in enumerate(self.inputs):
+            if item[1] == key:
+                shown = index
+        if shown is None:
+            return
+        self.inputs[shown][3] = True
+        for item in self.inputs[:shown + 1]:
+            if item[2] is None:
+                item[2] = timestamp
+
+    def pending(self):
+        return any(item[2] is None for item in self.inputs)
+
+    def run(self):
+        loop = QEventLoop()
+        probe = PaintProbe(self.window, self.on_frame)
+        self.window.preview_label.installEventFilter(probe)
+
+        for offset, action in self.steps:
+            QTimer.singleShot(offset, lambda action=action: self.perform(action))
+
+        last_step = max(offset for offset, _ in self.steps)
+        deadline = time.perf_counter() + (last_step + self.settle_ms) / 1000
+
+        def check():
+            if time.perf_counter() > deadline or (time.perf_counter() * 1000 > start_ms + last_step
+                                                   and self.inputs and not self.pending()):
+                loop.quit()
+            else:
+                QTimer.singleShot(10, check)
+
+        start_ms = time.perf_counter() * 1000
+        QTimer.singleShot(10, check)
+        loop.exec_()
+        # Leisti paskutiniam kadrui nusistovėti
+        self.app.processEvents()
+        self.window.preview_label.removeEventFilter(probe)
+        return self.summary()
+
+    def summary(self):
+        latencies = np.array([(item[2] - item[0]) * 1000 for item in self.inputs if item[2] is not None])
+        dropped = sum(1 for item in self.inputs if item[2] is None)
+        coalesced = sum(1 for item in self.inputs if item[2] is not None and not item[3])
+        result = {
+            'inputs': len(self.inputs),
+            'frames': self.frames,
+            'coalesced': coalesced,  # Tarpinės būsenos, kurių neprireikė parodyti (debounce)
+            'dropped': dropped  # Įvestys, kurių būsena taip ir nebuvo parodyta
+        }
+        if latencies.size:
+            result.update({
+                'p50_ms': round(float(np.percentile(latencies, 50)), 1),
+                'p90_ms': round(float(np.percentile(latencies, 90)), 1),
+                'p99_ms': round(float(np.percentile(latencies, 99)), 1),
+                'max_ms': round(float(latencies.max()), 1)
+            })
+        return result
+
+
+def wait_for_load(window, app, timeout=30):
+    """Palaukia, kol fono gija įkels vaizdą"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        app.processEvents()
+        thread = window.processing_thread
+        if thread is not None and not thread.is_alive() and window.export_btn.isEnabled():
+            return
+        time.sleep(0.005)
+    raise TimeoutError("Vaizdas neįsikėlė")
+
+
+def run_benchmark(image_path=None, scenarios=None, settle_ms=3000, warm_cache=False):
+    """Paleidžia tikrą ImageTemplateApp ir atkuria scenarijus; grąžina rezultatus pagal scenarijų"""
+    from image_template_app import ImageTemplateApp
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    with tempfile.TemporaryDirectory() as directory:
+        if image_path is None:
+            image_path = os.path.join(directory, "source.jpg")
+            Image.effect_noise((3000, 4000), 50).convert("RGB").save(image_path, quality=90)
+
+        window = ImageTemplateApp()
+        if not warm_cache:
+            # Tuščias disko kešas - matuojamas tikras piešimas, o ne ankstesnių paleidimų rezultatai
+            cache = DiskRenderCache(os.path.join(directory, "cache"))
+            window.disk_cache = window.renderer.disk_cache = window.export_renderer.disk_cache = cache
+        window.show()
+        app.processEvents()
+
+        window.input_image_path = image_path
+        window.load_image_async(image_path)
+        wait_for_load(window, app)
+
+        results = {}
+        for name in scenarios or SCENARIOS:
+            steps = SCENARIOS[name](window)
+            results[name] = ScenarioRun(window, app, steps, settle_ms).run()
+        window.close()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="GUI interaktyvumo vėlinimo matavimas (offscreen)")
+    parser.add_argument("--image", help="Šaltinio vaizdas (numatytasis - sintetinis 3000x4000)")
+    parser.add_argument("--scenario", action='append', choices=sorted(SCENARIOS), help="Scenarijai (galima kartoti)")
+    parser.add_argument("--warm-cache", action='store_true', help="Naudoti įprastą disko kešą")
+    parser.add_argument("--json", help="Įrašyti rezultatus į JSON failą")
+    parser.add_argument("--max-p90", type=float, help="Klaida, jei kurio nors scenarijaus p90 viršija ribą (ms)")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.image, args.scenario, warm_cache=args.warm_cache)
+
+    print(f"{'scenarijus':20} {'įvestys':>7} {'kadrai':>6} {'sujungta':>8} {'prarasta':>8} "
+          f"{'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}")
+    failed = False
+    for name, result in results.items():
+        print(f"{name:20} {result['inputs']:7} {result['frames']:6} {result['coalesced']:8} {result['dropped']:8} "
+              f"{result.get('p50_ms', 0):8.1f} {result.get('p90_ms', 0):8.1f} "
+              f"{result.get('p99_ms', 0):8.1f} {result.get('max_ms', 0):8.1f}")
+        if result['dropped'] or (args.max_p90 is not None and result.get('p90_ms', 0) > args.max_p90):
+            failed = True
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
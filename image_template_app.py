@@ -6,11 +6,9 @@ from threading import Thread
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                             QLabel, QPushButton, QFileDialog, QLineEdit, QFrame, QSizePolicy,
                             QSlider, QFormLayout, QMessageBox, QDialog, QTextEdit, 
-                            QComboBox, QProgressDialog, QCheckBox)
-from PyQt5.QtGui import QPixmap, QImage, QPainter, QPainterPath, QColor, QFont, QCursor, QPen, QBrush
+                            QComboBox, QProgressDialog, QCheckBox, QShortcut)
+from PyQt5.QtGui import QPixmap, QImage, QPainter, QPainterPath, QColor, QFont, QCursor, QPen, QBrush, QKeySequence
 from PyQt5.QtCore import Qt, QRect, QSize, QRectF, QTimer, QPoint, pyqtSignal, QObject, QThread
-from PIL import Image, ImageDraw, ImageFilter, ImageEnhance, ImageFont
-import numpy as np
 import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
@@ -24,6 +22,17 @@ from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 import getpass
 import json
 from email.header import Header
+from story_animation import StoryAnimator, AnimationSettings
+from template_renderer import TemplateRenderer, quick_preview
+from render_graph import build_template_graph
+from effects import EffectSettings, load_cube_lut
+from fingerprint import file_content_hash
+from quality_presets import PRESETS, BEST, INTERACTIVE_PRESET
+from qt_backend import BACKENDS, pil_to_qimage
+from queue_panel import QueuePanel, ThumbnailRenderer
+from batch_pipeline import BatchPipeline, BatchJob
+from profiling import profiled, configure_from_environment, image_size
+from metrics import REGISTRY, JOBS, ENCODED_BYTES, SMTP_SEND_SECONDS, PREVIEW_LATENCY_SECONDS, cache_result
 
 # Kurkime signalų klasę, kuri leis komunikuoti tarp gijų
 class WorkerSignals(QObject):
@@ -45,6 +54,70 @@ class ImageProcessingThread(Thread):
         result = self.app.create_template(self.image_path, self.title, self.artist, self.blur_amount)
         self.signals.finished.emit(result)
 
+# Fono gija naujo vaizdo įkėlimui ir pilnam apdorojimui
+class ImageLoadingThread(Thread):
+    def __init__(self, app, generation, image_path, title, artist, blur_amount, previous=None):
+        Thread.__init__(self, daemon=True)
+        self.app = app
+        self.generation = generation
+        self.image_path = image_path
+        self.title = title
+        self.artist = artist
+        self.blur_amount = blur_amount
+        self.previous = previous  # Ankstesnė (atšaukta) įkėlimo gija
+        self.cancelled = False
+        self.signals = WorkerSignals()
+    
+    def cancel(self):
+        """Atšaukia įkėlimą - rezultatas nebus perduotas"""
+        self.cancelled = True
+        JOBS.inc(source="gui", event="cancelled")
+    
+    def run(self):
+        # Palaukti, kol atšaukta gija baigs dabartinį etapą - piešėjas nėra skirtas kelioms gijoms
+        if self.previous is not None:
+            self.previous.join()
+            self.previous = None
+        if self.cancelled:
+            return
+        
+        try:
+            # Fono gijoje galima palaukti turinio maišo - jis lieka antspaudų keše GUI gijai
+            result = self.app.render_outputs(self.image_path, self.title, self.artist, self.blur_amount,
+                                             cancelled=lambda: self.cancelled, wait_for_hash=True)
+        except Exception as e:
+            result = e
+        
+        if result is None or self.cancelled:
+            return
+        self.signals.finished.emit((self.generation, result))
+
+class BatchSignals(QObject):
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(object)
+
+# Fono gija visos eilės eksportui (etapų konvejeris: dekodavimas, piešimas, kodavimas)
+class BatchExportThread(Thread):
+    def __init__(self, pipeline, jobs):
+        Thread.__init__(self, daemon=True)
+        self.pipeline = pipeline
+        self.jobs = jobs
+        self.done = 0
+        self.signals = BatchSignals()
+    
+    def on_job_done(self, job):
+        self.done += 1
+        self.signals.progress.emit(self.done, len(self.jobs))
+    
+    def run(self):
+        try:
+            result = self.pipeline.run(self.jobs, progress=self.on_job_done)
+        except Exception as e:
+            result = e
+        finally:
+            self.pipeline.close()
+        self.signals.finished.emit(result)
+
 # Pagrindinis žvaigždžių animacijos klasė
 class StarryBackground(QWidget):
     def __init__(self, star_count=100, parent=None):
@@ -128,6 +201,114 @@ class StarryBackground(QWidget):
                 )
             )
 
+# Peržiūros valdiklis, kuris perskaičiuoja mastelį tik pasikeitus dydžiui
+class PreviewWidget(QWidget):
+    clicked = pyqtSignal()
+    
+    def __init__(self, placeholder="", padding=10, radius=10, background=QColor(30, 30, 40, 100), parent=None):
+        super(PreviewWidget, self).__init__(parent)
+        self.placeholder = placeholder
+        self.padding = padding
+        self.radius = radius
+        self.background = background
+        
+        # Šaltinio kadras ir sumažintų pixmap'ų kešas pagal (plotis, aukštis, glotnus)
+        self.source = None
+        self.scaled_cache = {}
+        self.max_cached_sizes = 4
+        
+        # Interaktyvaus dydžio keitimo metu naudojamas greitas mastelis, nusistovėjus - glotnus
+        self.resizing = False
+        self.settle_timer = QTimer(self)
+        self.settle_timer.setSingleShot(True)
+        self.settle_timer.timeout.connect(self.on_resize_settled)
+        
+        self.setAttribute(Qt.WA_OpaquePaintEvent, False)
+    
+    def setImage(self, image):
+        """Nustato naują kadrą (PIL vaizdą arba QImage)"""
+        self.source = image if isinstance(image, QImage) else pil_to_qimage(image)
+        self.scaled_cache = {}
+        self.update()
+    
+    def clear(self):
+        self.source = None
+        self.scaled_cache = {}
+        self.update()
+    
+    def showMessage(self, text):
+        """Išvalo kadrą ir parodo tekstą"""
+        self.placeholder = text
+        self.clear()
+    
+    def content_rect(self):
+        return self.rect().adjusted(self.padding, self.padding, -self.padding, -self.padding)
+    
+    def target_rect(self):
+        """Vaizdo vieta valdiklyje išlaikant santykį"""
+        area = self.content_rect()
+        size = self.source.size().scaled(area.size(), Qt.KeepAspectRatio)
+        x = area.x() + (area.width() - size.width()) // 2
+        y = area.y() + (area.height() - size.height()) // 2
+        return QRect(x, y, size.width(), size.height())
+    
+    def scaled_pixmap(self, size):
+        """Grąžina sumažintą pixmap'ą iš kešo arba jį sukuria"""
+        smooth = not self.resizing
+        key = (size.width(), size.height(), smooth)
+        pixmap = self.scaled_cache.get(key)
+        if pixmap is None and not smooth:
+            # Jei jau turime glotnų to paties dydžio variantą, naudoti jį
+            pixmap = self.scaled_cache.get((size.width(), size.height(), True))
+        if pixmap is None:
+            mode = Qt.SmoothTransformation if smooth else Qt.FastTransformation
+            # Mažinti QImage, o ne viso dydžio QPixmap - išvengiama pilno kadro konvertavimo
+            pixmap = QPixmap.fromImage(self.source.scaled(size, Qt.IgnoreAspectRatio, mode))
+            if len(self.scaled_cache) >= self.max_cached_sizes:
+                self.scaled_cache.pop(next(iter(self.scaled_cache)))
+            self.scaled_cache[key] = pixmap
+        return pixmap
+    
+    def resizeEvent(self, event):
+        self.resizing = True
+        self.settle_timer.start(150)
+        super(PreviewWidget, self).resizeEvent(event)
+    
+    def on_resize_settled(self):
+        self.resizing = False
+        self.update()
+    
+    def mousePressEvent(self, event):
+        self.clicked.emit()
+    
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        exposed = event.rect()
+        painter.setClipRect(exposed)
+        
+        # Fonas su apvalintais kampais
+        path = QPainterPath()
+        path.addRoundedRect(QRectF(self.rect()), self.radius, self.radius)
+        painter.fillPath(path, self.background)
+        
+        if self.source is None or self.source.isNull():
+            painter.setPen(QColor(255, 255, 255))
+            painter.drawText(self.rect(), Qt.AlignCenter | Qt.TextWordWrap, self.placeholder)
+            return
+        
+        target = self.target_rect()
+        if target.isEmpty():
+            return
+        pixmap = self.scaled_pixmap(target.size())
+        
+        # Piešti tik atidengtą sritį
+        dirty = target.intersected(exposed)
+        if dirty.isEmpty():
+            return
+        source_rect = dirty.translated(-target.x(), -target.y())
+        painter.drawPixmap(dirty, pixmap, source_rect)
+
 class EmailDialog(QDialog):
     """Dialogo langas el. pašto informacijai įvesti"""
     def __init__(self, parent=None, saved_settings=None):
@@ -225,7 +406,8 @@ class EmailWorkerSignals(QObject):
 
 # Siuntimo darbo klasė, kuri veiks atskiroje gijoje
 class EmailWorker(QThread):
-    def __init__(self, app, from_email, password, to_email, subject, message_text, smtp_server, smtp_port, image1, image2):
+    def __init__(self, app, from_email, password, to_email, subject, message_text, smtp_server, smtp_port, image1, image2,
+                 image1_key=None, image2_key=None):
         super().__init__()
         self.app = app
         self.from_email = from_email
@@ -237,8 +419,22 @@ class EmailWorker(QThread):
         self.smtp_port = smtp_port
         self.image1 = image1
         self.image2 = image2
+        # Kešo raktai, kad jau užkoduoti PNG nebūtų koduojami iš naujo
+        self.image1_key = image1_key
+        self.image2_key = image2_key
         self.signals = EmailWorkerSignals()
     
+    def profile_params(self):
+        """Siuntimo parametrai lėto iškvietimo profiliui (be adresų ir slaptažodžių)"""
+        return {
+            'smtp_server': self.smtp_server,
+            'smtp_port': self.smtp_port,
+            'image1_size': image_size(self.image1),
+            'image2_size': image_size(self.image2),
+            'encoded_cached': [key in self.app.encoded_cache for key in (self.image1_key, self.image2_key)]
+        }
+    
+    @profiled("email_send", lambda worker: worker.profile_params())
     def run(self):
         """Vykdyti el. pašto siuntimą atskiroje gijoje"""
         try:
@@ -259,12 +455,12 @@ class EmailWorker(QThread):
             # Pridėti nuotraukas kaip priedus
             self.signals.progress.emit("Pridedamos nuotraukos...")
             
-            img_data1 = self.app.get_image_bytes(self.image1)
+            img_data1 = self.app.get_image_bytes(self.image1, self.image1_key)
             image1 = MIMEImage(img_data1)
             image1.add_header('Content-Disposition', 'attachment', filename='muzikos_virselis.png')
             msg.attach(image1)
             
-            img_data2 = self.app.get_image_bytes(self.image2)
+            img_data2 = self.app.get_image_bytes(self.image2, self.image2_key)
             image2 = MIMEImage(img_data2)
             image2.add_header('Content-Disposition', 'attachment', filename='muzikos_virselis_paprasta.png')
             msg.attach(image2)
@@ -272,6 +468,7 @@ class EmailWorker(QThread):
             # Prisijungti prie SMTP serverio ir išsiųsti el. laišką
             self.signals.progress.emit("Jungiamasi prie pašto serverio...")
             
+            send_start = time.perf_counter()
             try:
                 # Bandyti su skirtingais portais ir saugumo protokolais
                 # Pridėti trumpą 10s timeout, kad neužstrigtų amžinai
@@ -296,8 +493,10 @@ class EmailWorker(QThread):
                 server.sendmail(self.from_email, self.to_email, msg.as_string())
                 server.quit()
                 
+                SMTP_SEND_SECONDS.observe(time.perf_counter() - send_start, result="ok")
                 self.signals.finished.emit(True, "Nuotraukos sėkmingai išsiųstos el. paštu!")
             except Exception as e:
+                SMTP_SEND_SECONDS.observe(time.perf_counter() - send_start, result="error")
                 # Parodome detalesnę klaidą su visais duomenimis
                 error_message = f"Nepavyko išsiųsti el. laiško: {str(e)}\n\n"
                 error_message += f"SMTP serveris: {self.smtp_server}\n"
@@ -330,21 +529,59 @@ class ImageTemplateApp(QMainWindow):
         self.processed_image = None
         self.blur_amount = 60  # Numatytasis blur kiekis (60%)
         
-        # Kintamieji kešavimui
-        self.cached_background = None
-        self.cached_blur_amount = None
-        self.cached_image_path = None  # Išsaugos kelią iki paskutinio kešuoto vaizdo
+        # Šablono piešėjas su fono, šaltinio ir šriftų kešais
+        self.renderer = TemplateRenderer()
+        self.fingerprinter = self.renderer.fingerprinter
+        self.disk_cache = self.renderer.disk_cache
+        
+        # Peržiūrai - greitesnis kokybės režimas, eksportui ir el. paštui - visada "best"
+        self.renderer.quality = PRESETS[INTERACTIVE_PRESET]
+        self.export_renderer = TemplateRenderer(self.fingerprinter, self.disk_cache, self.renderer.tiled)
+        
+        # Inkrementinis grafas - perskaičiuojami tik etapai, kurių įvestys pasikeitė
+        self.render_graph = build_template_graph(self.renderer)
+        
+        # Peržiūros kadras piešiamas QPainter (greičiau nei Pillow + konvertavimas), eksportas - Pillow
+        self.preview_backend = BACKENDS['qpainter'](self.renderer)
+        self.preview_frame = None
+        
+        # Kelių vaizdų eilė: miniatiūros piešiamos lygiagrečiai fone
+        self.thumbnail_renderer = ThumbnailRenderer(self.fingerprinter, self.disk_cache, self.renderer.tiled)
+        self.queue_item = None  # Šiuo metu redaguojamas eilės elementas
+        self.batch_thread = None
+        
+        # Užkoduotų rezultatų kešas
+        self.encoded_cache = {}
+        self.processed_key = None
+        self.simple_key = None
         
         # Nustatyti tamsų stilių visai aplikacijai
         self.set_dark_style()
         
         # Kintamieji optimizacijai
         self.processing_thread = None
+        self.load_generation = 0  # Didinamas kiekvieną kartą pasirinkus naują vaizdą
+        self.pending_change = None  # (priežastis, laikas) - pirmas dar neparodytas pakeitimas
         self.last_text_change_time = 0
         self.text_change_timer = QTimer()
         self.text_change_timer.setSingleShot(True)
         self.text_change_timer.timeout.connect(self.delayed_text_change)
         
+        # Fone apskaičiuotas turinio maišas (kai GUI gijoje dar naudotas stat antspaudas)
+        self.awaiting_hash = None
+        self.hash_signals = WorkerSignals()
+        self.hash_signals.finished.connect(self.on_hash_ready)
+        
+        # Piešėjo nustatymai, atidėti kol fone įkeliamas vaizdas (pavadinimas -> funkcija)
+        self.deferred_settings = {}
+        self.settings_timer = QTimer()
+        self.settings_timer.setSingleShot(True)
+        self.settings_timer.timeout.connect(self.apply_deferred_settings)
+        
+        # Ctrl+Shift+M - išsaugoti sesijos metrikas (JSON arba Prometheus tekstu)
+        self.metrics_shortcut = QShortcut(QKeySequence("Ctrl+Shift+M"), self)
+        self.metrics_shortcut.activated.connect(self.save_metrics)
+        
         self.simple_image = None  # Naujas kintamasis paprastai 9:16 versijai
         
         # Įkelti išsaugotus el. pašto nustatymus
@@ -360,6 +597,9 @@ class ImageTemplateApp(QMainWindow):
         # Darbo gija
         self.email_worker = None
         
+        # Animuotos istorijos nustatymai (kadrų skaičius, FPS, atminties limitas)
+        self.animation_settings = AnimationSettings()
+        
         self.init_ui()
     
     def set_dark_style(self):
@@ -477,6 +717,47 @@ class ImageTemplateApp(QMainWindow):
         self.blur_value_label = QLabel(f"{self.blur_amount}%")
         form_layout.addRow("", self.blur_value_label)
         
+        # Fono efektų slankikliai (0 - išjungta)
+        self.effect_sliders = {}
+        for name, label, minimum in (('vignette', "🌑 Vinjetė:", 0), ('grain', "🎞️ Grūdėtumas:", 0),
+                                     ('brightness', "☀️ Šviesumas:", -100), ('contrast', "◐ Kontrastas:", -100)):
+            slider = QSlider(Qt.Horizontal)
+            slider.setMinimum(minimum)
+            slider.setMaximum(100)
+            slider.setValue(0)
+            slider.valueChanged.connect(self.on_effects_changed)
+            form_layout.addRow(label, slider)
+            self.effect_sliders[name] = slider
+        
+        # Spalvų korekcijos LUT (.cube) pasirinkimas
+        self.lut_path = None
+        self.lut_hash = None  # Turinio maišas skaičiuojamas vieną kartą įkeliant
+        lut_layout = QHBoxLayout()
+        self.lut_btn = QPushButton("Pasirinkti .cube")
+        self.lut_btn.clicked.connect(self.select_lut)
+        self.lut_clear_btn = QPushButton("✕")
+        self.lut_clear_btn.setFixedWidth(30)
+        self.lut_clear_btn.clicked.connect(self.clear_lut)
+        lut_layout.addWidget(self.lut_btn)
+        lut_layout.addWidget(self.lut_clear_btn)
+        form_layout.addRow("🎨 LUT:", lut_layout)
+        
+        # Peržiūros kokybė (eksportuojama visada geriausia kokybe)
+        self.quality_combo = QComboBox()
+        for name, label in (('draft', "Greičiausia"), ('balanced', "Subalansuota"), ('best', "Geriausia")):
+            self.quality_combo.addItem(label, name)
+        self.quality_combo.setCurrentIndex(self.quality_combo.findData(self.renderer.quality.name))
+        self.quality_combo.currentIndexChanged.connect(self.on_quality_changed)
+        form_layout.addRow("⚡ Peržiūra:", self.quality_combo)
+        
+        # Peržiūros kadro piešimo būdas
+        self.backend_combo = QComboBox()
+        for name, label in (('qpainter', "QPainter"), ('pillow', "Pillow")):
+            self.backend_combo.addItem(label, name)
+        self.backend_combo.setCurrentIndex(self.backend_combo.findData(self.preview_backend.name))
+        self.backend_combo.currentIndexChanged.connect(self.on_backend_changed)
+        form_layout.addRow("🖌 Piešimas:", self.backend_combo)
+        
         left_layout.addLayout(form_layout)
         
         # Pridėti el. pašto mygtuką šalia eksporto mygtuko
@@ -527,6 +808,26 @@ class ImageTemplateApp(QMainWindow):
         
         left_layout.addLayout(email_export_layout)
         
+        # Animuotos istorijos eksporto mygtukas
+        self.animation_btn = QPushButton("🎞️ Eksportuoti animaciją")
+        self.animation_btn.clicked.connect(self.export_animation)
+        self.animation_btn.setEnabled(False)
+        self.animation_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #9C27B0;  /* Violetinė spalva */
+                padding: 10px;
+                font-size: 14px;
+            }
+            QPushButton:hover {
+                background-color: #7B1FA2;
+            }
+            QPushButton:disabled {
+                background-color: #333333;
+                color: #666666;
+            }
+        """)
+        left_layout.addWidget(self.animation_btn)
+        
         # NAUJAS KODAS: Pridėti skyrelį paprastai 9:16 versijai
         simple_section = QFrame()
         simple_section.setStyleSheet("background-color: rgba(30, 30, 40, 100); border-radius: 10px; padding: 10px;")
@@ -540,9 +841,8 @@ class ImageTemplateApp(QMainWindow):
         simple_layout.addWidget(simple_title)
         
         # Peržiūros etiketė paprastai versijai
-        self.simple_preview = QLabel("Paprasta versija")
-        self.simple_preview.setStyleSheet("background-color: rgba(30, 30, 40, 50); color: white; border-radius: 5px; padding: 5px;")
-        self.simple_preview.setAlignment(Qt.AlignCenter)
+        self.simple_preview = PreviewWidget("Paprasta versija", padding=5, radius=5,
+                                            background=QColor(30, 30, 40, 50))
         self.simple_preview.setFixedHeight(150)  # Fiksuotas aukštis, kad nekistų UI
         simple_layout.addWidget(self.simple_preview)
         
@@ -563,21 +863,13 @@ class ImageTemplateApp(QMainWindow):
         right_panel.setLayout(right_layout)
         
         # Peržiūros etiketė
-        self.preview_label = QLabel(self)
-        self.preview_label.setAlignment(Qt.AlignCenter)
+        self.preview_label = PreviewWidget("Spustelėkite čia, kad pasirinktumėte vaizdą", padding=10, radius=10)
         self.preview_label.setMinimumSize(450, 800)  # 9:16 santykis
-        self.preview_label.setStyleSheet("""
-            background-color: rgba(30, 30, 40, 100);
-            color: white;
-            border-radius: 10px;
-            padding: 10px;
-        """)
         self.preview_label.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-        self.preview_label.setText("Spustelėkite čia, kad pasirinktumėte vaizdą")
         self.preview_label.setCursor(QCursor(Qt.PointingHandCursor))
         
         # Pridėti spustelėjimo valdymą
-        self.preview_label.mousePressEvent = lambda event: self.select_image()
+        self.preview_label.clicked.connect(self.select_image)
         
         preview_container = QWidget()
         preview_container_layout = QVBoxLayout()
@@ -593,9 +885,18 @@ class ImageTemplateApp(QMainWindow):
         right_layout.addWidget(preview_title)
         right_layout.addWidget(preview_container)
         
+        # Eilės skydelis - keli vaizdai su savo nustatymais
+        self.queue_panel = QueuePanel(self.thumbnail_renderer)
+        self.queue_panel.setMaximumWidth(260)
+        self.queue_panel.setStyleSheet("background-color: rgba(30, 30, 40, 180);")
+        self.queue_panel.add_requested.connect(self.add_queue_images)
+        self.queue_panel.item_selected.connect(self.on_queue_item_selected)
+        self.queue_panel.export_requested.connect(self.export_all)
+        
         # Pridėti skydelius į pagrindinį išdėstymą
         main_layout.addWidget(left_panel)
         main_layout.addWidget(right_panel, 1)  # Dešinysis skydelis užima daugiau vietos
+        main_layout.addWidget(self.queue_panel)
         
         # Nustatyti paddings ir margins
         main_layout.setContentsMargins(20, 20, 20, 20)
@@ -610,6 +911,7 @@ class ImageTemplateApp(QMainWindow):
             
         # Atidėti atnaujinimą 300ms
         self.last_text_change_time = time.time()
+        self.mark_pending_change("text")
         self.text_change_timer.start(300)
     
     def delayed_text_change(self):
@@ -622,11 +924,88 @@ class ImageTemplateApp(QMainWindow):
             
         self.process_image()
     
+    def apply_when_idle(self, name, apply):
+        """Piešėjo nustatymai keičiami tik kai fono įkėlimas nevyksta (piešėjas skirtas vienai gijai)"""
+        if self.processing_thread and self.processing_thread.is_alive():
+            self.deferred_settings[name] = apply
+            self.settings_timer.start(100)
+            return
+        apply()
+    
+    def apply_deferred_settings(self):
+        """Pritaiko įkėlimo metu pakeistus nustatymus (paskutines valdiklių reikšmes)"""
+        if self.processing_thread and self.processing_thread.is_alive():
+            self.settings_timer.start(100)
+            return
+        deferred, self.deferred_settings = self.deferred_settings, {}
+        for apply in deferred.values():
+            apply()
+    
+    def on_effects_changed(self):
+        """Atnaujina fono efektus ir atideda peržiūros atnaujinimą"""
+        self.mark_pending_change("effects")
+        self.apply_when_idle("effects", self.apply_effects)
+    
+    def apply_effects(self):
+        values = {name: slider.value() / 100 for name, slider in self.effect_sliders.items()}
+        effects = EffectSettings(lut_path=self.lut_path, lut_hash=self.lut_hash, **values)
+        self.renderer.effects = None if effects.is_identity() else effects
+        self.thumbnail_renderer.effects = self.renderer.effects
+        self.queue_panel.refresh_all()
+        if self.input_image_path:
+            self.text_change_timer.start(150)
+    
+    def on_quality_changed(self):
+        """Keičia peržiūros kokybės režimą"""
+        self.apply_when_idle("quality", self.apply_quality)
+    
+    def apply_quality(self):
+        self.renderer.quality = PRESETS[self.quality_combo.currentData()]
+        if self.input_image_path:
+            self.mark_pending_change("quality")
+            self.text_change_timer.start(0)
+    
+    def on_backend_changed(self):
+        """Keičia peržiūros kadro piešimo būdą"""
+        self.apply_when_idle("backend", self.apply_backend)
+    
+    def apply_backend(self):
+        self.preview_backend = BACKENDS[self.backend_combo.currentData()](self.renderer)
+        if self.input_image_path:
+            self.mark_pending_change("backend")
+            self.text_change_timer.start(0)
+    
+    def select_lut(self):
+        """Pasirenka .cube spalvų korekcijos failą"""
+        file_path, _ = QFileDialog.getOpenFileName(self, "Pasirinkite LUT", "", "3D LUT (*.cube)")
+        if file_path:
+            try:
+                load_cube_lut(file_path)
+                lut_hash = file_content_hash(file_path)
+            except (OSError, ValueError) as e:
+                QMessageBox.warning(self, "Klaida", f"Nepavyko nuskaityti LUT: {e}")
+                return
+            self.lut_path = file_path
+            self.lut_hash = lut_hash
+            self.lut_btn.setText(os.path.basename(file_path))
+            self.on_effects_changed()
+    
+    def clear_lut(self):
+        self.lut_path = None
+        self.lut_hash = None
+        self.lut_btn.setText("Pasirinkti .cube")
+        self.on_effects_changed()
+    
     def on_blur_changed(self, value):
         """Atnaujina blur efektą ir peržiūrą"""
         self.blur_amount = value
         self.blur_value_label.setText(f"{value}%")
         if self.input_image_path:
+            self.mark_pending_change("blur")
+            if self.processing_thread and self.processing_thread.is_alive():
+                # Vaizdas dar įkeliamas - atnaujinti, kai baigsis
+                self.text_change_timer.start(100)
+                return
             self.process_image()
     
     def select_image(self):
@@ -649,350 +1028,287 @@ class ImageTemplateApp(QMainWindow):
         )
         
         if file_path:
-            # Išvalyti kešą, kai pasirenkamas naujas vaizdas
-            if file_path != self.input_image_path:
-                self.cached_background = None  # Išvalyti foninio vaizdo kešą
-                self.cached_image_path = None  # Išvalyti kelią
+            # Pavienis vaizdas - eilės elementas nebėra redaguojamas
+            self.queue_item = None
+            self.queue_panel.clear_selection()
+            
+            # Kešai tikrinami pagal turinio antspaudą, todėl jų valyti nereikia.
+            # Turinio maišą pradėti skaičiuoti fone iš karto.
+            self.fingerprinter.hash_async(file_path)
             
             self.input_image_path = file_path
-            self.process_image()
-            self.export_btn.setEnabled(True)
-            self.email_btn.setEnabled(True)  # Įjungti el. pašto mygtuką
+            self.load_image_async(file_path)
     
-    def process_image(self):
-        if not self.input_image_path:
+    def add_queue_images(self):
+        """Prideda kelis vaizdus į eilę (atlikėjas ir blur - dabartiniai)"""
+        downloads_dir = os.path.join(os.path.expanduser("~"), "Downloads")
+        if not os.path.exists(downloads_dir):
+            downloads_dir = ""
+        file_paths, _ = QFileDialog.getOpenFileNames(self, "Pridėti vaizdus į eilę", downloads_dir,
+                                                     "Vaizdų failai (*.png *.jpg *.jpeg)")
+        for file_path in file_paths:
+            self.fingerprinter.hash_async(file_path)
+        items = self.queue_panel.add_images(file_paths, self.artist_input.text(), self.blur_amount)
+        if items and self.input_image_path is None:
+            self.queue_panel.list.setCurrentRow(self.queue_panel.list.count() - len(items))
+    
+    def on_queue_item_selected(self, item):
+        """Įkelia eilės elementą į redagavimo laukus ir peržiūrą"""
+        # Kol laukai pildomi, pakeitimai neįrašomi į elementą
+        self.queue_item = None
+        for widget, value in ((self.title_input, item.title), (self.artist_input, item.artist)):
+            widget.blockSignals(True)
+            widget.setText(value)
+            widget.blockSignals(False)
+        self.blur_slider.blockSignals(True)
+        self.blur_slider.setValue(item.blur_amount)
+        self.blur_slider.blockSignals(False)
+        self.blur_amount = item.blur_amount
+        self.blur_value_label.setText(f"{item.blur_amount}%")
+        
+        self.queue_item = item
+        self.input_image_path = item.image_path
+        self.load_image_async(item.image_path)
+    
+    def export_all(self):
+        """Eksportuoja visą eilę geriausia kokybe į pasirinktą katalogą"""
+        items = self.queue_panel.items()
+        if not items or (self.batch_thread and self.batch_thread.is_alive()):
+            return
+        directory = QFileDialog.getExistingDirectory(self, "Eksportuoti eilę į katalogą")
+        if not directory:
             return
         
-        # Atnaujinti peržiūrą pagal įvesties laukus
-        title = self.title_input.text() or "TAU MICH AUF"
-        artist = self.artist_input.text() or "NIKLAS DEE"
+        jobs = []
+        for item in items:
+            title, artist, blur_amount = item.settings()
+            # Vienodiems failų vardams iš skirtingų katalogų konvejeris suteikia skirtingus
+            jobs.append(BatchJob(item.image_path, title, artist, blur_amount))
+        
+        pipeline = BatchPipeline(directory, disk_cache=self.disk_cache, effects=self.renderer.effects,
+                                 skip_existing=False)
+        self.batch_thread = BatchExportThread(pipeline, jobs)
+        self.batch_thread.signals.progress.connect(self.queue_panel.set_progress)
+        self.batch_thread.signals.finished.connect(self.on_batch_finished)
+        self.queue_panel.set_progress(0, len(jobs))
+        self.batch_thread.start()
+    
+    def on_batch_finished(self, result):
+        self.queue_panel.set_progress(0, 0)
+        if isinstance(result, Exception):
+            QMessageBox.critical(self, "Klaida", f"Eilės eksportas nepavyko: {result}")
+            return
+        failed = [job for job in result if job.error]
+        message = f"Eksportuota viršelių: {len(result) - len(failed)}"
+        if failed:
+            message += "\n\nNepavyko:\n" + "\n".join(f"{job.image_path}: {job.error}" for job in failed)
+        QMessageBox.information(self, "Eilė eksportuota", message)
+    
+    def load_image_async(self, image_path):
+        """Iš karto parodo laikiną peržiūrą, o pilną apdorojimą atlieka fone"""
+        # Atšaukti ankstesnį įkėlimą, jei jis dar vyksta
+        previous = self.processing_thread
+        if previous and previous.is_alive():
+            previous.cancel()
+        else:
+            previous = None
         
-        # Sukurti paprastą 9:16 versiją
-        self.simple_image = self.create_simple_9_16(self.input_image_path)
+        self.load_generation += 1
+        self.pending_change = ("load", time.perf_counter())
+        JOBS.inc(source="gui", event="queued")
+        self.export_btn.setEnabled(False)
+        self.email_btn.setEnabled(False)
+        self.animation_btn.setEnabled(False)
         
-        # Atnaujinti paprastos versijos peržiūrą
-        self.update_simple_preview()
+        # Laikina peržiūra iš EXIF miniatiūros arba sumažinto JPEG dekodavimo
+        try:
+            provisional = quick_preview(image_path)
+        except Exception:
+            provisional = None
+        if provisional is not None:
+            provisional = self.renderer.crop_9_16(provisional)
+            self.preview_label.setImage(provisional)
+            self.simple_preview.setImage(provisional)
+        else:
+            self.preview_label.showMessage("Įkeliama...")
+            self.simple_preview.showMessage("Įkeliama...")
         
-        # Apdoroti vaizdą
-        self.processed_image = self.create_template(self.input_image_path, title, artist)
+        title = self.title_input.text() or "TAU MICH AUF"
+        artist = self.artist_input.text() or "NIKLAS DEE"
+        self.processing_thread = ImageLoadingThread(self, self.load_generation, image_path, title, artist,
+                                                    self.blur_amount, previous)
+        self.processing_thread.signals.finished.connect(self.on_image_loaded)
+        self.processing_thread.start()
+    
+    def on_image_loaded(self, payload):
+        """Fono įkėlimas baigtas - pakeisti laikiną peržiūrą pilnu vaizdu"""
+        generation, result = payload
+        if generation != self.load_generation:
+            return  # Jau pasirinktas kitas vaizdas
+        
+        if isinstance(result, Exception):
+            self.preview_label.showMessage("Spustelėkite čia, kad pasirinktumėte vaizdą")
+            self.simple_preview.showMessage("Paprasta versija")
+            self.input_image_path = None
+            QMessageBox.critical(self, "Klaida", f"Nepavyko įkelti vaizdo: {result}")
+            return
         
-        # Konvertuoti PIL vaizdą į QPixmap
-        img_array = np.array(self.processed_image)
-        height, width, channels = img_array.shape
-        bytes_per_line = channels * width
-        q_img = QImage(img_array.data, width, height, bytes_per_line, QImage.Format_RGB888)
-        pixmap = QPixmap.fromImage(q_img)
+        self.apply_outputs(result)
+        self.export_btn.setEnabled(True)
+        self.email_btn.setEnabled(True)  # Įjungti el. pašto mygtuką
+        self.animation_btn.setEnabled(True)
         
-        # Pritaikyti peržiūros etiketei
-        scaled_pixmap = pixmap.scaled(self.preview_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        self.preview_label.setPixmap(scaled_pixmap)
+        # Jei įkeliant buvo pakeistas tekstas ar blur - atnaujinti (tik pasenę etapai)
+        self.process_image()
     
-    def update_simple_preview(self):
-        """Atnaujina paprastos 9:16 versijos peržiūrą"""
-        if self.simple_image:
-            # Konvertuoti PIL vaizdą į QPixmap
-            img_array = np.array(self.simple_image)
-            height, width, channels = img_array.shape
-            bytes_per_line = channels * width
-            q_img = QImage(img_array.data, width, height, bytes_per_line, QImage.Format_RGB888)
-            pixmap = QPixmap.fromImage(q_img)
-            
-            # Pritaikyti peržiūros etiketei
-            scaled_pixmap = pixmap.scaled(self.simple_preview.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            self.simple_preview.setPixmap(scaled_pixmap)
+    def render_outputs(self, image_path, title, artist, blur_amount, cancelled=None, wait_for_hash=False):
+        """Atnaujina grafo įvestis ir grąžina abu rezultatus (be Qt valdiklių, tinka fono gijai)
+
+        wait_for_hash=True (fono gija) - palaukti turinio maišo; GUI gijoje
+        naudojamas interactive_fingerprint(), kuris niekada neskaito failo.
+        """
+        if wait_for_hash:
+            fingerprint = self.fingerprinter.content(image_path)
+        else:
+            fingerprint = self.interactive_fingerprint(image_path)
+        if cancelled and cancelled():
+            return None
+        
+        graph = self.render_graph
+        graph.set_input('image_path', image_path)
+        graph.set_input('source_fingerprint', fingerprint)
+        graph.set_input('title', title)
+        graph.set_input('artist', artist)
+        graph.set_input('blur_amount', blur_amount)
+        graph.set_input('effects', self.renderer.effects)
+        graph.set_input('quality', self.renderer.quality)
+        
+        # Paprasta 9:16 versija priklauso tik nuo vaizdo - teksto keitimas jos neperskaičiuoja
+        simple_image = graph.get('simple_preview')
+        if cancelled and cancelled():
+            return None
+        
+        # Apdoroti vaizdą - perskaičiuojami tik pasenę etapai (QPainter PIL vaizdo nekuria)
+        processed_image, preview_frame = self.preview_backend.render_graph_frame(graph)
+        return {
+            'simple_image': simple_image,
+            'simple_key': self.renderer.simple_key(fingerprint),
+            'processed_image': processed_image,
+            'preview_frame': preview_frame,
+            'processed_key': self.renderer.render_key(fingerprint, title, artist, blur_amount)
+        }
     
-    def create_simple_9_16(self, image_path):
-        """Sukuria paprastą 9:16 vaizdo versiją be jokių papildomų efektų"""
-        # Atidaryti pradinį vaizdą
-        original = Image.open(image_path).convert("RGB")
-        
-        # Nustatyti 9:16 santykį
-        target_ratio = 9/16
-        width, height = original.size
-        
-        # Pakeisti dydį išlaikant santykį
-        if width / height > target_ratio:  # Per platus
-            new_width = int(height * target_ratio)
-            new_height = height
-            left = (width - new_width) // 2
-            right = left + new_width
-            cropped = original.crop((left, 0, right, height))
-        else:  # Per aukštas
-            new_width = width
-            new_height = int(width / target_ratio)
-            top = (height - new_height) // 2
-            bottom = top + new_height
-            cropped = original.crop((0, top, width, bottom))
-        
-        # Pakeisti dydį
-        target_width = 1080
-        target_height = 1920
-        resized = cropped.resize((target_width, target_height), Image.LANCZOS)
-        
-        return resized
+    def interactive_fingerprint(self, image_path):
+        """Antspaudas GUI gijai: turinio maišas, jei jau žinomas, kitaip stat antspaudas
+
+        Kol maišas skaičiuojamas fone, raktai remiasi stat antspaudu; kai
+        maišas paruoštas, peržiūra perpiešiama su turinio raktu.
+        """
+        fingerprint = self.fingerprinter.canonical(image_path, self.fingerprinter.quick(image_path))
+        if fingerprint.startswith("s:") and self.awaiting_hash != image_path:
+            self.awaiting_hash = image_path
+            self.fingerprinter.hash_async(image_path, lambda path, _: self.hash_signals.finished.emit(path))
+        return fingerprint
     
-    def create_template(self, image_path, title, artist, blur_amount=None):
-        # Naudoti blur_amount parametrą, jei jis perduotas
-        blur_amount = blur_amount if blur_amount is not None else self.blur_amount
-        
-        # Kešuoti fono vaizdą, TIK jei blur reikšmė ir vaizdo kelias nepasikeitė
-        if (self.cached_background is None or 
-            self.cached_blur_amount != blur_amount or 
-            self.cached_image_path != image_path):  # Patikrinti ar nepasikeitė vaizdas
-            
-            # Atidaryti pradinį vaizdą
-            original = Image.open(image_path).convert("RGB")
-            
-            # Pritaikyti vaizdą 9:16 santykiui
-            width, height = original.size
-            target_ratio = 9/16
-            target_width = 1080
-            target_height = 1920
-            
-            # Pjaustyti vaizdą pagal santykį
-            if width / height > target_ratio:
-                new_width = int(height * target_ratio)
-                new_height = height
-                original_resized = original.crop(((width - new_width) // 2, 0, (width + new_width) // 2, height))
-            else:
-                new_width = width
-                new_height = int(width / target_ratio)
-                original_resized = original.crop((0, (height - new_height) // 2, width, (height + new_height) // 2))
-            
-            # Pakeisti dydį
-            background = original_resized.resize((target_width, target_height), Image.LANCZOS)
-            
-            # Pritaikyti blur efektą - tai užima daug resursų, todėl kešuojama
-            if blur_amount > 0:
-                # Sumažinti dydį prieš blur (greitesnis apdorojimas)
-                blur_img = background.resize((target_width // 2, target_height // 2), Image.LANCZOS)
-                blur_radius = blur_amount / 10
-                blur_img = blur_img.filter(ImageFilter.GaussianBlur(radius=blur_radius))
-                # Grąžinti pradinį dydį
-                background = blur_img.resize((target_width, target_height), Image.LANCZOS)
-            
-            # Sukurti tamsinimo sluoksnį
-            overlay = Image.new("RGBA", (target_width, target_height), (0, 0, 0, 100))
-            
-            # Sukurti galutinį fono vaizdą
-            final_background = Image.new("RGB", (target_width, target_height))
-            final_background.paste(background, (0, 0))
+    def on_hash_ready(self, image_path):
+        """Turinio maišas apskaičiuotas - peržiūros raktai perskaičiuojami su juo"""
+        if self.awaiting_hash == image_path:
+            self.awaiting_hash = None
+        if image_path == self.input_image_path:
+            self.mark_pending_change("hash")
+            self.text_change_timer.start(0)
+    
+    def apply_outputs(self, outputs):
+        """Perduoda rezultatus peržiūros valdikliams"""
+        if outputs['simple_image'] is not self.simple_image:
+            self.simple_image = outputs['simple_image']
+            self.simple_key = outputs['simple_key']
             
-            # Pritaikyti tamsinimo sluoksnį
-            temp = Image.new("RGBA", (target_width, target_height))
-            temp.paste(final_background.convert("RGBA"), (0, 0))
-            final_background = Image.alpha_composite(temp, overlay).convert("RGB")
+            # Atnaujinti paprastos versijos peržiūrą
+            self.update_simple_preview()
+        
+        if outputs['preview_frame'] is not self.preview_frame:
+            self.processed_image = outputs['processed_image']
+            self.processed_key = outputs['processed_key']
+            self.preview_frame = outputs['preview_frame']
             
-            # Išsaugoti kešuotus objektus
-            self.cached_background = final_background.copy()
-            self.cached_blur_amount = blur_amount
-            self.cached_image_path = image_path  # Išsaugoti kelią iki vaizdo
-        else:
-            # Naudoti kešuotą foną
-            final_background = self.cached_background.copy()
-        
-        # Sukurti galutinį vaizdą
-        final_image = final_background.copy()
-        
-        # Apkarpyti originalią nuotrauką iki kvadrato (1:1 santykio)
-        original = Image.open(image_path).convert("RGB")
-        square_img = self.crop_to_square(original)
-        
-        # Nustatyti kvadrato dydį (~70% ekrano pločio)
-        target_width = 1080
-        target_height = 1920
-        square_size = int(target_width * 0.7)
-        padding = 10  # 10px padding aplink kvadratą
-        
-        # Pakeisti dydį
-        square_img = square_img.resize((square_size, square_size), Image.LANCZOS)
-        
-        # Sukurti apvalintų kampų kaukę
-        mask = Image.new('L', (square_size, square_size), 0)
-        draw_mask = ImageDraw.Draw(mask)
-        corner_radius = 40
-        draw_mask.rounded_rectangle([(0, 0), (square_size, square_size)], corner_radius, fill=255)
-        
-        # Centruoti poziciją - PAKELTI 200px į viršų
-        x_pos = (target_width - square_size) // 2
-        y_pos = int(target_height * 0.3) - 200  # Pakelti 200px į viršų
-        
-        # Sukurti patamsintą foną kvadratui (75% ryškumo)
-        dark_bg = Image.new('RGBA', (square_size + padding*2, square_size + padding*2), (0, 0, 0, 64))
-        dark_bg_mask = Image.new('L', (square_size + padding*2, square_size + padding*2), 0)
-        dark_bg_draw = ImageDraw.Draw(dark_bg_mask)
-        dark_bg_draw.rounded_rectangle([(0, 0), (square_size + padding*2, square_size + padding*2)], 
-                                      corner_radius + padding, fill=255)
-        dark_bg.putalpha(dark_bg_mask)
-        
-        # Įklijuoti patamsintą foną
-        x_bg = x_pos - padding
-        y_bg = y_pos - padding
-        final_image.paste(dark_bg.convert('RGB'), (x_bg, y_bg), dark_bg_mask)
-        
-        # Įklijuoti kvadratinį vaizdą su apvalintais kampais
-        final_image.paste(square_img, (x_pos, y_pos), mask)
-        
-        # Pridėti teksto elementus
-        draw = ImageDraw.Draw(final_image)
-        
-        # Nustatyti elementų pradžios poziciją - ties centrinės nuotraukos kairiuoju kraštu
-        elements_start_x = x_pos  # Kairysis nuotraukos kraštas
-        
-        # Atlikėjo vardas - PAKELTI 200px į viršų
-        artist_y = int(target_height * 0.75) - 200  # Pakelti 200px į viršų
-        self.draw_text_left_aligned(draw, artist.upper(), elements_start_x, artist_y, 60)
-        
-        # Dainos pavadinimas - po atlikėjo vardu
-        title_y = artist_y + 80
-        self.draw_text_left_aligned(draw, title, elements_start_x, title_y, 45)
-        
-        # Progreso juosta - balta linija su tašku
-        progress_y = title_y + 100
-        self.draw_progress_bar(draw, target_width, progress_y, elements_start_x, square_size)
-        
-        # Medijos valdikliai
-        controls_y = progress_y + 80
-        self.draw_media_controls(draw, target_width, controls_y)
-        
-        return final_image
+            # Perduoti kadrą peržiūros valdikliui (mastelis skaičiuojamas piešiant)
+            self.preview_label.setImage(self.preview_frame)
+        
+        # Laikas nuo pirmo neparodyto pakeitimo iki atnaujintos peržiūros
+        if self.pending_change is not None:
+            trigger, changed_at = self.pending_change
+            PREVIEW_LATENCY_SECONDS.observe(time.perf_counter() - changed_at, trigger=trigger)
+            self.pending_change = None
     
-    def crop_to_square(self, image):
-        """Apkarpo vaizdą iki kvadrato (1:1 santykio)"""
-        width, height = image.size
-        if width > height:
-            left = (width - height) // 2
-            right = left + height
-            top = 0
-            bottom = height
-        else:
-            top = (height - width) // 2
-            bottom = top + width
-            left = 0
-            right = width
-        
-        return image.crop((left, top, right, bottom))
+    def closeEvent(self, event):
+        # Nepradėtos miniatiūros atšaukiamos, kad uždarymas nelauktų
+        self.thumbnail_renderer.shutdown()
+        super().closeEvent(event)
     
-    def draw_text_left_aligned(self, draw, text, x, y, font_size, fill=(255, 255, 255)):
-        """Piešia tekstą, lygiuojant jį pagal kairę pusę"""
-        # Gauti šriftą
-        font = self.get_font(font_size)
-        
-        # Piešti tekstą (be centravimo)
-        draw.text((x, y), text, fill=fill, font=font)
+    def save_metrics(self):
+        """Išsaugo sesijos metrikas į failą"""
+        file_path, _ = QFileDialog.getSaveFileName(self, "Išsaugoti metrikas", "metrics.json",
+                                                   "JSON (*.json);;Prometheus (*.prom)")
+        if file_path:
+            try:
+                REGISTRY.write(file_path)
+            except OSError as e:
+                QMessageBox.warning(self, "Klaida", f"Nepavyko išsaugoti metrikų: {e}")
     
-    def get_font(self, size):
-        """Gauna šriftą"""
-        font_options = [
-            "GOTHICB.TTF", "GOTH.TTF", "arial.ttf", "arialbd.ttf", 
-            "GOTHIC.TTF", "impact.ttf", "IMPACT.TTF"
-        ]
-        
-        font_dirs = [
-            "",  # Dabartinis katalogas
-            "C:/Windows/Fonts/",  # Windows šriftai
-            "/usr/share/fonts/",  # Linux šriftai
-            "/System/Library/Fonts/"  # Mac šriftai
-        ]
-        
-        # Bandome rasti šriftą
-        for font_name in font_options:
-            for font_dir in font_dirs:
-                try:
-                    font_path = os.path.join(font_dir, font_name)
-                    return ImageFont.truetype(font_path, size)
-                except (IOError, OSError):
-                    continue
-        
-        return ImageFont.load_default()
+    def mark_pending_change(self, trigger):
+        if self.pending_change is None:
+            self.pending_change = (trigger, time.perf_counter())
     
-    def draw_progress_bar(self, draw, target_width, y_position, start_x=None, square_size=None):
-        """Piešia progreso juostą su nurodytu pradžios tašku"""
-        # Jei start_x nenurodyta, naudoti numatytąją reikšmę (80px nuo krašto)
-        if start_x is None:
-            start_x = 80
-        
-        # Jei square_size nenurodyta, apskaičiuojame numatytąją reikšmę
-        if square_size is None:
-            square_size = int(target_width * 0.7)  # Numatytoji reikšmė (~70% ekrano pločio)
-        
-        # Nustatyti progreso juostos parametrus
-        end_x = target_width - (target_width - square_size) // 2  # Ties dešiniuoju nuotraukos kraštu
-        progress_bar_length = end_x - start_x
-        progress_position = 0.3  # Progreso pozicija (30%)
-        
-        # Piešti baltą liniją
-        draw.line(
-            [(start_x, y_position), (end_x, y_position)],
-            fill=(255, 255, 255),
-            width=5
-        )
+    def profile_params(self):
+        """Piešimo parametrai ir vaizdų dydžiai lėto iškvietimo profiliui"""
+        effects = self.renderer.effects
+        return {
+            'image_path': self.input_image_path,
+            'title': self.title_input.text(),
+            'artist': self.artist_input.text(),
+            'blur_amount': self.blur_amount,
+            'quality': self.renderer.quality.name,
+            'preview_backend': self.preview_backend.name,
+            'effects': effects.params() if effects is not None else None,
+            'source_size': image_size(self.renderer.cached_source),
+            'processed_size': image_size(self.processed_image),
+            'preview_size': image_size(self.preview_frame),
+            'queue_length': len(self.queue_panel.items())
+        }
+    
+    @profiled("process_image", lambda app: app.profile_params())
+    def process_image(self):
+        if not self.input_image_path:
+            return
         
-        # Apskaičiuoti taško poziciją
-        dot_x = start_x + progress_bar_length * progress_position
+        # Atnaujinti peržiūrą pagal įvesties laukus
+        title = self.title_input.text() or "TAU MICH AUF"
+        artist = self.artist_input.text() or "NIKLAS DEE"
         
-        # Piešti tašką
-        dot_radius = 8
-        draw.ellipse(
-            [(dot_x - dot_radius, y_position - dot_radius),
-             (dot_x + dot_radius, y_position + dot_radius)],
-            fill=(255, 255, 255)
-        )
+        self.apply_outputs(self.render_outputs(self.input_image_path, title, artist, self.blur_amount))
+        
+        # Redaguojamo eilės elemento nustatymai ir miniatiūra
+        if self.queue_item is not None and self.queue_item.image_path == self.input_image_path:
+            self.queue_panel.update_item(self.queue_item, self.title_input.text(), self.artist_input.text(),
+                                         self.blur_amount)
+    
+    def update_simple_preview(self):
+        """Atnaujina paprastos 9:16 versijos peržiūrą"""
+        if self.simple_image:
+            self.simple_preview.setImage(self.simple_image)
+    
+    def create_simple_9_16(self, image_path):
+        """Sukuria paprastą 9:16 vaizdo versiją be jokių papildomų efektų"""
+        return self.renderer.create_simple_9_16(image_path)
     
-    def draw_media_controls(self, draw, width, y_pos):
-        # Medijos valdikliai - ankstesnis, atkurti/pristabdyti, kitas
-        center_x = width // 2
-        button_spacing = width // 6
-        
-        # Ankstesnis mygtukas (kairėje) - dvigubas trikampis
-        prev_x = center_x - button_spacing
-        prev_size = 25
-        
-        # Pirmas trikampis
-        draw.polygon([
-            (prev_x - prev_size//2, y_pos),
-            (prev_x + prev_size//2, y_pos - prev_size),
-            (prev_x + prev_size//2, y_pos + prev_size)
-        ], fill=(255, 255, 255))
-        
-        # Atkurti/Pristabdyti mygtukas (centre) - apskritimas su dviem linijomis
-        play_x = center_x
-        play_size = 40
-        
-        # Apskritimas
-        draw.ellipse([
-            (play_x - play_size, y_pos - play_size),
-            (play_x + play_size, y_pos + play_size)
-        ], outline=(255, 255, 255), width=3)
-        
-        # Dvi vertikalios linijos (pauzės simbolis)
-        line_width = 6
-        line_height = play_size
-        spacing = 8
-        
-        draw.rectangle([
-            (play_x - spacing - line_width//2, y_pos - line_height//2),
-            (play_x - spacing + line_width//2, y_pos + line_height//2)
-        ], fill=(255, 255, 255))
-        
-        draw.rectangle([
-            (play_x + spacing - line_width//2, y_pos - line_height//2),
-            (play_x + spacing + line_width//2, y_pos + line_height//2)
-        ], fill=(255, 255, 255))
-        
-        # Kitas mygtukas (dešinėje) - dvigubas trikampis
-        next_x = center_x + button_spacing
-        next_size = 25
-        
-        # Pirmas trikampis
-        draw.polygon([
-            (next_x + next_size//2, y_pos),
-            (next_x - next_size//2, y_pos - next_size),
-            (next_x - next_size//2, y_pos + next_size)
-        ], fill=(255, 255, 255))
+    def create_template(self, image_path, title, artist, blur_amount=None, progress_position=0.3):
+        # Naudoti blur_amount parametrą, jei jis perduotas
+        blur_amount = blur_amount if blur_amount is not None else self.blur_amount
+        return self.renderer.create_template(image_path, title, artist, blur_amount, progress_position)
     
     def export_image(self):
-        if not self.processed_image or not self.simple_image:
+        if self.processed_key is None or self.simple_image is None:
             return
         
         # Nustatyti Downloads katalogo kelią
@@ -1017,14 +1333,7 @@ class ImageTemplateApp(QMainWindow):
         )
         
         if file_path:
-            # Išsaugoti pagrindinį vaizdą
-            self.processed_image.save(file_path)
-            
-            # Išsaugoti paprastą versiją
-            # Gauti failo tipą iš pasirinkto kelio
-            file_name, file_ext = os.path.splitext(file_path)
-            simple_file_path = f"{file_name}_paprasta{file_ext}"
-            self.simple_image.save(simple_file_path)
+            simple_file_path = self.save_exports(file_path)
             
             # Pranešti vartotojui apie sėkmingą išsaugojimą
             message_box = QMessageBox()
@@ -1033,8 +1342,88 @@ class ImageTemplateApp(QMainWindow):
             message_box.setText(f"Abu vaizdai išsaugoti:\n\n1. {file_path}\n2. {simple_file_path}")
             message_box.exec_()
 
-    def get_image_bytes(self, image):
-        """Konvertuoti PIL Image į baitų eilutę"""
+    @profiled("export_image",
+              lambda app, file_path: dict(app.profile_params(), format=os.path.splitext(file_path)[1]))
+    def save_exports(self, file_path):
+        """Piešia ir išsaugo abu vaizdus; grąžina paprastos versijos kelią
+
+        Profiliuojama tik ši dalis - laikas dialoguose į profilį nepatenka.
+        """
+        processed_image, _, simple_image, _ = self.export_outputs()
+        
+        # Išsaugoti pagrindinį vaizdą
+        processed_image.save(file_path)
+        
+        # Išsaugoti paprastą versiją
+        # Gauti failo tipą iš pasirinkto kelio
+        file_name, file_ext = os.path.splitext(file_path)
+        simple_file_path = f"{file_name}_paprasta{file_ext}"
+        simple_image.save(simple_file_path)
+        return simple_file_path
+    
+    def export_animation(self):
+        """Eksportuoja animuotą istoriją su judančiu progreso juostos tašku"""
+        if not self.input_image_path:
+            return
+        
+        downloads_dir = os.path.join(os.path.expanduser("~"), "Downloads")
+        if not os.path.exists(downloads_dir):
+            downloads_dir = os.path.join(os.path.expanduser("~"), "Atsisiuntimai")
+            if not os.path.exists(downloads_dir):
+                downloads_dir = ""
+        
+        default_path = os.path.join(downloads_dir, "Muzikos_Virselis_animacija.png")
+        file_path, _ = QFileDialog().getSaveFileName(
+            self,
+            "Išsaugoti animaciją",
+            default_path,
+            "APNG failai (*.png);;WebP failai (*.webp);;GIF failai (*.gif)"
+        )
+        if not file_path:
+            return
+        
+        title = self.title_input.text() or "TAU MICH AUF"
+        artist = self.artist_input.text() or "NIKLAS DEE"
+        
+        try:
+            QApplication.setOverrideCursor(Qt.WaitCursor)
+            self.export_renderer.effects = self.renderer.effects
+            animator = StoryAnimator(self.export_renderer, self.animation_settings)
+            base_image = animator.render_base(self.input_image_path, title, artist, self.blur_amount)
+            animator.export(file_path, base_image)
+        except (OSError, ValueError, MemoryError) as e:
+            QApplication.restoreOverrideCursor()
+            QMessageBox.critical(self, "Klaida", f"Nepavyko eksportuoti animacijos: {e}")
+            return
+        QApplication.restoreOverrideCursor()
+        
+        QMessageBox.information(self, "Išsaugota", f"Animacija išsaugota:\n\n{file_path}")
+    
+    def export_outputs(self):
+        """Galutiniai vaizdai eksportui - visada "best" kokybe ir Pillow (grąžina vaizdus ir raktus)"""
+        if self.renderer.quality == BEST and self.processed_image is not None:
+            return self.processed_image, self.processed_key, self.simple_image, self.simple_key
+        
+        title = self.title_input.text() or "TAU MICH AUF"
+        artist = self.artist_input.text() or "NIKLAS DEE"
+        renderer = self.export_renderer
+        renderer.effects = self.renderer.effects
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            processed_image, processed_key = renderer.render_template(self.input_image_path, title, artist,
+                                                                      self.blur_amount)
+            simple_image, simple_key = renderer.render_simple(self.input_image_path)
+        finally:
+            QApplication.restoreOverrideCursor()
+        return processed_image, processed_key, simple_image, simple_key
+    
+    def get_image_bytes(self, image, cache_key=None):
+        """Konvertuoti PIL Image į baitų eilutę (jei nurodytas raktas - kešuojama)"""
+        if cache_key is not None:
+            cache_result("encoded", cache_key in self.encoded_cache)
+            if cache_key in self.encoded_cache:
+                return self.encoded_cache[cache_key]
+        
         with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as temp:
             temp_name = temp.name
         
@@ -1047,11 +1436,18 @@ class ImageTemplateApp(QMainWindow):
         except:
             pass
         
+        ENCODED_BYTES.observe(len(img_data), format="png")
+        if cache_key is not None:
+            # Laikyti tik paskutinius užkoduotus rezultatus
+            if len(self.encoded_cache) >= 4:
+                self.encoded_cache.pop(next(iter(self.encoded_cache)))
+            self.encoded_cache[cache_key] = img_data
+        
         return img_data
 
     def send_email(self):
         """Siųsti abi nuotraukas el. paštu"""
-        if not self.processed_image or not self.simple_image:
+        if self.processed_key is None or self.simple_image is None:
             QMessageBox.warning(self, "Klaida", "Pirmiausia pasirinkite nuotrauką!")
             return
         
@@ -1083,6 +1479,8 @@ class ImageTemplateApp(QMainWindow):
             progress_dialog.setValue(0)
             progress_dialog.show()
             
+            processed_image, processed_key, simple_image, simple_key = self.export_outputs()
+            
             # Sukurti ir paleisti darbinę giją
             self.email_worker = EmailWorker(
                 self,
@@ -1093,8 +1491,10 @@ class ImageTemplateApp(QMainWindow):
                 "",  # Tuščias tekstas
                 self.fixed_smtp,
                 self.fixed_smtp_port,
-                self.processed_image,
-                self.simple_image
+                processed_image,
+                simple_image,
+                processed_key,
+                simple_key
             )
             
             # Prijungti signalus
@@ -1158,6 +1558,13 @@ class ImageTemplateApp(QMainWindow):
         return text
 
 if __name__ == "__main__":
+    # --profile[=ms] arba IMAGE_TEMPLATE_PROFILE=ms - išsaugoti lėtų iškvietimų profilius
+    sys.argv = configure_from_environment(sys.argv)
+    if len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        # Be lango: JSON eilučių piešimo darbininkas (žr. render_worker.py)
+        from render_worker import main as worker_main
+        sys.exit(worker_main(sys.argv[2:]))
+    
     app = QApplication(sys.argv)
     window = ImageTemplateApp()
     window.show()
@@ -0,0 +1,123 @@
+import sys
+import time
+import threading
+from collections import OrderedDict
+from PIL import Image, ImageDraw, ImageFilter, ImageChops
+
+# Kaukės piešiamos tiek kartų didesnės ir sumažinamos (kraštų glodinimas)
+SUPERSAMPLE = 4
+
+
+class MaskLibrary:
+    """Iš anksto paruoštų kaukių kešas: apvalinti stačiakampiai, rėmeliai ir šešėliai
+
+    Kaukės piešiamos SUPERSAMPLE kartų didesnės ir sumažinamos reduce()
+    (ploto vidurkis), todėl kraštai glotnūs. Kiekviena kaukė sukuriama vieną
+    kartą kiekvienam (dydis, spindulys, ...) deriniui - bet kokiai išvesties
+    raiškai. Grąžinamų kaukių keisti negalima (jos bendros).
+    """
+    def __init__(self, max_entries=32, supersample=SUPERSAMPLE):
+        self.max_entries = max_entries
+        self.supersample = supersample
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def cached(self, key, build):
+        with self.lock:
+            mask = self.entries.get(key)
+            if mask is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return mask
+            self.misses += 1
+        # Kuriama be užrakto - lygiagrečiai kuriant tą pačią kaukę rezultatas vienodas
+        mask = build()
+        with self.lock:
+            self.entries[key] = mask
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return mask
+
+    def rounded_rect(self, size, radius):
+        """Glotni apvalintų kampų stačiakampio kaukė (L)"""
+        width, height = size
+
+        def build():
+            scale = self.supersample
+            large = Image.new('L', (width * scale, height * scale), 0)
+            ImageDraw.Draw(large).rounded_rectangle([(0, 0), (width * scale - 1, height * scale - 1)],
+                                                    radius * scale, fill=255)
+            return large.reduce(scale)
+        return self.cached(('rounded_rect', width, height, radius), build)
+
+    def frame(self, size, radius, padding):
+        """Rėmelio kaukė: apvalintas stačiakampis, didesnis per padding iš kiekvienos pusės"""
+        width, height = size
+        return self.rounded_rect((width + padding * 2, height + padding * 2), radius + padding)
+
+    def shadow(self, size, radius, blur, opacity=0.5):
+        """Švelnaus šešėlio kaukė (apvalintas stačiakampis su blur kraštine iš visų pusių)"""
+        width, height = size
+
+        def build():
+            canvas = Image.new('L', (width + blur * 4, height + blur * 4), 0)
+            canvas.paste(int(255 * opacity), (blur * 2, blur * 2), self.rounded_rect(size, radius))
+            return canvas.filter(ImageFilter.GaussianBlur(blur))
+        return self.cached(('shadow', width, height, radius, blur, opacity), build)
+
+    def framed_tile(self, size, radius, padding, shadow_blur=0, shadow_opacity=0.5):
+        """Rėmelio ir (nebūtino) šešėlio bendra kaukė ir jos poslinkis nuo nuotraukos kampo
+
+        Grąžina (kaukė, poslinkis): kaukė apima rėmelį su šešėliu, todėl
+        įrėmintą nuotrauką galima įklijuoti vienu paste().
+        """
+        width, height = size
+
+        def build():
+            frame = self.frame(size, radius, padding)
+            if not shadow_blur:
+                return frame, padding
+            shadow = self.shadow(frame.size, radius + padding, shadow_blur, shadow_opacity)
+            margin = shadow_blur * 2
+            tile = Image.new('L', shadow.size, 0)
+            tile.paste(frame, (margin, margin))
+            return ImageChops.lighter(tile, shadow), padding + margin
+        return self.cached(('framed_tile', width, height, radius, padding, shadow_blur, shadow_opacity), build)
+
+
+# Proceso kaukių biblioteka (bendra visiems piešėjams)
+MASKS = MaskLibrary()
+
+
+def benchmark(square_size=880, radius=40, padding=10, repeats=20):
+    """Kaukių piešimas kiekvieną kartą prieš kešuotas glotnias kaukes"""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        mask = Image.new('L', (square_size, square_size), 0)
+        ImageDraw.Draw(mask).rounded_rectangle([(0, 0), (square_size, square_size)], radius, fill=255)
+        frame = Image.new('L', (square_size + padding * 2, square_size + padding * 2), 0)
+        ImageDraw.Draw(frame).rounded_rectangle([(0, 0), (square_size + padding * 2, square_size + padding * 2)],
+                                                radius + padding, fill=255)
+    drawn = (time.perf_counter() - start) / repeats
+
+    library = MaskLibrary()
+    start = time.perf_counter()
+    library.rounded_rect((square_size, square_size), radius)
+    library.framed_tile((square_size, square_size), radius, padding)
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(repeats):
+        library.rounded_rect((square_size, square_size), radius)
+        library.framed_tile((square_size, square_size), radius, padding)
+    cached = (time.perf_counter() - start) / repeats
+
+    print(f"Piešiama kiekvieną kartą: {drawn * 1000:8.3f} ms")
+    print(f"Biblioteka (pirmas kartas): {first * 1000:8.3f} ms")
+    print(f"Biblioteka (kešuota):      {cached * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    benchmark(*(int(value) for value in sys.argv[1:2]))
@@ -0,0 +1,280 @@
+import json
+import time
+import bisect
+import threading
+
+# Numatytosios trukmės histogramų ribos (sekundėmis)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Numatytosios dydžio histogramų ribos (baitais)
+SIZE_BUCKETS = (16 * 1024, 64 * 1024, 256 * 1024, 1024 * 1024, 2 * 1024 * 1024, 4 * 1024 * 1024,
+                8 * 1024 * 1024, 16 * 1024 * 1024)
+
+
+def _label_key(label_names, labels):
+    if set(labels) != set(label_names):
+        raise ValueError(f"Reikalingos žymos: {', '.join(label_names) or '-'}")
+    return tuple(str(labels[name]) for name in label_names)
+
+
+def _format_labels(label_names, key, extra=None):
+    pairs = list(zip(label_names, key)) + list(extra or [])
+    if not pairs:
+        return ""
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_number(value):
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Metrikos bazė: reikšmės laikomos pagal žymų rinkinį"""
+    kind = None
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def snapshot(self):
+        with self.lock:
+            return [
+                {'labels': dict(zip(self.label_names, key)), 'value': self.export_value(value)}
+                for key, value in sorted(self.values.items())
+            ]
+
+    def export_value(self, value):
+        return value
+
+    @property
+    def exposition_name(self):
+        return self.name
+
+
+class Counter(Metric):
+    """Tik didėjantis skaitiklis"""
+    kind = "counter"
+
+    @property
+    def exposition_name(self):
+        return f"{self.name}_total"
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.label_names, labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self.lock:
+            return self.values.get(_label_key(self.label_names, labels), 0)
+
+    def prometheus_lines(self):
+        with self.lock:
+            items = sorted(self.values.items())
+        return [f"{self.exposition_name}{_format_labels(self.label_names, key)} {_format_number(value)}"
+                for key, value in items]
+
+
+class Gauge(Metric):
+    """Reikšmė, kuri gali didėti ir mažėti (pvz., eilės ilgis)"""
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = _label_key(self.label_names, labels)
+        with self.lock:
+            self.values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.label_names, labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels):
+        with self.lock:
+            return self.values.get(_label_key(self.label_names, labels), 0)
+
+    def prometheus_lines(self):
+        with self.lock:
+            items = sorted(self.values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_number(value)}"
+                for key, value in items]
+
+
+class HistogramData:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self, bucket_count):
+        self.counts = [0] * (bucket_count + 1)  # Paskutinis - virš didžiausios ribos
+        self.total = 0.0
+        self.count = 0
+
+
+class Histogram(Metric):
+    """Pasiskirstymo histograma su fiksuotomis ribomis"""
+    kind = "histogram"
+
+    def __init__(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = _label_key(self.label_names, labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            data = self.values.get(key)
+            if data is None:
+                data = self.values[key] = HistogramData(len(self.buckets))
+            data.counts[index] += 1
+            data.total += value
+            data.count += 1
+
+    def time(self, **labels):
+        """Konteksto valdytojas, matuojantis bloko trukmę"""
+        return _Timer(self, labels)
+
+    def quantile(self, data, q):
+        """Kvantilio įvertis pagal histogramą (tiesinė interpoliacija intervale)"""
+        if data.count == 0:
+            return None
+        rank = q * data.count
+        cumulative = 0
+        for index, count in enumerate(data.counts):
+            if cumulative + count >= rank and count:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                if index == len(self.buckets):
+                    return lower
+                return lower + (self.buckets[index] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+    def export_value(self, data):
+        return {
+            'count': data.count,
+            'sum': data.total,
+            'mean': data.total / data.count if data.count else None,
+            'p50': self.quantile(data, 0.5),
+            'p90': self.quantile(data, 0.9),
+            'p99': self.quantile(data, 0.99)
+        }
+
+    def prometheus_lines(self):
+        with self.lock:
+            items = [(key, list(data.counts), data.total, data.count) for key, data in sorted(self.values.items())]
+        lines = []
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.label_names, key, [('le', _format_number(float(bound)))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_number(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+        self.histogram.observe(self.elapsed, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """Metrikų registras; eksportuojamas Prometheus tekstu arba JSON"""
+    def __init__(self, prefix="image_template"):
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self.started = time.time()
+
+    def register(self, cls, name, help_text, labels=(), **options):
+        """Grąžina esamą metriką tuo pačiu vardu arba sukuria naują"""
+        full_name = f"{self.prefix}_{name}" if self.prefix else name
+        with self.lock:
+            metric = self.metrics.get(full_name)
+            if metric is None:
+                metric = self.metrics[full_name] = cls(full_name, help_text, labels, **options)
+            elif not isinstance(metric, cls) or metric.label_names != tuple(labels):
+                raise ValueError(f"Metrika {full_name} jau registruota kitu tipu ar žymomis")
+            return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self.register(Counter, name, help_text, labels)
+
+    def gauge(self, name, help_text, labels=()):
+        return self.register(Gauge, name, help_text, labels)
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram, name, help_text, labels, buckets=buckets)
+
+    def snapshot(self):
+        """Visos metrikos kaip JSON tinkamas žodynas"""
+        with self.lock:
+            metrics = list(self.metrics.values())
+        return {
+            'uptime_seconds': round(time.time() - self.started, 3),
+            'metrics': {
+                metric.name: {'type': metric.kind, 'help': metric.help_text, 'values': metric.snapshot()}
+                for metric in metrics
+            }
+        }
+
+    def to_json(self, indent=2):
+        return json.dumps(self.snapshot(), indent=indent, ensure_ascii=False)
+
+    def prometheus_text(self):
+        """Prometheus teksto formatas (version 0.0.4)"""
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.exposition_name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.exposition_name} {metric.kind}")
+            lines.extend(metric.prometheus_lines())
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Įrašo metrikas į failą; .prom/.txt - Prometheus tekstas, kitaip JSON"""
+        if path.endswith(('.prom', '.txt')):
+            content = self.prometheus_text()
+        else:
+            content = self.to_json()
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+
+# Proceso registras, naudojamas GUI sesijoje ir fono režimuose
+REGISTRY = MetricsRegistry()
+
+RENDERS = REGISTRY.counter("renders", "Nupiešti vaizdai", ("kind",))
+RENDER_SECONDS = REGISTRY.histogram("render_seconds", "Piešimo etapų trukmė", ("stage",))
+CACHE_REQUESTS = REGISTRY.counter("cache_requests", "Kešų užklausos", ("cache", "result"))
+JOBS = REGISTRY.counter("jobs", "Užduočių įvykiai (queued, rejected, coalesced, cancelled, failed)", ("source", "event"))
+QUEUE_DEPTH = REGISTRY.gauge("queue_depth", "Laukiančių užduočių skaičius", ("source",))
+ENCODED_BYTES = REGISTRY.histogram("encoded_bytes", "Užkoduotų vaizdų dydis", ("format",), buckets=SIZE_BUCKETS)
+SMTP_SEND_SECONDS = REGISTRY.histogram("smtp_send_seconds", "El. laiško siuntimo trukmė", ("result",))
+PREVIEW_LATENCY_SECONDS = REGISTRY.histogram("preview_latency_seconds",
+                                             "Laikas nuo įvesties pakeitimo iki atnaujintos peržiūros", ("trigger",))
+SLOW_CALLS = REGISTRY.counter("slow_calls", "Iškvietimai, viršiję profiliavimo ribą", ("name",))
+
+
+def cache_result(cache, hit):
+    """Užregistruoja kešo pataikymą arba nepataikymą"""
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
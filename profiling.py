@@ -0,0 +1,252 @@
+import os
+import sys
+import json
+import time
+import pstats
+import cProfile
+import argparse
+import threading
+import functools
+from collections import Counter
+from metrics import SLOW_CALLS
+
+# Aplinkos kintamasis profiliavimui įjungti: riba milisekundėmis (pvz., IMAGE_TEMPLATE_PROFILE=500)
+PROFILE_ENV = "IMAGE_TEMPLATE_PROFILE"
+DEFAULT_THRESHOLD_MS = 500
+# Ėmimo intervalas (sekundėmis) ir išsaugomų profilių skaičius
+SAMPLE_INTERVAL = 0.005
+MAX_PROFILES = 50
+
+
+def default_profile_dir():
+    """Numatytasis profilių katalogas (šalia disko kešo)"""
+    base_dir = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base_dir, "image_template", "profiles")
+
+
+class StackSampler:
+    """Periodiškai fiksuoja vienos gijos steką (mažos sąnaudos, veikia bet kurioje gijoje)
+
+    Rezultatas - sutraukti stekai ("failas:funkcija:eilutė;..." -> kiekis),
+    tinkami flamegraph įrankiams. Kol gija vykdo C kodą nepaleidusi GIL,
+    ėmimas atidedamas.
+    """
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+        return self.samples
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+
+class SlowCallProfiler:
+    """Įjungiamas lėtų iškvietimų profiliavimas
+
+    Kiekvienas stebimas iškvietimas profiliuojamas (stekų ėmimu arba
+    cProfile), bet profilis išsaugomas tik jei trukmė viršija ribą - kartu
+    su piešimo parametrais ir vaizdų dydžiais. Kataloge laikomi tik
+    naujausi max_files profiliai.
+    """
+    def __init__(self, directory=None, threshold_ms=DEFAULT_THRESHOLD_MS, mode='sample', max_files=MAX_PROFILES,
+                 enabled=False):
+        if mode not in ('sample', 'cprofile'):
+            raise ValueError(f"Nežinomas profiliavimo režimas: {mode}")
+        self.directory = directory or default_profile_dir()
+        self.threshold_ms = threshold_ms
+        self.mode = mode
+        self.max_files = max_files
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        # cProfile vienu metu gali veikti tik vienas
+        self.cprofile_active = False
+
+    def configure(self, threshold_ms=None, mode=None, directory=None, enabled=True):
+        if threshold_ms is not None:
+            self.threshold_ms = threshold_ms
+        if mode is not None:
+            self.mode = mode
+        if directory is not None:
+            self.directory = directory
+        self.enabled = enabled
+
+    def call(self, name, func, args, kwargs, describe=None):
+        """Vykdo func; jei iškvietimas lėtas - išsaugo profilį"""
+        if not self.enabled:
+            return func(*args, **kwargs)
+
+        profile = None
+        sampler = None
+        if self.mode == 'cprofile':
+            with self.lock:
+                use_cprofile = not self.cprofile_active
+                self.cprofile_active = self.cprofile_active or use_cprofile
+            if use_cprofile:
+                profile = cProfile.Profile()
+        if profile is None:
+            sampler = StackSampler(threading.get_ident()).start()
+
+        start = time.perf_counter()
+        error = None
+        try:
+            if profile is not None:
+                return profile.runcall(func, *args, **kwargs)
+            return func(*args, **kwargs)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            samples = sampler.stop() if sampler is not None else None
+            if profile is not None:
+                with self.lock:
+                    self.cprofile_active = False
+            if elapsed_ms >= self.threshold_ms:
+                SLOW_CALLS.inc(name=name)
+                try:
+                    self.save(name, elapsed_ms, describe(*args) if describe else {}, samples, profile, error)
+                except Exception as e:
+                    # Profiliavimas niekada neturi sugadinti paties veiksmo
+                    print(f"Klaida išsaugant profilį: {e}", file=sys.stderr)
+
+    def save(self, name, elapsed_ms, params, samples, profile, error):
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S") + f"-{int(time.time() * 1000) % 1000:03d}"
+        base = os.path.join(self.directory, f"{stamp}_{name}_{int(elapsed_ms)}ms")
+        record = {
+            'name': name,
+            'elapsed_ms': round(elapsed_ms, 1),
+            'threshold_ms': self.threshold_ms,
+            'thread': threading.current_thread().name,
+            'time': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'params': params,
+            'error': str(error) if error else None,
+            'mode': 'cprofile' if profile is not None else 'sample'
+        }
+        if samples is not None:
+            record['sample_interval_ms'] = SAMPLE_INTERVAL * 1000
+            record['samples'] = dict(samples.most_common())
+        if profile is not None:
+            profile.dump_stats(base + ".prof")
+            record['profile'] = os.path.basename(base + ".prof")
+        with open(base + ".json", 'w', encoding='utf-8') as f:
+            json.dump(record, f, indent=2, ensure_ascii=False)
+        self.rotate()
+
+    def rotate(self):
+        """Palieka tik naujausius max_files profilius"""
+        records = sorted(name for name in os.listdir(self.directory) if name.endswith(".json"))
+        for name in records[:max(0, len(records) - self.max_files)]:
+            for path in (name, name[:-5] + ".prof"):
+                try:
+                    os.unlink(os.path.join(self.directory, path))
+                except OSError:
+                    pass
+
+
+# Proceso profiliuotojas (išjungtas, kol neįjungiamas --profile arba aplinkos kintamuoju)
+PROFILER = SlowCallProfiler()
+
+
+def profiled(name, describe=None):
+    """Dekoratorius: iškvietimas stebimas PROFILER; describe(*args) - parametrai profiliui"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return PROFILER.call(name, func, args, kwargs, describe)
+        return wrapper
+    return decorator
+
+
+def configure_from_environment(argv=None):
+    """Įjungia profiliavimą pagal --profile[=ms] argumentą arba aplinkos kintamąjį; grąžina likusius argumentus"""
+    argv = list(sys.argv if argv is None else argv)
+    threshold = os.environ.get(PROFILE_ENV)
+    remaining = []
+    for arg in argv:
+        if arg == "--profile":
+            threshold = threshold or DEFAULT_THRESHOLD_MS
+        elif arg.startswith("--profile="):
+            threshold = arg.split("=", 1)[1]
+        else:
+            remaining.append(arg)
+    if threshold:
+        PROFILER.configure(threshold_ms=float(threshold), mode=os.environ.get(PROFILE_ENV + "_MODE", "sample"))
+    return remaining
+
+
+def image_size(image):
+    """Vaizdo dydis profiliui (PIL vaizdas, QImage arba None)"""
+    if image is None:
+        return None
+    if hasattr(image, 'width') and callable(image.width):
+        return [image.width(), image.height()]
+    return list(image.size)
+
+
+def summarize(path, top=15):
+    """Išsaugoto profilio santrauka: parametrai ir daugiausiai laiko užėmusios funkcijos"""
+    with open(path, encoding='utf-8') as f:
+        record = json.load(f)
+    print(f"{record['name']}: {record['elapsed_ms']} ms (riba {record['threshold_ms']} ms), {record['time']}")
+    for key, value in record['params'].items():
+        print(f"  {key}: {value}")
+
+    if record.get('samples'):
+        # Funkcijos, kurios buvo steke (bendras laikas) ir steko viršūnėje (savas laikas)
+        total = sum(record['samples'].values())
+        inclusive = Counter()
+        own = Counter()
+        for stack, count in record['samples'].items():
+            frames = [frame.rsplit(":", 1)[0] for frame in stack.split(";")]
+            own[frames[-1]] += count
+            for frame in set(frames):
+                inclusive[frame] += count
+        print(f"Ėmiai: {total}")
+        print(f"  {'savas':>6} {'bendras':>7}  funkcija")
+        for frame, count in own.most_common(top):
+            print(f"  {count / total:6.1%} {inclusive[frame] / total:7.1%}  {frame}")
+    elif record.get('profile'):
+        stats = pstats.Stats(os.path.join(os.path.dirname(path), record['profile']))
+        stats.sort_stats('cumulative').print_stats(top)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Išsaugotų lėtų iškvietimų profiliai")
+    parser.add_argument("profile", nargs='?', help="Profilio .json failas (be jo - sąrašas)")
+    parser.add_argument("--dir", default=default_profile_dir())
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        summarize(args.profile, args.top)
+        return 0
+    if not os.path.isdir(args.dir):
+        print("Profilių nėra")
+        return 0
+    for name in sorted(name for name in os.listdir(args.dir) if name.endswith(".json")):
+        print(os.path.join(args.dir, name))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
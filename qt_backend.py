@@ -0,0 +1,278 @@
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+from PIL import Image
+from PyQt5.QtGui import QImage, QPainter, QColor, QFont, QFontDatabase, QFontMetricsF, QPen, QPolygonF
+from PyQt5.QtCore import Qt, QRectF, QPointF
+
+
+def pil_to_qimage(image):
+    """Konvertuoja PIL RGB vaizdą į QImage (duomenų buferis pririšamas prie QImage)"""
+    img_array = np.ascontiguousarray(np.asarray(image.convert("RGB")))
+    height, width, channels = img_array.shape
+    bytes_per_line = channels * width
+    q_img = QImage(img_array.data, width, height, bytes_per_line, QImage.Format_RGB888)
+    # Išlaikyti masyvą gyvą, kol gyvas QImage
+    q_img.buffer_owner = img_array
+    return q_img
+
+
+def qimage_to_pil(q_img):
+    """Konvertuoja QImage į PIL RGB vaizdą (kopijuojama)"""
+    q_img = q_img.convertToFormat(QImage.Format_RGB888)
+    width, height = q_img.width(), q_img.height()
+    data = q_img.constBits().asstring(q_img.bytesPerLine() * height)
+    array = np.frombuffer(data, dtype=np.uint8).reshape(height, q_img.bytesPerLine())[:, :width * 3]
+    return Image.fromarray(array.reshape(height, width, 3).copy(), "RGB")
+
+
+class PillowBackend:
+    """Šablonas piešiamas Pillow (ImageDraw); peržiūrai konvertuojamas į QImage"""
+    name = 'pillow'
+
+    def __init__(self, renderer):
+        self.renderer = renderer
+
+    def render_graph_frame(self, graph):
+        """Grąžina (PIL vaizdas, peržiūros kadras) iš grafo"""
+        image = graph.get('final')
+        return image, image
+
+
+class QPainterBackend:
+    """Šablonas piešiamas tiesiai į QImage su QPainter
+
+    Fonas ir įrėminta nuotrauka imami iš tų pačių piešėjo etapų (ir
+    kešų), o tekstas, progreso juosta ir valdikliai piešiami QPainter.
+    Figūros piešiamos be glodinimo, kaip ir Pillow ImageDraw, todėl
+    rezultatas sutampa su Pillow, išskyrus pavienius figūrų kraštų
+    pikselius ir teksto glodinimą.
+    """
+    name = 'qpainter'
+
+    def __init__(self, renderer):
+        self.renderer = renderer
+        self.fonts = {}
+        # Paskutiniai konvertuoti sluoksniai (grafas grąžina tuos pačius objektus, kol jie nepasikeitė)
+        self.cached_background = (None, None)
+        self.cached_tile = (None, None)
+        self.last_frame = (None, None)
+
+    def render_graph_frame(self, graph):
+        """Grąžina (None, QImage) - PIL vaizdas nekuriamas"""
+        background, framed = graph.get('background'), graph.get('framed_artwork')
+        texts = (graph.value('title'), graph.value('artist'), self.renderer.quality.text_antialias)
+        layers, image = self.last_frame
+        if layers is None or layers[0] is not background or layers[1] is not framed or layers[2] != texts:
+            # Nepasikeitus įvestims grąžinamas tas pats kadras (peržiūra jo nepiešia iš naujo)
+            image = self.compose(background, framed, texts[0], texts[1])
+            self.last_frame = ((background, framed, texts), image)
+        return None, image
+
+    def layer(self, attribute, image):
+        source, converted = getattr(self, attribute)
+        if source is not image:
+            # RGB32 - greičiausias formatas QPainter piešimui
+            converted = pil_to_qimage(image).convertToFormat(QImage.Format_RGB32)
+            setattr(self, attribute, (image, converted))
+        return converted
+
+    def tile_layer(self, framed):
+        """Įrėmintos nuotraukos sluoksnis su alfa kanalu iš bendros kaukės"""
+        source, converted = self.cached_tile
+        if source is not framed:
+            tile = framed['tile'].copy()
+            tile.putalpha(framed['tile_mask'])
+            array = np.ascontiguousarray(np.asarray(tile))
+            height, width, _ = array.shape
+            converted = QImage(array.data, width, height, width * 4, QImage.Format_RGBA8888)
+            converted = converted.convertToFormat(QImage.Format_ARGB32_Premultiplied)
+            self.cached_tile = (framed, converted)
+        return converted
+
+    def qfont(self, size):
+        """QFont, atitinkantis piešėjo Pillow šriftą (tas pats failas ir dydis)"""
+        cached = self.fonts.get(size)
+        if cached is None:
+            font_path, pil_font = self.renderer.find_font(size)
+            font = QFont()
+            if font_path:
+                font_id = QFontDatabase.addApplicationFont(font_path)
+                families = QFontDatabase.applicationFontFamilies(font_id) if font_id >= 0 else []
+                if families:
+                    font = QFont(families[0])
+            # Pillow šrifto dydis - em aukštis pikseliais (kaip ir Qt pixelSize)
+            font.setPixelSize(int(getattr(pil_font, 'size', size)))
+            # Pillow piešia nuo viršutinės (ascender) linijos, Qt - nuo bazinės linijos
+            if hasattr(pil_font, 'getmetrics'):
+                ascent = pil_font.getmetrics()[0]
+            else:
+                ascent = QFontMetricsF(font).ascent()
+            cached = self.fonts[size] = (font, ascent)
+        return cached
+
+    def compose(self, background, framed, title, artist, progress_position=0.3, layout=None):
+        """Sudeda šabloną į QImage"""
+        renderer = self.renderer
+        layout = layout or renderer.template_layout()
+        image = self.layer('cached_background', background).copy()
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.Antialiasing, False)
+        painter.setRenderHint(QPainter.TextAntialiasing, renderer.quality.text_antialias)
+        painter.setPen(Qt.NoPen)
+
+        # Nuotrauka su rėmeliu - paruošta Pillow su glotnia kauke, įklijuojama vienu piešimu
+        offset = framed['offset']
+        painter.drawImage(layout['x_pos'] - offset, layout['y_pos'] - offset, self.tile_layer(framed))
+
+        white = QColor(255, 255, 255)
+        self.draw_texts(painter, title, artist, layout, white)
+        self.draw_chrome(painter, layout, progress_position, white)
+        painter.end()
+        return image
+
+    def draw_text(self, painter, text, x, y, size, color):
+        font, ascent = self.qfont(size)
+        painter.setFont(font)
+        painter.setPen(color)
+        painter.drawText(QPointF(x, y + ascent), text)
+        painter.setPen(Qt.NoPen)
+
+    def draw_texts(self, painter, title, artist, layout, color):
+        x = layout['elements_start_x']
+        self.draw_text(painter, artist.upper(), x, layout['artist_y'], 60, color)
+        self.draw_text(painter, title, x, layout['title_y'], 45, color)
+
+    def draw_chrome(self, painter, layout, progress_position, color):
+        target_width = layout['target_width']
+        painter.setBrush(color)
+
+        # Progreso juosta: 5px linija (Pillow: y-2..y+2) ir taškas
+        if progress_position is not None:
+            start_x = layout['elements_start_x']
+            end_x = target_width - (target_width - layout['square_size']) // 2
+            y = layout['progress_y']
+            painter.fillRect(QRectF(start_x, y - 2, end_x - start_x + 1, 5), color)
+            dot_x = start_x + (end_x - start_x) * progress_position
+            dot_radius = 8
+            painter.drawEllipse(QRectF(dot_x - dot_radius, y - dot_radius, dot_radius * 2 + 1, dot_radius * 2 + 1))
+
+        # Medijos valdikliai
+        y = layout['controls_y']
+        center_x = target_width // 2
+        spacing = target_width // 6
+        size = 25
+        prev_x = center_x - spacing
+        painter.drawPolygon(QPolygonF([QPointF(prev_x - size // 2, y), QPointF(prev_x + size // 2, y - size),
+                                       QPointF(prev_x + size // 2, y + size)]))
+        next_x = center_x + spacing
+        painter.drawPolygon(QPolygonF([QPointF(next_x + size // 2, y), QPointF(next_x - size // 2, y - size),
+                                       QPointF(next_x - size // 2, y + size)]))
+
+        # Apskritimas (3px kontūras bbox viduje, kaip Pillow) ir pauzės linijos
+        play_size = 40
+        painter.setBrush(Qt.NoBrush)
+        pen = QPen(color, 3)
+        painter.setPen(pen)
+        painter.drawEllipse(QRectF(center_x - play_size + 1.5, y - play_size + 1.5, play_size * 2 - 2, play_size * 2 - 2))
+        painter.setPen(Qt.NoPen)
+        line_width, line_height, bar_spacing = 6, play_size, 8
+        for bar_x in (center_x - bar_spacing, center_x + bar_spacing):
+            painter.fillRect(QRectF(bar_x - line_width // 2, y - line_height // 2, line_width + 1, line_height + 1),
+                             color)
+
+
+BACKENDS = {
+    PillowBackend.name: PillowBackend,
+    QPainterBackend.name: QPainterBackend
+}
+
+
+def _region_psnr(reference, image, box):
+    from quality_presets import psnr
+    return psnr(reference.crop(box), image.crop(box))
+
+
+def parity(image_path=None, title="TAU MICH AUF", artist="NIKLAS DEE", blur_amount=60):
+    """Palygina QPainter ir Pillow rezultatus pagal sritis (PSNR, dB; inf - sutampa tiksliai)"""
+    from template_renderer import TemplateRenderer
+    from render_cache import DiskRenderCache
+    from render_graph import build_template_graph
+
+    with tempfile.TemporaryDirectory() as directory:
+        if image_path is None:
+            image_path = os.path.join(directory, "source.png")
+            Image.effect_noise((1600, 2000), 60).convert("RGB").save(image_path)
+        renderer = TemplateRenderer(disk_cache=DiskRenderCache(os.path.join(directory, "cache"), max_bytes=0))
+        graph = build_template_graph(renderer)
+        for name, value in (('image_path', image_path), ('source_fingerprint', renderer.fingerprinter.content(image_path)),
+                            ('title', title), ('artist', artist), ('blur_amount', blur_amount)):
+            graph.set_input(name, value)
+
+        reference = graph.get('final')
+        _, frame = QPainterBackend(renderer).render_graph_frame(graph)
+        image = qimage_to_pil(frame)
+
+    layout = renderer.template_layout()
+    x, y, size = layout['x_pos'], layout['y_pos'], layout['square_size']
+    width = layout['target_width']
+    regions = {
+        'viskas': (0, 0, width, layout['target_height']),
+        'nuotrauka': (x - 10, y - 10, x + size + 10, y + size + 10),
+        'tekstas': (0, layout['artist_y'] - 10, width, layout['progress_y'] - 20),
+        'juosta': renderer.progress_bar_box(layout),
+        'valdikliai': (0, layout['controls_y'] - 45, width, layout['controls_y'] + 45)
+    }
+    results = {name: _region_psnr(reference, image, box) for name, box in regions.items()}
+    for name, value in results.items():
+        print(f"{name:12} PSNR {value:8.2f} dB")
+    return results
+
+
+def benchmark(image_path=None, frames=30):
+    """Teksto keitimo pralaidumas nuo grafo iki QImage: Pillow + konvertavimas prieš QPainter"""
+    from template_renderer import TemplateRenderer
+    from render_cache import DiskRenderCache
+    from render_graph import build_template_graph
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        if image_path is None:
+            image_path = os.path.join(directory, "source.png")
+            Image.effect_noise((1600, 2000), 60).convert("RGB").save(image_path)
+        for name, backend_class in BACKENDS.items():
+            # Be disko kešo įrašų - kiekvienas kadras piešiamas iš naujo
+            renderer = TemplateRenderer(disk_cache=DiskRenderCache(os.path.join(directory, name), max_bytes=0))
+            backend = backend_class(renderer)
+            graph = build_template_graph(renderer)
+            for input_name, value in (('image_path', image_path),
+                                      ('source_fingerprint', renderer.fingerprinter.content(image_path)),
+                                      ('title', "A"), ('artist', "B"), ('blur_amount', 60)):
+                graph.set_input(input_name, value)
+            backend.render_graph_frame(graph)  # Fonas ir nuotrauka paruošiami vieną kartą
+
+            start = time.perf_counter()
+            for index in range(frames):
+                graph.set_input('title', f"DAINA {index}")
+                _, frame = backend.render_graph_frame(graph)
+                if not isinstance(frame, QImage):
+                    frame = pil_to_qimage(frame)
+                # Peržiūrai reikalingas pixmap tinkamo formato - įtraukiamas konvertavimas
+                frame.convertToFormat(QImage.Format_RGB32)
+            elapsed = time.perf_counter() - start
+            results[name] = frames / elapsed
+            print(f"{name:10} {elapsed / frames * 1000:7.1f} ms/kadras  ({results[name]:6.1f} kadrų/s)")
+    return results
+
+
+if __name__ == "__main__":
+    from PyQt5.QtGui import QGuiApplication
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    app = QGuiApplication(sys.argv[:1])
+    path = sys.argv[1] if len(sys.argv) > 1 else None
+    print("Atitikimas su Pillow:")
+    parity(path)
+    print("Pralaidumas (teksto keitimas):")
+    benchmark(path)
@@ -0,0 +1,134 @@
+import sys
+import time
+import tempfile
+import numpy as np
+from PIL import Image
+
+
+class QualityPreset:
+    """Piešimo kokybės nustatymai kiekvienam etapui
+
+    resize_* - Pillow resample filtrai, reducing_gap - Pillow resize()
+    parametras (didelis sumažinimas pirmiausia atliekamas greitu reduce()),
+    blur_scale - dydis, kuriuo atliekamas suliejimas (1/2 - kaip visada),
+    text_antialias - ar tekstas piešiamas su glodinimu.
+    """
+    def __init__(self, name, resize_filter, artwork_filter, blur_down_filter, blur_up_filter,
+                 blur_scale=0.5, text_antialias=True, reducing_gap=None):
+        self.name = name
+        self.resize_filter = resize_filter
+        self.artwork_filter = artwork_filter
+        self.blur_down_filter = blur_down_filter
+        self.blur_up_filter = blur_up_filter
+        self.blur_scale = blur_scale
+        self.text_antialias = text_antialias
+        self.reducing_gap = reducing_gap
+
+    def __eq__(self, other):
+        return isinstance(other, QualityPreset) and self.name == other.name
+
+    def __hash__(self):
+        return hash(self.name)
+
+    def __repr__(self):
+        return f"QualityPreset({self.name!r})"
+
+
+PRESETS = {
+    # Tiksliai toks pat rezultatas kaip iki šiol - naudojamas eksportui
+    'best': QualityPreset('best', Image.LANCZOS, Image.LANCZOS, Image.LANCZOS, Image.LANCZOS),
+    # Interaktyviai peržiūrai: bikubinis filtras, didelis sumažinimas per reduce()
+    'balanced': QualityPreset('balanced', Image.BICUBIC, Image.BICUBIC, Image.BILINEAR, Image.BILINEAR,
+                              reducing_gap=3.0),
+    # Greičiausias: suliejimas ketvirtadaliu dydžio, tekstas be glodinimo
+    'draft': QualityPreset('draft', Image.BILINEAR, Image.BILINEAR, Image.BOX, Image.BILINEAR,
+                           blur_scale=0.25, text_antialias=False, reducing_gap=2.0)
+}
+
+BEST = PRESETS['best']
+# Numatytasis peržiūros režimas GUI lange
+INTERACTIVE_PRESET = 'balanced'
+
+
+def psnr(reference, image):
+    """Didžiausias signalo ir triukšmo santykis (dB)"""
+    a = np.asarray(reference, dtype=np.float64)
+    b = np.asarray(image, dtype=np.float64)
+    mse = np.mean((a - b) ** 2)
+    if mse == 0:
+        return float('inf')
+    return 10 * np.log10(255.0 ** 2 / mse)
+
+
+def ssim(reference, image):
+    """Struktūrinis panašumas (SSIM) pilkų tonų vaizdui, 11px Gauso langas (sigma 1.5)"""
+    offsets = np.arange(-5, 6)
+    kernel = np.exp(-(offsets ** 2) / (2 * 1.5 ** 2))
+    kernel /= kernel.sum()
+
+    def blur(array):
+        # Atskiriamas (separable) Gauso filtras abiem ašimis, kraštai pratęsiami
+        for axis in (0, 1):
+            padded = np.pad(array, [(5, 5) if i == axis else (0, 0) for i in range(2)], mode='edge')
+            length = array.shape[axis]
+            array = sum(weight * np.take(padded, np.arange(shift, shift + length), axis=axis)
+                        for shift, weight in enumerate(kernel))
+        return array
+
+    a = np.asarray(reference.convert('L'), dtype=np.float64)
+    b = np.asarray(image.convert('L'), dtype=np.float64)
+    c1 = (0.01 * 255) ** 2
+    c2 = (0.03 * 255) ** 2
+    mu_a = blur(a)
+    mu_b = blur(b)
+    sigma_a = blur(a * a) - mu_a ** 2
+    sigma_b = blur(b * b) - mu_b ** 2
+    sigma_ab = blur(a * b) - mu_a * mu_b
+    ssim_map = ((2 * mu_a * mu_b + c1) * (2 * sigma_ab + c2)) / ((mu_a ** 2 + mu_b ** 2 + c1) * (sigma_a + sigma_b + c2))
+    return float(ssim_map.mean())
+
+
+def measure(image_path=None, title="TAU MICH AUF", artist="NIKLAS DEE", blur_amount=60, repeats=3):
+    """Palygina kokybės režimus su "best": laikas, PSNR ir SSIM"""
+    from template_renderer import TemplateRenderer
+    from render_cache import DiskRenderCache
+
+    with tempfile.TemporaryDirectory() as directory:
+        if image_path is None:
+            # Sintetinis didelės raiškos vaizdas su detalėmis ir gradientu
+            noise = Image.effect_noise((3000, 4000), 40).convert("RGB")
+            gradient = Image.linear_gradient('L').resize((3000, 4000)).convert("RGB")
+            image_path = f"{directory}/source.png"
+            Image.blend(noise, gradient, 0.6).save(image_path)
+
+        results = {}
+        for name in ('best', 'balanced', 'draft'):
+            # Be disko kešo įrašų - matuojamas tikras piešimas
+            renderer = TemplateRenderer(disk_cache=DiskRenderCache(f"{directory}/{name}", max_bytes=0))
+            renderer.quality = PRESETS[name]
+            renderer.load_source(image_path)  # Dekodavimas nepriklauso nuo režimo
+            best_time = None
+            for _ in range(repeats):
+                renderer.cached_background = None
+                start = time.perf_counter()
+                simple = renderer.create_simple_9_16(image_path)
+                image = renderer.create_template(image_path, title, artist, blur_amount)
+                elapsed = time.perf_counter() - start
+                best_time = elapsed if best_time is None else min(best_time, elapsed)
+            results[name] = {'time': best_time, 'image': image, 'simple': simple}
+
+        reference = results['best']
+        print(f"{'režimas':10} {'laikas':>9} {'PSNR':>8} {'SSIM':>7} {'PSNR 9:16':>10} {'SSIM 9:16':>10}")
+        for name, result in results.items():
+            result['psnr'] = psnr(reference['image'], result['image'])
+            result['ssim'] = ssim(reference['image'], result['image'])
+            result['simple_psnr'] = psnr(reference['simple'], result['simple'])
+            result['simple_ssim'] = ssim(reference['simple'], result['simple'])
+            print(f"{name:10} {result['time'] * 1000:7.1f}ms {result['psnr']:8.2f} {result['ssim']:7.4f} "
+                  f"{result['simple_psnr']:10.2f} {result['simple_ssim']:10.4f}")
+    return {name: {key: value for key, value in result.items() if key not in ('image', 'simple')}
+            for name, result in results.items()}
+
+
+if __name__ == "__main__":
+    measure(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,212 @@
+import os
+import threading
+from itertools import count
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QListWidget,
+                             QListWidgetItem, QProgressBar)
+from PyQt5.QtGui import QPixmap, QIcon, QColor
+from PyQt5.QtCore import Qt, QSize, pyqtSignal, QObject
+from template_renderer import TemplateRenderer, SourceCache
+from quality_presets import PRESETS
+from qt_backend import pil_to_qimage
+from metrics import JOBS
+
+# Miniatiūra - 1/6 viršelio dydžio (180x320)
+THUMBNAIL_REDUCE = 6
+THUMBNAIL_ICON_SIZE = QSize(54, 96)
+DEFAULT_TITLE = "TAU MICH AUF"
+DEFAULT_ARTIST = "NIKLAS DEE"
+
+
+class QueueItem:
+    """Vienas eilės vaizdas su savo pavadinimu, atlikėju ir blur"""
+    _ids = count(1)
+
+    def __init__(self, image_path, title, artist, blur_amount):
+        self.id = next(self._ids)
+        self.image_path = image_path
+        self.title = title
+        self.artist = artist
+        self.blur_amount = blur_amount
+        # Didinamas pakeitus nustatymus - senesnės miniatiūros atmetamos
+        self.version = 0
+
+    def settings(self):
+        """Piešimo parametrai (tušti laukai pakeičiami numatytaisiais, kaip peržiūroje)"""
+        return self.title or DEFAULT_TITLE, self.artist or DEFAULT_ARTIST, self.blur_amount
+
+    def label(self):
+        title, artist, blur_amount = self.settings()
+        return f"{title}\n{artist} · {blur_amount}%"
+
+
+class ThumbnailSignals(QObject):
+    ready = pyqtSignal(object)
+
+
+class ThumbnailRenderer:
+    """Eilės miniatiūros piešiamos lygiagrečiai fono gijose
+
+    Kiekviena gija turi savo piešėją (bendri antspaudai, disko kešas ir
+    šaltinių kešas), naudojamas greičiausias "draft" režimas, o fonas ir
+    nuotrauka piešiami iš karto miniatiūros dydžiu (create_thumbnail).
+    """
+    def __init__(self, fingerprinter, disk_cache, tiled, workers=2):
+        self.fingerprinter = fingerprinter
+        self.disk_cache = disk_cache
+        self.tiled = tiled
+        self.source_cache = SourceCache(max_entries=workers * 2)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnail")
+        self.local = threading.local()
+        self.signals = ThumbnailSignals()
+        self.effects = None
+
+    def renderer(self):
+        renderer = getattr(self.local, 'renderer', None)
+        if renderer is None:
+            renderer = TemplateRenderer(self.fingerprinter, self.disk_cache, self.tiled, self.source_cache)
+            renderer.quality = PRESETS['draft']
+            self.local.renderer = renderer
+        return renderer
+
+    def submit(self, item):
+        JOBS.inc(source="thumbnail", event="queued")
+        self.pool.submit(self.render, item, item.version, item.settings(), self.effects)
+
+    def render(self, item, version, settings, effects):
+        if item.version != version:
+            JOBS.inc(source="thumbnail", event="coalesced")
+            return  # Nustatymai jau pakeisti - bus nupiešta nauja versija
+        try:
+            renderer = self.renderer()
+            renderer.effects = effects
+            title, artist, blur_amount = settings
+            image = renderer.create_thumbnail(item.image_path, title, artist, blur_amount, THUMBNAIL_REDUCE)
+            result = pil_to_qimage(image).copy()
+        except Exception as e:
+            JOBS.inc(source="thumbnail", event="failed")
+            result = e
+        self.signals.ready.emit((item, version, result))
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+class QueuePanel(QWidget):
+    """Kelių vaizdų eilė: miniatiūros, pasirinkimas redagavimui ir eksportas"""
+    item_selected = pyqtSignal(object)
+    add_requested = pyqtSignal()
+    export_requested = pyqtSignal()
+
+    def __init__(self, thumbnails, parent=None):
+        super(QueuePanel, self).__init__(parent)
+        self.thumbnails = thumbnails
+        self.thumbnails.signals.ready.connect(self.on_thumbnail)
+        self.entries = {}  # item.id -> (QueueItem, QListWidgetItem)
+
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+
+        title = QLabel("Eilė")
+        title.setAlignment(Qt.AlignCenter)
+        title.setStyleSheet("font-size: 16px; color: white; margin-bottom: 10px;")
+        layout.addWidget(title)
+
+        self.list = QListWidget()
+        self.list.setIconSize(THUMBNAIL_ICON_SIZE)
+        self.list.setSpacing(4)
+        self.list.currentItemChanged.connect(self.on_current_changed)
+        layout.addWidget(self.list, 1)
+
+        buttons = QHBoxLayout()
+        self.add_btn = QPushButton("➕ Pridėti")
+        self.add_btn.clicked.connect(self.add_requested.emit)
+        self.remove_btn = QPushButton("✕")
+        self.remove_btn.setFixedWidth(30)
+        self.remove_btn.clicked.connect(self.remove_current)
+        buttons.addWidget(self.add_btn)
+        buttons.addWidget(self.remove_btn)
+        layout.addLayout(buttons)
+
+        self.export_btn = QPushButton("📦 Eksportuoti visus")
+        self.export_btn.setEnabled(False)
+        self.export_btn.clicked.connect(self.export_requested.emit)
+        layout.addWidget(self.export_btn)
+
+        self.progress = QProgressBar()
+        self.progress.setVisible(False)
+        layout.addWidget(self.progress)
+
+        self.placeholder = QPixmap(THUMBNAIL_ICON_SIZE)
+        self.placeholder.fill(QColor(50, 50, 60))
+
+    def items(self):
+        """Eilės elementai rodoma tvarka"""
+        return [self.list.item(row).data(Qt.UserRole) for row in range(self.list.count())]
+
+    def add_images(self, paths, artist, blur_amount):
+        """Prideda vaizdus; pavadinimas - failo vardas"""
+        added = []
+        for path in paths:
+            item = QueueItem(path, os.path.splitext(os.path.basename(path))[0].upper(), artist, blur_amount)
+            widget_item = QListWidgetItem(QIcon(self.placeholder), item.label())
+            widget_item.setData(Qt.UserRole, item)
+            widget_item.setToolTip(path)
+            self.list.addItem(widget_item)
+            self.entries[item.id] = (item, widget_item)
+            self.thumbnails.submit(item)
+            added.append(item)
+        self.export_btn.setEnabled(self.list.count() > 0)
+        return added
+
+    def remove_current(self):
+        row = self.list.currentRow()
+        if row < 0:
+            return
+        widget_item = self.list.takeItem(row)
+        item = widget_item.data(Qt.UserRole)
+        item.version += 1  # Laukiančios miniatiūros nebereikalingos
+        self.entries.pop(item.id, None)
+        self.export_btn.setEnabled(self.list.count() > 0)
+
+    def update_item(self, item, title, artist, blur_amount):
+        """Išsaugo redaguotus nustatymus ir perpiešia miniatiūrą"""
+        if (item.title, item.artist, item.blur_amount) == (title, artist, blur_amount):
+            return
+        item.title, item.artist, item.blur_amount = title, artist, blur_amount
+        item.version += 1
+        entry = self.entries.get(item.id)
+        if entry is not None:
+            entry[1].setText(item.label())
+            self.thumbnails.submit(item)
+
+    def refresh_all(self):
+        """Perpiešia visas miniatiūras (pvz., pakeitus efektus)"""
+        for item in self.items():
+            item.version += 1
+            self.thumbnails.submit(item)
+
+    def clear_selection(self):
+        self.list.setCurrentItem(None)
+
+    def on_current_changed(self, current, previous):
+        if current is not None:
+            self.item_selected.emit(current.data(Qt.UserRole))
+
+    def on_thumbnail(self, payload):
+        item, version, result = payload
+        entry = self.entries.get(item.id)
+        if entry is None or item.version != version:
+            return
+        if isinstance(result, Exception):
+            entry[1].setToolTip(f"{item.image_path}\n{result}")
+            entry[1].setForeground(QColor(220, 80, 80))
+            return
+        entry[1].setIcon(QIcon(QPixmap.fromImage(result)))
+
+    def set_progress(self, done, total):
+        """Eksporto eiga; total=0 - paslėpti"""
+        self.progress.setVisible(total > 0)
+        self.progress.setMaximum(max(total, 1))
+        self.progress.setValue(done)
+        self.export_btn.setEnabled(total == 0 and self.list.count() > 0)
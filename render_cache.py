@@ -0,0 +1,135 @@
+import os
+import sys
+import time
+import json
+import hashlib
+import threading
+import numpy as np
+from PIL import Image
+from metrics import cache_result
+
+# Šablono versija - pakeitus piešimo logiką, seni kešo įrašai tampa negaliojantys
+RENDER_VERSION = 2
+
+# Numatytasis disko kešo dydžio limitas (512 MB)
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def default_cache_dir():
+    """Grąžina numatytąjį disko kešo katalogą"""
+    base_dir = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base_dir, "image_template", "render_cache")
+
+
+class DiskRenderCache:
+    """Nuolatinis disko kešas fonams ir galutiniams vaizdams (.npy failai)"""
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+        # Įrašų indeksas: raktas -> (dydis baitais, paskutinio naudojimo laikas)
+        self.entries = {}
+        self.total_bytes = 0
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self.scan()
+        except OSError as e:
+            print(f"Klaida inicializuojant disko kešą: {e}", file=sys.stderr)
+
+    def scan(self):
+        """Nuskaito kešo katalogą ir atkuria indeksą"""
+        self.entries = {}
+        self.total_bytes = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".npy"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            self.entries[name[:-4]] = (stat.st_size, stat.st_mtime)
+            self.total_bytes += stat.st_size
+
+    def make_key(self, kind, fingerprint, **params):
+        """Sudaro kešo raktą iš turinio antspaudo ir piešimo parametrų"""
+        payload = json.dumps(
+            {'kind': kind, 'fp': fingerprint, 'v': RENDER_VERSION, 'params': params},
+            sort_keys=True, ensure_ascii=False
+        )
+        return f"{kind}-{hashlib.sha1(payload.encode('utf-8')).hexdigest()}"
+
+    def entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def get(self, key):
+        """Grąžina kešuotą vaizdą arba None"""
+        with self.lock:
+            cache_result(f"disk:{key.split('-', 1)[0]}", key in self.entries)
+            if key not in self.entries:
+                return None
+            path = self.entry_path(key)
+            try:
+                # Skaitoma visa iš karto: RGB įrašų Pillow negali naudoti tiesiai iš mmap
+                # (vis tiek kopijuotų), o atvertas mmap neleistų pakeisti ar išmesti failo
+                image = Image.fromarray(np.load(path))
+                # Atnaujinti naudojimo laiką LRU išmetimui
+                os.utime(path, None)
+                self.entries[key] = (self.entries[key][0], time.time())
+                return image
+            except (OSError, ValueError) as e:
+                print(f"Klaida skaitant disko kešą: {e}", file=sys.stderr)
+                self.drop(key)
+                return None
+
+    def put(self, key, image):
+        """Išsaugo vaizdą diske ir, jei reikia, išmeta seniausius įrašus"""
+        with self.lock:
+            path = self.entry_path(key)
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(temp_path, 'wb') as f:
+                    np.save(f, np.asarray(image))
+                # Atominis pakeitimas, kad kitas procesas nematytų pusiau įrašyto failo
+                os.replace(temp_path, path)
+            except OSError as e:
+                print(f"Klaida rašant į disko kešą: {e}", file=sys.stderr)
+                try:
+                    os.unlink(temp_path)
+                except OSError:
+                    pass
+                return
+
+            size = os.path.getsize(path)
+            if key in self.entries:
+                self.total_bytes -= self.entries[key][0]
+            self.entries[key] = (size, time.time())
+            self.total_bytes += size
+            self.evict()
+
+    def drop(self, key):
+        """Pašalina vieną įrašą"""
+        size, _ = self.entries.pop(key, (0, 0))
+        self.total_bytes -= size
+        try:
+            os.unlink(self.entry_path(key))
+        except OSError:
+            pass
+
+    def evict(self):
+        """Išmeta mažiausiai neseniai naudotus įrašus, kol tilpsime į limitą"""
+        if self.total_bytes <= self.max_bytes:
+            return
+        for key, _ in sorted(self.entries.items(), key=lambda item: item[1][1]):
+            if self.total_bytes <= self.max_bytes:
+                break
+            self.drop(key)
+
+    def clear(self):
+        """Išvalo visą disko kešą"""
+        with self.lock:
+            for key in list(self.entries):
+                self.drop(key)
+
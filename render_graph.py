@@ -0,0 +1,178 @@
+import time
+from PIL import Image, ImageDraw
+from metrics import RENDERS, RENDER_SECONDS, cache_result
+
+
+class GraphNode:
+    """Vienas skaičiavimo grafo mazgas"""
+    def __init__(self, name, inputs, func):
+        self.name = name
+        self.inputs = list(inputs)  # Mazgų arba įvesčių pavadinimai
+        self.func = func
+        self.value = None
+        self.stamp = None  # Įvesčių versijos, su kuriomis apskaičiuota reikšmė
+        self.hits = 0
+        self.misses = 0
+        self.last_ms = 0.0
+
+
+class RenderGraph:
+    """Inkrementinis skaičiavimo grafas
+
+    Kiekvienas mazgas deklaruoja savo įvestis (kitus mazgus arba išorines
+    įvestis). Mazgas perskaičiuojamas tik tada, kai pasikeitė bent viena
+    jo tranzityvinė išorinė įvestis. Mazgo funkcija gauna patį grafą ir
+    reikalingas reikšmes pasiima per get(), todėl neprireikę mazgai
+    (pvz., kai rezultatas rastas disko keše) visai neskaičiuojami.
+    """
+    def __init__(self):
+        self.inputs = {}  # pavadinimas -> [reikšmė, versija]
+        self.nodes = {}
+        self.closures = {}
+
+    def set_input(self, name, value):
+        """Nustato išorinę įvestį; versija didinama tik pasikeitus reikšmei"""
+        current = self.inputs.get(name)
+        if current is None:
+            self.inputs[name] = [value, 1]
+        elif current[0] != value:
+            current[0] = value
+            current[1] += 1
+
+    def value(self, name):
+        """Grąžina išorinės įvesties reikšmę"""
+        return self.inputs[name][0]
+
+    def add_node(self, name, inputs, func):
+        self.nodes[name] = GraphNode(name, inputs, func)
+        self.closures = {}
+
+    def input_closure(self, name):
+        """Visos išorinės įvestys, nuo kurių (tranzityviai) priklauso mazgas"""
+        closure = self.closures.get(name)
+        if closure is None:
+            if name not in self.nodes:
+                closure = (name,)
+            else:
+                names = set()
+                for dependency in self.nodes[name].inputs:
+                    names.update(self.input_closure(dependency))
+                closure = tuple(sorted(names))
+            self.closures[name] = closure
+        return closure
+
+    def stamp(self, name):
+        return tuple(self.inputs[input_name][1] for input_name in self.input_closure(name))
+
+    def get(self, name):
+        """Grąžina mazgo reikšmę, perskaičiuojant ją tik jei ji pasenusi"""
+        if name not in self.nodes:
+            return self.value(name)
+        node = self.nodes[name]
+        stamp = self.stamp(name)
+        if node.stamp == stamp:
+            node.hits += 1
+            cache_result(f"graph:{name}", True)
+            return node.value
+
+        node.misses += 1
+        cache_result(f"graph:{name}", False)
+        start = time.perf_counter()
+        node.value = node.func(self)
+        elapsed = time.perf_counter() - start
+        node.last_ms = elapsed * 1000
+        RENDER_SECONDS.observe(elapsed, stage=f"node:{name}")
+        node.stamp = stamp
+        return node.value
+
+    def is_stale(self, name):
+        return self.nodes[name].stamp != self.stamp(name)
+
+    def invalidate(self, name=None):
+        """Priverstinai pažymi mazgą (arba visus) kaip pasenusį"""
+        for node in ([self.nodes[name]] if name else self.nodes.values()):
+            node.stamp = None
+
+    def stats(self):
+        """Mazgų pataikymų/nepataikymų statistika"""
+        return {
+            name: {'hits': node.hits, 'misses': node.misses, 'last_ms': round(node.last_ms, 2)}
+            for name, node in self.nodes.items()
+        }
+
+
+def build_template_graph(renderer):
+    """Sukuria šablono grafą virš TemplateRenderer etapų
+
+    Išorinės įvestys: image_path, source_fingerprint, title, artist, blur_amount, effects, quality.
+    image_path naudojamas tik failui atidaryti - kešai priklauso nuo turinio antspaudo.
+    effects ir quality turi atitikti renderer.effects ir renderer.quality.
+    """
+    graph = RenderGraph()
+    layout = renderer.template_layout()
+    size = (layout['target_width'], layout['target_height'])
+
+    def source(g):
+        return renderer.load_source(g.value('image_path'))
+
+    def nine_sixteen(g):
+        # Paprasta 9:16 versija - pirmiausia disko keše
+        key = renderer.simple_key(g.value('source_fingerprint'))
+        image = renderer.disk_cache.get(key)
+        if image is None:
+            image = renderer.resize(renderer.crop_9_16(g.get('source')), size, renderer.quality.resize_filter)
+            renderer.disk_cache.put(key, image)
+            RENDERS.inc(kind="simple")
+        return image
+
+    def simple_preview(g):
+        return g.get('nine_sixteen')
+
+    def background(g):
+        key = renderer.disk_cache.make_key('background', g.value('source_fingerprint'),
+                                           blur_amount=g.value('blur_amount'), **renderer.effect_params(),
+                                           **renderer.quality_params())
+        image = renderer.disk_cache.get(key)
+        if image is None:
+            image = renderer.blur_background(g.get('nine_sixteen'), g.value('blur_amount'))
+            renderer.disk_cache.put(key, image)
+        return image
+
+    def framed_artwork(g):
+        return renderer.frame_artwork(g.get('source'), layout)
+
+    def chrome(g):
+        # Progreso juosta ir valdikliai kaip kaukė - nepriklauso nuo jokių įvesčių
+        mask = Image.new('L', size, 0)
+        renderer.draw_chrome(ImageDraw.Draw(mask), layout, fill=255)
+        return mask
+
+    def text(g):
+        mask = Image.new('L', size, 0)
+        renderer.draw_texts(ImageDraw.Draw(mask), g.value('title'), g.value('artist'), layout, fill=255)
+        return mask
+
+    def final(g):
+        key = renderer.render_key(g.value('source_fingerprint'), g.value('title'), g.value('artist'),
+                                  g.value('blur_amount'))
+        image = renderer.disk_cache.get(key)
+        if image is None:
+            image = g.get('background').copy()
+            renderer.paste_artwork(image, g.get('framed_artwork'), layout)
+            image.paste((255, 255, 255), (0, 0), g.get('text'))
+            image.paste((255, 255, 255), (0, 0), g.get('chrome'))
+            renderer.disk_cache.put(key, image)
+            RENDERS.inc(kind="template")
+        return image
+
+    graph.set_input('effects', renderer.effects)
+    graph.set_input('quality', renderer.quality)
+    graph.add_node('source', ['source_fingerprint'], source)
+    graph.add_node('nine_sixteen', ['source', 'quality'], nine_sixteen)
+    graph.add_node('simple_preview', ['nine_sixteen'], simple_preview)
+    graph.add_node('background', ['nine_sixteen', 'blur_amount', 'effects'], background)
+    graph.add_node('framed_artwork', ['source', 'quality'], framed_artwork)
+    graph.add_node('chrome', [], chrome)
+    graph.add_node('text', ['title', 'artist', 'quality'], text)
+    graph.add_node('final', ['background', 'framed_artwork', 'text', 'chrome'], final)
+    return graph
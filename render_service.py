@@ -0,0 +1,350 @@
+import io
+import os
+import sys
+import json
+import argparse
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from fingerprint import Fingerprinter
+from render_cache import DiskRenderCache
+from template_renderer import TemplateRenderer, SourceCache, DEFAULT_BLUR_AMOUNT
+from tiled_processing import TiledExecutor
+from metrics import REGISTRY, JOBS, QUEUE_DEPTH, ENCODED_BYTES, cache_result
+
+# Atsakymo siuntimo dalies dydis (srautiniam perdavimui)
+STREAM_CHUNK_SIZE = 64 * 1024
+
+CONTENT_TYPES = {
+    'png': 'image/png',
+    'jpeg': 'image/jpeg'
+}
+
+
+class QueueFullError(Exception):
+    """Eilė pilna - klientas turi pabandyti vėliau"""
+    pass
+
+
+class RenderService:
+    """Šablono piešimo servisas su darbininkų telkiniu ir užklausų sujungimu
+
+    Vienodos vienu metu gautos užklausos sujungiamos į vieną piešimą,
+    užkoduoti rezultatai laikomi LRU keše, o eilės ilgis ribojamas.
+    """
+    def __init__(self, workers=2, max_queue=16, result_cache_bytes=128 * 1024 * 1024, disk_cache=None):
+        # Servise maišas skaičiuojamas darbininko gijoje, todėl fono skaičiavimo nereikia
+        self.fingerprinter = Fingerprinter(background=False)
+        self.disk_cache = disk_cache if disk_cache is not None else DiskRenderCache()
+        self.source_cache = SourceCache()
+        self.tiled = TiledExecutor()
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="render")
+        self.local = threading.local()
+        self.max_queue = max_queue
+
+        self.lock = threading.Lock()
+        self.inflight = {}
+        self.results = OrderedDict()
+        self.result_cache_bytes = result_cache_bytes
+        self.results_size = 0
+        self.pending = 0
+
+        self.stats = {
+            'requests': 0,
+            'renders': 0,
+            'result_hits': 0,
+            'coalesced': 0,
+            'rejected': 0,
+            'errors': 0
+        }
+
+    def renderer(self):
+        """Grąžina šios darbininko gijos piešėją (kešai išlieka tarp užklausų)"""
+        renderer = getattr(self.local, 'renderer', None)
+        if renderer is None:
+            renderer = TemplateRenderer(self.fingerprinter, self.disk_cache, self.tiled, self.source_cache)
+            self.local.renderer = renderer
+        return renderer
+
+    def parse_params(self, params):
+        """Patikrina ir sunormina užklausos parametrus (neteisingi tipai - ValueError)"""
+        for name in ('image_path', 'title', 'artist', 'variant', 'format'):
+            value = params.get(name)
+            if value is not None and not isinstance(value, str):
+                raise ValueError(f"Laukas {name} turi būti tekstas")
+        blur_amount = params.get('blur_amount', DEFAULT_BLUR_AMOUNT)
+        if isinstance(blur_amount, bool) or not isinstance(blur_amount, int):
+            raise ValueError("Laukas blur_amount turi būti sveikasis skaičius")
+
+        image_path = params.get('image_path')
+        if not image_path or not os.path.isfile(image_path):
+            raise ValueError("Nerastas image_path failas")
+
+        variant = params.get('variant') or 'template'
+        if variant not in ('template', 'simple'):
+            raise ValueError(f"Nežinomas variantas: {variant}")
+
+        image_format = (params.get('format') or 'png').lower()
+        if image_format == 'jpg':
+            image_format = 'jpeg'
+        if image_format not in CONTENT_TYPES:
+            raise ValueError(f"Nepalaikomas formatas: {image_format}")
+
+        return {
+            'image_path': image_path,
+            'variant': variant,
+            'title': params.get('title') or "TAU MICH AUF",
+            'artist': params.get('artist') or "NIKLAS DEE",
+            'blur_amount': blur_amount,
+            'format': image_format
+        }
+
+    def request_key(self, params):
+        fingerprint = self.fingerprinter.content(params['image_path'])
+        if params['variant'] == 'simple':
+            return (fingerprint, 'simple', params['format'])
+        return (fingerprint, 'template', params['title'], params['artist'], params['blur_amount'], params['format'])
+
+    def submit(self, params):
+        """Pateikia užklausą; grąžina Future su (content_type, baitai)"""
+        params = self.parse_params(params)
+        key = self.request_key(params)
+
+        with self.lock:
+            self.stats['requests'] += 1
+            cached = self.results.get(key)
+            cache_result("result", cached is not None)
+            if cached is not None:
+                self.results.move_to_end(key)
+                self.stats['result_hits'] += 1
+                future = Future()
+                future.set_result(cached)
+                return future
+
+            future = self.inflight.get(key)
+            if future is not None:
+                # Tokia pati užklausa jau piešiama - prisijungti prie jos
+                self.stats['coalesced'] += 1
+                JOBS.inc(source="service", event="coalesced")
+                return future
+
+            if self.pending >= self.max_queue:
+                self.stats['rejected'] += 1
+                JOBS.inc(source="service", event="rejected")
+                raise QueueFullError("Piešimo eilė pilna")
+
+            future = Future()
+            self.inflight[key] = future
+            self.pending += 1
+            JOBS.inc(source="service", event="queued")
+            QUEUE_DEPTH.set(self.pending, source="service")
+
+        self.pool.submit(self._run, key, params, future)
+        return future
+
+    def _run(self, key, params, future):
+        try:
+            result = self.render(params)
+        except Exception as e:
+            with self.lock:
+                self.stats['errors'] += 1
+                self.inflight.pop(key, None)
+                self.pending -= 1
+                JOBS.inc(source="service", event="failed")
+                QUEUE_DEPTH.set(self.pending, source="service")
+            future.set_exception(e)
+            return
+
+        with self.lock:
+            self.stats['renders'] += 1
+            self.inflight.pop(key, None)
+            self.pending -= 1
+            QUEUE_DEPTH.set(self.pending, source="service")
+            self.store_result(key, result)
+        future.set_result(result)
+
+    def render(self, params):
+        """Nupiešia ir užkoduoja vaizdą darbininko gijoje"""
+        renderer = self.renderer()
+        if params['variant'] == 'simple':
+            image, _ = renderer.render_simple(params['image_path'])
+        else:
+            image, _ = renderer.render_template(params['image_path'], params['title'],
+                                                params['artist'], params['blur_amount'])
+
+        buffer = io.BytesIO()
+        if params['format'] == 'jpeg':
+            image.save(buffer, format='JPEG', quality=95)
+        else:
+            image.save(buffer, format='PNG')
+        ENCODED_BYTES.observe(buffer.tell(), format=params['format'])
+        return CONTENT_TYPES[params['format']], buffer.getvalue()
+
+    def store_result(self, key, result):
+        """Išsaugo rezultatą LRU keše (kviečiama laikant užraktą)"""
+        size = len(result[1])
+        if size > self.result_cache_bytes:
+            return
+        self.results[key] = result
+        self.results_size += size
+        while self.results_size > self.result_cache_bytes:
+            _, (_, data) = self.results.popitem(last=False)
+            self.results_size -= len(data)
+
+    def snapshot(self):
+        """Grąžina serviso statistiką"""
+        with self.lock:
+            stats = dict(self.stats)
+            stats.update({
+                'pending': self.pending,
+                'inflight': len(self.inflight),
+                'max_queue': self.max_queue,
+                'cached_results': len(self.results),
+                'cached_result_bytes': self.results_size,
+                'source_cache_hits': self.source_cache.hits,
+                'source_cache_misses': self.source_cache.misses
+            })
+        return stats
+
+    def shutdown(self):
+        self.pool.shutdown(wait=True)
+        self.tiled.shutdown()
+
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    """HTTP užklausų apdorojimas: POST/GET /render, GET /stats, GET /metrics, GET /health"""
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/health':
+            self.send_json(200, {'status': 'ok'})
+        elif url.path == '/stats':
+            self.send_json(200, self.service.snapshot())
+        elif url.path == '/metrics':
+            # Prometheus tekstas; ?format=json - JSON momentinė kopija
+            if parse_qs(url.query).get('format', [''])[-1] == 'json':
+                self.send_json(200, REGISTRY.snapshot())
+            else:
+                body = REGISTRY.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+        elif url.path == '/render':
+            params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+            self.handle_render(params)
+        else:
+            self.send_json(404, {'error': 'Nerastas adresas'})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/render':
+            self.send_json(404, {'error': 'Nerastas adresas'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            params = json.loads(self.rfile.read(length) or b"{}")
+        except (ValueError, json.JSONDecodeError):
+            self.send_json(400, {'error': 'Neteisingas JSON'})
+            return
+        if not isinstance(params, dict):
+            self.send_json(400, {'error': 'Užklausa turi būti JSON objektas'})
+            return
+        self.handle_render(params)
+
+    def handle_render(self, params):
+        try:
+            future = self.service.submit(params)
+        except (ValueError, TypeError) as e:
+            self.send_json(400, {'error': str(e)})
+            return
+        except QueueFullError as e:
+            self.send_json(503, {'error': str(e)}, {'Retry-After': '1'})
+            return
+        except OSError as e:
+            self.send_json(400, {'error': str(e)})
+            return
+
+        try:
+            content_type, data = future.result()
+        except Exception as e:
+            self.send_json(500, {'error': f"Nepavyko nupiešti: {e}"})
+            return
+        self.stream_bytes(content_type, data)
+
+    def stream_bytes(self, content_type, data):
+        """Siunčia atsakymą dalimis (chunked transfer encoding)"""
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        view = memoryview(data)
+        for start in range(0, len(view), STREAM_CHUNK_SIZE):
+            chunk = view[start:start + STREAM_CHUNK_SIZE]
+            self.wfile.write(f"{len(chunk):X}\r\n".encode('ascii'))
+            self.wfile.write(chunk)
+            self.wfile.write(b"\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Netriukšmauti kiekvienos užklausos
+        pass
+
+
+class RenderServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service):
+        super().__init__(address, RenderRequestHandler)
+        self.service = service
+
+
+def start_server(host="127.0.0.1", port=0, **service_options):
+    """Paleidžia servisą fono gijoje; grąžina (serveris, gija). port=0 - laisvas portas"""
+    service = RenderService(**service_options)
+    server = RenderServer((host, port), service)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, thread
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vietinis viršelių piešimo HTTP servisas")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--max-queue", type=int, default=16)
+    args = parser.parse_args(argv)
+
+    service = RenderService(workers=args.workers, max_queue=args.max_queue)
+    server = RenderServer((args.host, args.port), service)
+    print(f"Servisas veikia: http://{args.host}:{server.server_address[1]}/render")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
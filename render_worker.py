@@ -0,0 +1,148 @@
+import sys
+import json
+import time
+import base64
+import argparse
+import threading
+from render_service import RenderService
+from metrics import REGISTRY
+
+# Vienu metu vykdomų (pateiktų, bet dar neatsakytų) užklausų riba
+DEFAULT_MAX_INFLIGHT = 32
+
+
+class JsonLinesWorker:
+    """Ilgai veikiantis piešimo darbininkas: JSON eilutės per stdin/stdout
+
+    Kiekviena įvesties eilutė - užklausa (kaip HTTP serviso /render) su
+    nebūtinais "id" ir "output" laukais. Užklausos vykdomos lygiagrečiai
+    (pipelining), atsakymai rašomi vos tik pasiruošia, todėl jų tvarka gali
+    skirtis - juos sieja "id". Su "output" vaizdas įrašomas į failą ir
+    grąžinamas kelias, be jo - base64 duomenys.
+    """
+    def __init__(self, output=None, workers=2, max_inflight=DEFAULT_MAX_INFLIGHT, service=None):
+        self.output = output or sys.stdout
+        self.service = service or RenderService(workers=workers, max_queue=max_inflight)
+        self.slots = threading.BoundedSemaphore(max_inflight)
+        self.write_lock = threading.Lock()
+        self.idle = threading.Condition()
+        self.inflight = 0
+
+    def respond(self, payload):
+        line = json.dumps(payload, ensure_ascii=False)
+        with self.write_lock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+    def handle_line(self, line):
+        """Apdoroja vieną eilutę; grąžina False, jei gauta shutdown komanda"""
+        line = line.strip()
+        if not line:
+            return True
+        received = time.perf_counter()
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("Užklausa turi būti JSON objektas")
+        except ValueError as e:
+            self.respond({'id': None, 'ok': False, 'error': f"Neteisingas JSON: {e}"})
+            return True
+
+        command = request.get('cmd')
+        if command == 'shutdown':
+            return False
+        if command == 'stats':
+            self.respond({'id': request.get('id'), 'ok': True, 'stats': self.service.snapshot()})
+            return True
+        if command == 'metrics':
+            if request.get('format') == 'prometheus':
+                self.respond({'id': request.get('id'), 'ok': True, 'text': REGISTRY.prometheus_text()})
+            else:
+                self.respond({'id': request.get('id'), 'ok': True, 'metrics': REGISTRY.snapshot()})
+            return True
+        if command is not None:
+            self.respond({'id': request.get('id'), 'ok': False, 'error': f"Nežinoma komanda: {command}"})
+            return True
+
+        # Atgalinis slėgis: neskaityti toliau, kol per daug užklausų vykdoma
+        self.slots.acquire()
+        try:
+            future = self.service.submit(request)
+        except Exception as e:
+            self.slots.release()
+            self.respond({'id': request.get('id'), 'ok': False, 'error': str(e)})
+            return True
+
+        with self.idle:
+            self.inflight += 1
+        cached = future.done()
+        future.add_done_callback(lambda done: self.finish(request, done, received, cached))
+        return True
+
+    def finish(self, request, future, received, cached):
+        """Užbaigia užklausą: įrašo failą arba base64 duomenis ir siunčia atsakymą"""
+        render_done = time.perf_counter()
+        response = {'id': request.get('id')}
+        try:
+            content_type, data = future.result()
+            output_path = request.get('output')
+            if output_path:
+                with open(output_path, 'wb') as f:
+                    f.write(data)
+                response['path'] = output_path
+            else:
+                response['data'] = base64.b64encode(data).decode('ascii')
+            response.update({'ok': True, 'content_type': content_type, 'bytes': len(data)})
+        except Exception as e:
+            response.update({'ok': False, 'error': str(e)})
+
+        finished = time.perf_counter()
+        response['timing'] = {
+            'render_ms': round((render_done - received) * 1000, 2),
+            'write_ms': round((finished - render_done) * 1000, 2),
+            'total_ms': round((finished - received) * 1000, 2),
+            'cached': cached
+        }
+        self.respond(response)
+
+        self.slots.release()
+        with self.idle:
+            self.inflight -= 1
+            self.idle.notify_all()
+
+    def wait_idle(self):
+        with self.idle:
+            while self.inflight:
+                self.idle.wait()
+
+    def run(self, input_stream=None):
+        """Skaito užklausas iki EOF arba shutdown komandos, tada palaukia atsakymų"""
+        input_stream = input_stream or sys.stdin
+        try:
+            for line in input_stream:
+                if not self.handle_line(line):
+                    break
+            self.wait_idle()
+        finally:
+            self.service.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Piešimo darbininkas: JSON eilutės per stdin/stdout")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--max-inflight", type=int, default=DEFAULT_MAX_INFLIGHT)
+    args = parser.parse_args(argv)
+
+    # stdout skirtas tik atsakymams: jie rašomi per išsaugotą srautą, o visi kiti
+    # print() (klaidos, diagnostika) nukreipiami į stderr ir JSON eilučių nesugadina
+    responses = sys.stdout
+    sys.stdout = sys.stderr
+    try:
+        JsonLinesWorker(output=responses, workers=args.workers, max_inflight=args.max_inflight).run()
+    finally:
+        sys.stdout = responses
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,398 @@
+import os
+import sys
+import time
+import pickle
+import threading
+import multiprocessing as mp
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+import numpy as np
+from PIL import Image
+
+# Numatytasis slotas talpina vieną 1080x1920 RGB kadrą
+DEFAULT_SLOT_SHAPE = (1920, 1080, 3)
+# Piešimo rezultatų slotas: 1080x1920 RGBX - tokį kadrą Pillow ir Qt naudoja tiesiai iš atminties
+FRAME_SLOT_SHAPE = (1920, 1080, 4)
+# Dekoduoto šaltinio slotas (iki 12 MP); didesnius šaltinius darbininkas dekoduoja pats
+DEFAULT_SOURCE_SHAPE = (4000, 3000, 3)
+
+
+def attach_shared_memory(name):
+    """Prisijungia prie esamos bendros atminties (jos valdytojas - koordinatorius)"""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+class FrameRef:
+    """Nuoroda į kadrą bendros atminties slote (perduodama tarp procesų vietoj pikselių)"""
+    __slots__ = ("slot", "shape", "dtype")
+
+    def __init__(self, slot, shape, dtype="uint8"):
+        self.slot = slot
+        self.shape = tuple(shape)
+        self.dtype = dtype
+
+    def __reduce__(self):
+        return (FrameRef, (self.slot, self.shape, self.dtype))
+
+
+class FrameRing:
+    """Bendros atminties žiedas iš fiksuoto dydžio kadrų slotų
+
+    Koordinatorius sukuria žiedą (create=True) ir laisvų slotų eilę,
+    darbininkai prisijungia pagal pavadinimą. Slotą gavęs procesas įrašo
+    kadrą ir perduoda tik FrameRef; gavėjas skaito pikselius vietoje ir
+    atlaisvina slotą.
+    """
+    def __init__(self, slot_count, slot_shape=DEFAULT_SLOT_SHAPE, name=None, create=True, free_slots=None):
+        self.slot_count = slot_count
+        self.slot_shape = tuple(slot_shape)
+        self.slot_bytes = int(np.prod(self.slot_shape))
+        self.created = create
+        if create:
+            self.shm = shared_memory.SharedMemory(create=True, size=self.slot_bytes * slot_count)
+            self.free_slots = free_slots if free_slots is not None else mp.Queue()
+            for slot in range(slot_count):
+                self.free_slots.put(slot)
+        else:
+            self.shm = attach_shared_memory(name)
+            self.free_slots = free_slots
+        self.buffer = np.ndarray((slot_count, self.slot_bytes), dtype=np.uint8, buffer=self.shm.buf)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def handle(self):
+        """Duomenys, kurių reikia prisijungti prie žiedo kitame procese"""
+        return (self.slot_count, self.slot_shape, self.name, self.free_slots)
+
+    @classmethod
+    def attach(cls, handle):
+        slot_count, slot_shape, name, free_slots = handle
+        return cls(slot_count, slot_shape, name=name, create=False, free_slots=free_slots)
+
+    def acquire(self, timeout=None):
+        """Paima laisvą slotą (blokuoja, jei visi užimti - tai ir yra atgalinis slėgis)"""
+        return self.free_slots.get(timeout=timeout)
+
+    def release(self, slot):
+        self.free_slots.put(slot)
+
+    def write(self, array, slot=None):
+        """Įrašo masyvą į slotą ir grąžina FrameRef"""
+        array = np.asarray(array, dtype=np.uint8)
+        if array.nbytes > self.slot_bytes:
+            raise ValueError(f"Kadras ({array.nbytes} B) netelpa į slotą ({self.slot_bytes} B)")
+        acquired = slot is None
+        if acquired:
+            slot = self.acquire()
+        try:
+            target = self.buffer[slot, :array.nbytes].reshape(array.shape)
+            np.copyto(target, array)
+        except BaseException:
+            if acquired:
+                self.release(slot)
+            raise
+        return FrameRef(slot, array.shape)
+
+    def fits(self, image):
+        return image.width * image.height * 3 <= self.slot_bytes
+
+    def write_image(self, image, slot=None, mode="RGB"):
+        """Įrašo vaizdą RGB arba RGBX (4 baitai taškui - skaitomas be kopijavimo) režimu"""
+        return self.write(np.asarray(image.convert(mode)), slot)
+
+    def view(self, ref):
+        """Grąžina masyvą, rodantį tiesiai į slotą (be kopijavimo)"""
+        size = int(np.prod(ref.shape))
+        return self.buffer[ref.slot, :size].reshape(ref.shape)
+
+    def image(self, ref):
+        """PIL vaizdas iš sloto
+
+        RGBX kadras (4 kanalai) nekopijuojamas - vaizdas rodo tiesiai į slotą
+        ir galioja tik kol slotas neatlaisvintas. RGB kadrą Pillow nukopijuoja
+        vienu memcpy.
+        """
+        height, width = ref.shape[:2]
+        mode = "RGBX" if ref.shape[2] == 4 else "RGB"
+        return Image.frombuffer(mode, (width, height), self.view(ref), "raw", mode, 0, 1)
+
+    def close(self):
+        self.buffer = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # Dar yra nuorodų į slotus - atmintis bus atlaisvinta, kai jos išnyks
+        if self.created:
+            self.shm.unlink()
+
+
+class FrameLease:
+    """Viršelio ir paprastos versijos kadrai, paskolinti iš žiedo slotų (be kopijavimo)
+
+    processed ir simple - RGBX PIL vaizdai tiesiai virš bendros atminties;
+    juos galima koduoti ar rodyti vietoje, bet tik iki release(). Gavėjas
+    privalo iškviesti release(), kai kadrai nebereikalingi.
+    """
+    def __init__(self, ring, refs):
+        self.ring = ring
+        self.refs = refs
+        self.lock = threading.Lock()
+        self.images = [ring.image(ref) for ref in refs]
+
+    @property
+    def processed(self):
+        return self.images[0]
+
+    @property
+    def simple(self):
+        return self.images[1]
+
+    def release(self):
+        with self.lock:
+            refs, self.refs = self.refs, ()
+            self.images = [None, None]
+        for ref in refs:
+            self.ring.release(ref.slot)
+
+
+def _release_result(future):
+    """Niekam nebereikalingo Future kadrus grąžina į žiedą"""
+    if future.exception() is None:
+        future.result().release()
+
+
+def _render_job(ring, sources, renderer, job):
+    """Piešia vieną užduotį; grąžina rezultatą eilei (job_id, viršelis, paprasta, klaida)
+
+    Šaltinio slotas atlaisvinamas iškart nuskaičius, o nepavykus įrašyti
+    kurio nors rezultato - atlaisvinami ir jau užimti rezultatų slotai.
+    """
+    job_id, image_path, title, artist, blur_amount, source_ref, fingerprint = job
+    refs = []
+    try:
+        if source_ref is not None:
+            try:
+                source = sources.image(source_ref)
+            finally:
+                sources.release(source_ref.slot)
+            # Piešėjas šaltinį randa kešuose pagal koordinatoriaus antspaudą - failas nedekoduojamas
+            renderer.fingerprinter.remember(image_path, fingerprint)
+            renderer.source_cache.put(fingerprint, source)
+        processed, _ = renderer.render_template(image_path, title, artist, blur_amount)
+        simple, _ = renderer.render_simple(image_path)
+        for image in (processed, simple):
+            refs.append(ring.write_image(image, mode="RGBX"))
+        return job_id, refs[0], refs[1], None
+    except Exception as e:
+        for ref in refs:
+            ring.release(ref.slot)
+        return job_id, None, None, str(e)
+
+
+def _render_worker(ring_handle, source_handle, jobs, results, effects=None, cache_options=None):
+    """Darbininko procesas: piešia šabloną ir rezultatus rašo į žiedą
+
+    cache_options - (katalogas, max_bytes) koordinatoriaus disko kešui;
+    None - numatytasis kešas.
+    """
+    from fingerprint import Fingerprinter
+    from render_cache import DiskRenderCache
+    from template_renderer import TemplateRenderer, SourceCache
+    from tiled_processing import TiledExecutor
+
+    ring = FrameRing.attach(ring_handle)
+    sources = FrameRing.attach(source_handle)
+    # Procesai jau išnaudoja branduolius, todėl juostų gijų nereikia
+    disk_cache = DiskRenderCache(*cache_options) if cache_options is not None else DiskRenderCache()
+    renderer = TemplateRenderer(Fingerprinter(background=False), disk_cache, TiledExecutor(1),
+                                SourceCache(max_entries=1))
+    renderer.effects = effects
+    try:
+        while True:
+            job = jobs.get()
+            if job is None:
+                break
+            results.put(_render_job(ring, sources, renderer, job))
+    finally:
+        sources.close()
+        ring.close()
+
+
+class ProcessBatchRenderer:
+    """Piešia viršelius keliuose procesuose, vaizdai perduodami per bendrą atmintį
+
+    Dekoduoti šaltiniai į darbininkus keliauja per šaltinių žiedą, rezultatai
+    atgal - per kadrų žiedą. Rezultatai nekopijuojami: Future grąžina
+    FrameLease, kurio kadrai koduojami tiesiai iš slotų, o slotai grįžta į
+    žiedą tik po release(). Kol visi slotai paskolinti, darbininkai laukia
+    (atgalinis slėgis).
+    """
+    def __init__(self, workers=None, slot_count=None, source_shape=DEFAULT_SOURCE_SHAPE, effects=None,
+                 disk_cache=None):
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        # Du kadrai vienam viršeliui + atsarga, kad darbininkai nelauktų koordinatoriaus
+        self.ring = FrameRing(slot_count or self.workers * 2 + 2, FRAME_SLOT_SHAPE)
+        # Po vieną šaltinį kiekvienam darbininkui ir vieną ruošiamą
+        self.sources = FrameRing(self.workers + 1, source_shape)
+        self.jobs = mp.Queue()
+        self.results = mp.Queue()
+        self.futures = {}
+        self.lock = threading.Lock()
+        self.next_id = 0
+        # Darbininkai naudoja tą patį disko kešo katalogą ir dydžio ribą kaip koordinatorius
+        cache_options = (disk_cache.cache_dir, disk_cache.max_bytes) if disk_cache is not None else None
+        self.processes = [
+            mp.Process(target=_render_worker,
+                       args=(self.ring.handle(), self.sources.handle(), self.jobs, self.results, effects,
+                             cache_options), daemon=True)
+            for _ in range(self.workers)
+        ]
+        for process in self.processes:
+            process.start()
+        self.collector = threading.Thread(target=self.collect, name="shm-results", daemon=True)
+        self.collector.start()
+
+    def submit(self, image_path, title, artist, blur_amount, source=None, fingerprint=None):
+        """Pateikia užduotį; Future grąžina FrameLease (viršelis ir paprasta versija)
+
+        source - jau dekoduotas šaltinis (RGB) su turinio antspaudu; jei jis
+        netelpa į šaltinio slotą, darbininkas failą dekoduoja pats.
+        """
+        future = Future()
+        with self.lock:
+            job_id = self.next_id
+            self.next_id += 1
+            self.futures[job_id] = future
+        source_ref = None
+        if source is not None and fingerprint is not None and self.sources.fits(source):
+            source_ref = self.sources.write_image(source)
+        self.jobs.put((job_id, image_path, title, artist, blur_amount, source_ref, fingerprint))
+        return future
+
+    def collect(self):
+        """Rezultatų gija: užbaigia Future kadrų paskola (slotai lieka užimti iki release())"""
+        while True:
+            result = self.results.get()
+            if result is None:
+                break
+            job_id, processed_ref, simple_ref, error = result
+            with self.lock:
+                future = self.futures.pop(job_id)
+            if error is not None:
+                future.set_exception(RuntimeError(error))
+                continue
+            try:
+                lease = FrameLease(self.ring, (processed_ref, simple_ref))
+            except Exception as e:
+                for ref in (processed_ref, simple_ref):
+                    self.ring.release(ref.slot)
+                future.set_exception(e)
+                continue
+            future.set_result(lease)
+
+    def render(self, jobs):
+        """Generatorius: priima (image_path, title, artist, blur_amount) sąrašą
+
+        Grąžina (indeksas, viršelis, paprasta versija, klaida) pateikimo
+        tvarka. Vaizdai rodo tiesiai į slotus, kurie atlaisvinami prieš imant
+        kitą rezultatą (ir uždarant generatorių), todėl juos reikia užkoduoti
+        ar parodyti iš karto. Vienu metu vykdoma tiek užduočių, kiek kadrų
+        porų telpa žiede.
+        """
+        pending = []
+        jobs = iter(enumerate(jobs))
+        window = max(1, self.ring.slot_count // 2)
+        try:
+            while True:
+                for job_id, (image_path, title, artist, blur_amount) in jobs:
+                    pending.append((job_id, self.submit(image_path, title, artist, blur_amount)))
+                    if len(pending) >= window:
+                        break
+                if not pending:
+                    return
+                job_id, future = pending.pop(0)
+                try:
+                    lease = future.result()
+                except Exception as e:
+                    yield job_id, None, None, str(e)
+                    continue
+                try:
+                    yield job_id, lease.processed, lease.simple, None
+                finally:
+                    lease.release()
+        finally:
+            # Nepaimti rezultatai grąžinami į žiedą, kai tik pasiruoš
+            for _, future in pending:
+                future.add_done_callback(_release_result)
+
+    def close(self):
+        for _ in self.processes:
+            self.jobs.put(None)
+        for process in self.processes:
+            process.join(timeout=5)
+        self.results.put(None)
+        self.collector.join()
+        with self.lock:
+            futures, self.futures = list(self.futures.values()), {}
+        for future in futures:
+            future.set_exception(RuntimeError("Piešimo procesai sustabdyti"))
+        self.sources.close()
+        self.ring.close()
+
+
+def _pickle_sender(queue, count, shape):
+    frame = np.full(shape, 128, dtype=np.uint8)
+    for _ in range(count):
+        queue.put(frame)
+
+
+def _ring_sender(ring_handle, queue, count, shape):
+    ring = FrameRing.attach(ring_handle)
+    frame = np.full(shape, 128, dtype=np.uint8)
+    for _ in range(count):
+        queue.put(ring.write(frame))
+    ring.close()
+
+
+def benchmark(count=50, shape=DEFAULT_SLOT_SHAPE):
+    """Palygina kadrų perdavimą tarp procesų: pickle eilė prieš bendros atminties žiedą"""
+    frame_mb = int(np.prod(shape)) / (1024 * 1024)
+
+    queue = mp.Queue(maxsize=4)
+    start = time.perf_counter()
+    sender = mp.Process(target=_pickle_sender, args=(queue, count, shape))
+    sender.start()
+    checksum = 0
+    for _ in range(count):
+        frame = queue.get()
+        checksum += int(frame[0, 0, 0])
+    sender.join()
+    pickle_time = time.perf_counter() - start
+
+    ring = FrameRing(4, shape)
+    refs = mp.Queue()
+    start = time.perf_counter()
+    sender = mp.Process(target=_ring_sender, args=(ring.handle(), refs, count, shape))
+    sender.start()
+    for _ in range(count):
+        ref = refs.get()
+        checksum += int(ring.view(ref)[0, 0, 0])
+        ring.release(ref.slot)
+    sender.join()
+    ring_time = time.perf_counter() - start
+    ring.close()
+
+    pickled_size = len(pickle.dumps(np.zeros(shape, dtype=np.uint8), protocol=pickle.HIGHEST_PROTOCOL))
+    print(f"Kadrų: {count}, kadro dydis: {frame_mb:.1f} MB (pickle: {pickled_size / (1024 * 1024):.1f} MB)")
+    print(f"pickle eilė:       {pickle_time * 1000:8.1f} ms  ({count * frame_mb / pickle_time:7.1f} MB/s)")
+    print(f"bendros atm. žiedas: {ring_time * 1000:8.1f} ms  ({count * frame_mb / ring_time:7.1f} MB/s)")
+    print(f"pagreitėjimas x{pickle_time / ring_time:.2f}")
+    return {'pickle': pickle_time, 'shared_memory': ring_time}
+
+
+if __name__ == "__main__":
+    benchmark()
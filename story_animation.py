@@ -0,0 +1,178 @@
+import os
+import zlib
+import struct
+import numpy as np
+from PIL import ImageDraw
+
+
+class AnimationSettings:
+    """Animuotos istorijos eksporto nustatymai"""
+    def __init__(self, frame_count=60, fps=30, max_memory=256 * 1024 * 1024,
+                 start_position=0.0, end_position=1.0, loop=0):
+        self.frame_count = max(1, int(frame_count))
+        self.fps = max(1, int(fps))
+        # Didžiausias leidžiamas atminties kiekis kadrams (baitais)
+        self.max_memory = max_memory
+        self.start_position = start_position
+        self.end_position = end_position
+        self.loop = loop  # 0 - kartoti be galo
+
+    @property
+    def frame_duration_ms(self):
+        return 1000.0 / self.fps
+
+
+def _png_chunk(chunk_type, data):
+    """Suformuoja vieną PNG bloką su CRC"""
+    crc = zlib.crc32(chunk_type)
+    crc = zlib.crc32(data, crc)
+    return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", crc & 0xFFFFFFFF)
+
+
+class ApngStreamWriter:
+    """APNG rašytuvas, kuris kadrus iš karto rašo į failą
+
+    Pirmas kadras rašomas visas, o tolesni - tik pasikeitusi sritis
+    (fcTL poslinkis + fdAT), todėl atmintyje laikomas tik vienas kadras.
+    """
+    def __init__(self, fp, size, frame_count, fps, loop=0, compress_level=6):
+        self.fp = fp
+        self.width, self.height = size
+        self.frame_count = frame_count
+        self.fps = fps
+        self.compress_level = compress_level
+        self.sequence = 0
+        self.frames_written = 0
+
+        self.fp.write(b"\x89PNG\r\n\x1a\n")
+        # IHDR: 8 bitų RGB, be interlace
+        self.fp.write(_png_chunk(b"IHDR", struct.pack(">IIBBBBB", self.width, self.height, 8, 2, 0, 0, 0)))
+        # acTL: kadrų skaičius ir kartojimų skaičius
+        self.fp.write(_png_chunk(b"acTL", struct.pack(">II", frame_count, loop)))
+
+    def encode_pixels(self, image):
+        """Suspaudžia RGB pikselius naudojant PNG "Up" filtrą"""
+        rows = np.asarray(image.convert("RGB"), dtype=np.uint8).reshape(image.height, image.width * 3)
+        filtered = np.empty((image.height, image.width * 3 + 1), dtype=np.uint8)
+        filtered[:, 0] = 2  # Up filtras
+        filtered[0, 1:] = rows[0]
+        # Skirtumas su ankstesne eilute (mod 256)
+        np.subtract(rows[1:], rows[:-1], out=filtered[1:, 1:])
+        return zlib.compress(filtered.tobytes(), self.compress_level)
+
+    def add_frame(self, image, offset=(0, 0)):
+        """Prideda kadrą (arba jo dalį, jei nurodytas poslinkis)"""
+        if self.frames_written >= self.frame_count:
+            raise ValueError("Viršytas deklaruotas kadrų skaičius")
+        if self.frames_written == 0 and (offset != (0, 0) or image.size != (self.width, self.height)):
+            raise ValueError("Pirmas APNG kadras turi būti viso dydžio")
+
+        # fcTL: kadro dydis, poslinkis, trukmė (1/fps s), dispose=NONE, blend=SOURCE
+        self.fp.write(_png_chunk(b"fcTL", struct.pack(
+            ">IIIIIHHBB", self.sequence, image.width, image.height, offset[0], offset[1],
+            1, self.fps, 0, 0)))
+        self.sequence += 1
+
+        data = self.encode_pixels(image)
+        if self.frames_written == 0:
+            self.fp.write(_png_chunk(b"IDAT", data))
+        else:
+            self.fp.write(_png_chunk(b"fdAT", struct.pack(">I", self.sequence) + data))
+            self.sequence += 1
+        self.frames_written += 1
+
+    def close(self):
+        if self.frames_written != self.frame_count:
+            raise ValueError(f"Įrašyta {self.frames_written} kadrų iš {self.frame_count}")
+        self.fp.write(_png_chunk(b"IEND", b""))
+
+
+class StoryAnimator:
+    """Sukuria animuotą istoriją, kurioje progreso juostos taškas juda
+
+    Statiniai sluoksniai (fonas, nuotrauka, tekstas, valdikliai) piešiami
+    vieną kartą, o kiekvienam kadrui perpiešiama tik progreso juostos juostelė.
+    """
+    def __init__(self, renderer, settings=None):
+        self.renderer = renderer
+        self.settings = settings or AnimationSettings()
+
+    def positions(self):
+        """Grąžina taško pozicijas kiekvienam kadrui"""
+        settings = self.settings
+        if settings.frame_count == 1:
+            return [settings.start_position]
+        step = (settings.end_position - settings.start_position) / (settings.frame_count - 1)
+        return [settings.start_position + step * i for i in range(settings.frame_count)]
+
+    def iter_frames(self, base_image, copy_frames=False):
+        """Generatorius, grąžinantis (kadras, juostelės sritis)
+
+        Jei copy_frames=False, grąžinamas tas pats kadro objektas, todėl jį
+        reikia užkoduoti prieš imant kitą kadrą.
+        """
+        layout = self.renderer.template_layout(*base_image.size)
+        strip_box = self.renderer.progress_bar_box(layout)
+        base_strip = base_image.crop(strip_box)
+        frame = base_image.copy()
+
+        for position in self.positions():
+            # Atkurti juostelę iš statinio pagrindo ir perpiešti tik ją
+            frame.paste(base_strip, strip_box[:2])
+            draw = ImageDraw.Draw(frame)
+            self.renderer.draw_progress_bar(draw, layout['target_width'], layout['progress_y'],
+                                       layout['elements_start_x'], layout['square_size'], position)
+            yield (frame.copy() if copy_frames else frame), strip_box
+
+    def render_base(self, image_path, title, artist, blur_amount=None):
+        """Sukuria statinį pagrindą be progreso juostos"""
+        return self.renderer.create_template(image_path, title, artist, blur_amount, progress_position=None)
+
+    def estimate_buffered_memory(self, size, bytes_per_pixel):
+        return self.settings.frame_count * size[0] * size[1] * bytes_per_pixel
+
+    def export(self, file_path, base_image):
+        """Eksportuoja animaciją; formatas parenkamas pagal failo plėtinį"""
+        ext = os.path.splitext(file_path)[1].lower()
+        if ext in (".png", ".apng"):
+            self.export_apng(file_path, base_image)
+        elif ext in (".gif", ".webp"):
+            self.export_buffered(file_path, base_image, ext)
+        else:
+            raise ValueError(f"Nepalaikomas animacijos formatas: {ext}")
+
+    def export_apng(self, file_path, base_image):
+        """APNG: kadrai rašomi srautu, išsaugoma tik pasikeitusi juostelė"""
+        settings = self.settings
+        with open(file_path, 'wb') as f:
+            writer = ApngStreamWriter(f, base_image.size, settings.frame_count, settings.fps, settings.loop)
+            for index, (frame, strip_box) in enumerate(self.iter_frames(base_image)):
+                if index == 0:
+                    writer.add_frame(frame)
+                else:
+                    writer.add_frame(frame.crop(strip_box), strip_box[:2])
+            writer.close()
+
+    def export_buffered(self, file_path, base_image, ext):
+        """GIF/WebP: Pillow koduotuvai laiko visus kadrus, todėl tikrinamas atminties limitas"""
+        settings = self.settings
+        # GIF kadrai laikomi paletės režimu (1 B/px), WebP - RGBA (4 B/px)
+        bytes_per_pixel = 1 if ext == ".gif" else 4
+        needed = self.estimate_buffered_memory(base_image.size, bytes_per_pixel)
+        if needed > settings.max_memory:
+            raise MemoryError(
+                f"Animacijai reikėtų ~{needed // (1024 * 1024)} MB atminties "
+                f"(limitas {settings.max_memory // (1024 * 1024)} MB). "
+                f"Sumažinkite kadrų skaičių arba naudokite APNG (.png) formatą.")
+
+        frames = (frame for frame, _ in self.iter_frames(base_image, copy_frames=True))
+        first = next(frames)
+        save_kwargs = {
+            'save_all': True,
+            'append_images': frames,
+            'duration': int(round(settings.frame_duration_ms)),
+            'loop': settings.loop
+        }
+        if ext == ".webp":
+            save_kwargs['quality'] = 90
+        first.save(file_path, **save_kwargs)
@@ -0,0 +1,578 @@
+import os
+import io
+import time
+import threading
+from collections import OrderedDict
+from PIL import Image, ImageDraw, ImageFont, ExifTags
+from render_cache import DiskRenderCache
+from fingerprint import Fingerprinter
+from tiled_processing import TiledExecutor
+from effects import EffectPipeline
+from quality_presets import BEST
+from mask_library import MASKS
+from metrics import RENDERS, RENDER_SECONDS, cache_result
+
+# Numatytasis blur kiekis (60%)
+DEFAULT_BLUR_AMOUNT = 60
+
+
+def exif_thumbnail(image):
+    """Grąžina EXIF įterptą miniatiūrą (jei yra) be viso vaizdo dekodavimo"""
+    raw_exif = image.info.get('exif')
+    if not raw_exif:
+        return None
+    try:
+        ifd1 = image.getexif().get_ifd(ExifTags.IFD.IFD1)
+        offset = ifd1.get(0x0201)  # JPEGInterchangeFormat
+        length = ifd1.get(0x0202)  # JPEGInterchangeFormatLength
+        if not offset or not length:
+            return None
+        # Poslinkiai skaičiuojami nuo TIFF antraštės, kuri eina po "Exif\0\0"
+        start = 6 if raw_exif.startswith(b"Exif\x00\x00") else 0
+        data = raw_exif[start + offset:start + offset + length]
+        thumbnail = Image.open(io.BytesIO(data))
+        return thumbnail.convert("RGB")
+    except Exception:
+        return None
+
+
+def quick_preview(image_path, min_size=(270, 480)):
+    """Greitas laikinas vaizdas: EXIF miniatiūra arba JPEG draft dekodavimas
+
+    Grąžina None, jei greito būdo nėra (pvz., PNG failams).
+    """
+    with Image.open(image_path) as image:
+        thumbnail = exif_thumbnail(image)
+        if thumbnail is not None:
+            return thumbnail
+        if image.format == 'JPEG':
+            # Draft režimas dekoduoja sumažintą (1/2-1/8) vaizdą tiesiai iš DCT koeficientų
+            width, height = image.size
+            scale = max(min_size[0] / width, min_size[1] / height, 1 / 8)
+            image.draft('RGB', (int(width * scale), int(height * scale)))
+            return image.convert("RGB")
+    return None
+
+
+class SourceCache:
+    """Bendras dekoduotų šaltinių LRU kešas, saugus naudoti iš kelių gijų"""
+    def __init__(self, max_entries=8):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, fingerprint):
+        with self.lock:
+            image = self.entries.get(fingerprint)
+            if image is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(fingerprint)
+            self.hits += 1
+            return image
+    
+    def put(self, fingerprint, image):
+        with self.lock:
+            self.entries[fingerprint] = image
+            self.entries.move_to_end(fingerprint)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+class TemplateRenderer:
+    """Viršelio šablono piešimas be Qt priklausomybių
+
+    Naudojamas GUI lange ir fono režimuose (HTTP servisas ir kt.). Vienas
+    objektas turi savo kešus, todėl vienu metu jį turi naudoti tik viena gija.
+    """
+    def __init__(self, fingerprinter=None, disk_cache=None, tiled=None, source_cache=None):
+        # Failų antspaudai - kešai tikrinami pagal turinį, o ne pagal kelią
+        self.fingerprinter = fingerprinter or Fingerprinter()
+        
+        # Nuolatinis disko kešas - fonai ir galutiniai vaizdai išlieka tarp paleidimų
+        self.disk_cache = disk_cache if disk_cache is not None else DiskRenderCache()
+        
+        # Sunkios pikselių operacijos (resize, blur, tamsinimas) vykdomos juostomis visose gijose
+        self.tiled = tiled or TiledExecutor()
+        
+        # Kokybės režimas: resample filtrai, suliejimo mastelis, teksto glodinimas
+        self.quality = BEST
+        
+        # Fono efektai (vinjetė, grūdėtumas, LUT, kreivė); None - išjungti
+        self.effects = None
+        self.effect_pipeline = EffectPipeline()
+        
+        # Kintamieji kešavimui
+        self.cached_background = None
+        self.cached_blur_amount = None
+        self.cached_effects = None
+        self.cached_quality = None
+        self.cached_fingerprint = None  # Paskutinio kešuoto vaizdo turinio antspaudas
+        
+        # Dekoduoto šaltinio ir šriftų kešai
+        self.cached_source = None
+        self.cached_source_fingerprint = None
+        self.font_cache = {}
+        
+        # Nebūtinas bendras kelių piešėjų dekoduotų šaltinių kešas
+        self.source_cache = source_cache
+    
+    def render_simple(self, image_path):
+        """Grąžina (paprasta 9:16 versija, kešo raktas), naudojant disko kešą"""
+        simple_key = self.simple_key(self.fingerprinter.content(image_path))
+        simple_image = self.disk_cache.get(simple_key)
+        if simple_image is None:
+            simple_image = self.create_simple_9_16(image_path)
+            self.disk_cache.put(simple_key, simple_image)
+        return simple_image, simple_key
+    
+    def render_template(self, image_path, title, artist, blur_amount=DEFAULT_BLUR_AMOUNT):
+        """Grąžina (galutinis viršelis, kešo raktas), naudojant disko kešą"""
+        render_key = self.render_key(self.fingerprinter.content(image_path), title, artist, blur_amount)
+        processed_image = self.disk_cache.get(render_key)
+        if processed_image is None:
+            processed_image = self.create_template(image_path, title, artist, blur_amount)
+            self.disk_cache.put(render_key, processed_image)
+        return processed_image, render_key
+    
+    def simple_key(self, fingerprint):
+        """Paprastos versijos disko kešo raktas"""
+        return self.disk_cache.make_key('simple', fingerprint, **self.quality_params())
+    
+    def render_key(self, fingerprint, title, artist, blur_amount):
+        """Galutinio viršelio disko kešo raktas"""
+        return self.disk_cache.make_key('render', fingerprint, title=title, artist=artist, blur_amount=blur_amount,
+                                        **self.effect_params(), **self.quality_params())
+    
+    def quality_params(self):
+        """Kokybės režimas kešo raktams (režimui "best" raktai nesikeičia)"""
+        if self.quality == BEST:
+            return {}
+        return {'quality': self.quality.name}
+    
+    def resize(self, image, size, stage_filter):
+        """Dydžio keitimas pagal kokybės režimą"""
+        return self.tiled.resize(image, size, stage_filter, self.quality.reducing_gap)
+    
+    def effect_params(self):
+        """Efektų parametrai kešo raktams (be efektų raktai nesikeičia)"""
+        if self.effects is None or self.effects.is_identity():
+            return {}
+        return {'effects': self.effects.params()}
+    
+    def create_simple_9_16(self, image_path):
+        """Sukuria paprastą 9:16 vaizdo versiją be jokių papildomų efektų"""
+        # Atidaryti pradinį vaizdą
+        original = self.load_source(image_path)
+        
+        # Pakeisti dydį
+        target_width = 1080
+        target_height = 1920
+        RENDERS.inc(kind="simple")
+        with RENDER_SECONDS.time(stage="simple"):
+            return self.resize(self.crop_9_16(original), (target_width, target_height), self.quality.resize_filter)
+    
+    def crop_9_16(self, original):
+        """Apkarpo vaizdą iki 9:16 santykio (centre)"""
+        # Nustatyti 9:16 santykį
+        target_ratio = 9/16
+        width, height = original.size
+        
+        # Pakeisti dydį išlaikant santykį
+        if width / height > target_ratio:  # Per platus
+            new_width = int(height * target_ratio)
+            left = (width - new_width) // 2
+            right = left + new_width
+            return original.crop((left, 0, right, height))
+        else:  # Per aukštas
+            new_height = int(width / target_ratio)
+            top = (height - new_height) // 2
+            bottom = top + new_height
+            return original.crop((0, top, width, bottom))
+    
+    def blur_background(self, background, blur_amount):
+        """Suliejimas ir tamsinimas 1080x1920 fonui"""
+        with RENDER_SECONDS.time(stage="background"):
+            return self._blur_background(background, blur_amount)
+    
+    def _blur_background(self, background, blur_amount):
+        target_width, target_height = background.size
+        
+        # Pritaikyti blur efektą - tai užima daug resursų, todėl kešuojama
+        if blur_amount > 0:
+            # Sumažinti dydį prieš blur (greitesnis apdorojimas)
+            quality = self.quality
+            scale = quality.blur_scale
+            blur_size = (max(1, int(target_width * scale)), max(1, int(target_height * scale)))
+            blur_img = self.tiled.resize(background, blur_size, quality.blur_down_filter)
+            # Spindulys nurodytas 1/2 dydžiui 1080 pločio fone - perskaičiuoti kitam masteliui
+            blur_radius = blur_amount / 10 * (scale / 0.5) * (target_width / 1080)
+            blur_img = self.tiled.gaussian_blur(blur_img, blur_radius)
+            # Grąžinti pradinį dydį
+            background = self.tiled.resize(blur_img, (target_width, target_height), quality.blur_up_filter)
+        
+        # Pritaikyti tamsinimo sluoksnį (juoda, alpha 100)
+        background = self.tiled.darken(background, 100)
+        
+        # Efektai kešuojami kartu su suliejtu fonu
+        return self.effect_pipeline.apply(background, self.effects)
+    
+    def build_background(self, image_path, blur_amount, nine_sixteen=None):
+        """Grąžina paruoštą foną, pirmiausia tikrinant disko kešą"""
+        background_key = self.disk_cache.make_key(
+            'background', self.fingerprinter.content(image_path), blur_amount=blur_amount,
+            **self.effect_params(), **self.quality_params())
+        final_background = self.disk_cache.get(background_key)
+        if final_background is None:
+            if nine_sixteen is None:
+                nine_sixteen = self.create_simple_9_16(image_path)
+            final_background = self.blur_background(nine_sixteen, blur_amount)
+            self.disk_cache.put(background_key, final_background)
+        return final_background
+    
+    def create_template(self, image_path, title, artist, blur_amount=None, progress_position=0.3):
+        # progress_position=None - nepiešti progreso juostos (naudojama animacijai)
+        # Naudoti blur_amount parametrą, jei jis perduotas
+        blur_amount = blur_amount if blur_amount is not None else DEFAULT_BLUR_AMOUNT
+        
+        # Kešuoti fono vaizdą, TIK jei blur reikšmė ir vaizdo turinys nepasikeitė
+        fingerprint = self.fingerprinter.fingerprint(image_path)
+        start = time.perf_counter()
+        if (self.cached_background is None or 
+            self.cached_blur_amount != blur_amount or 
+            self.cached_effects != self.effects or 
+            self.cached_quality != self.quality or 
+            not self.fingerprinter.same(image_path, self.cached_fingerprint, fingerprint)):
+            cache_result("background_memory", False)
+            
+            final_background = self.build_background(image_path, blur_amount)
+            
+            # Išsaugoti kešuotus objektus
+            self.cached_background = final_background.copy()
+            self.cached_blur_amount = blur_amount
+            self.cached_effects = self.effects
+            self.cached_quality = self.quality
+            self.cached_fingerprint = fingerprint  # Išsaugoti vaizdo antspaudą
+        else:
+            # Naudoti kešuotą foną
+            cache_result("background_memory", True)
+            final_background = self.cached_background.copy()
+        
+        # Sukurti galutinį vaizdą
+        final_image = final_background.copy()
+        
+        # Elementų išdėstymas
+        layout = self.template_layout()
+        
+        # Įklijuoti kvadratinį vaizdą su apvalintais kampais ir patamsintu fonu
+        self.paste_artwork(final_image, self.frame_artwork(self.load_source(image_path), layout), layout)
+        
+        # Pridėti teksto elementus
+        draw = ImageDraw.Draw(final_image)
+        self.draw_texts(draw, title, artist, layout)
+        
+        # Progreso juosta ir medijos valdikliai
+        self.draw_chrome(draw, layout, progress_position)
+        
+        RENDERS.inc(kind="template")
+        RENDER_SECONDS.observe(time.perf_counter() - start, stage="template")
+        return final_image
+    
+    def create_thumbnail(self, image_path, title, artist, blur_amount=None, reduce=6):
+        """Viršelio miniatiūra (1/reduce dydžio), piešiama iš karto mažu dydžiu
+
+        Fonas, nuotrauka ir tekstai piešiami miniatiūros raiška, todėl
+        nereikia viso 1080x1920 viršelio. Disko ir atminties kešai nenaudojami.
+        """
+        blur_amount = blur_amount if blur_amount is not None else DEFAULT_BLUR_AMOUNT
+        start = time.perf_counter()
+        layout = self.template_layout(1080 // reduce, 1920 // reduce)
+        size = (layout['target_width'], layout['target_height'])
+        
+        original = self.load_source(image_path)
+        background = self.resize(self.crop_9_16(original), size, self.quality.resize_filter)
+        final_image = self._blur_background(background, blur_amount)
+        
+        self.paste_artwork(final_image, self.frame_artwork(original, layout), layout)
+        draw = ImageDraw.Draw(final_image)
+        self.draw_texts(draw, title, artist, layout)
+        self.draw_chrome(draw, layout)
+        
+        RENDERS.inc(kind="thumbnail")
+        RENDER_SECONDS.observe(time.perf_counter() - start, stage="thumbnail")
+        return final_image
+    
+    def frame_artwork(self, original, layout=None):
+        """Paruošia kvadratinę nuotrauką su juodu rėmeliu ir jų bendrą kaukę"""
+        layout = layout or self.template_layout()
+        square_size = layout['square_size']
+        scale = layout['scale']
+        padding = round(10 * scale)  # 10px padding aplink kvadratą (1080 pločiui)
+        
+        # Apkarpyti originalią nuotrauką iki kvadrato (1:1 santykio) ir pakeisti dydį
+        square_img = self.crop_to_square(original)
+        square_img = self.resize(square_img, (square_size, square_size), self.quality.artwork_filter)
+        
+        # Glotnios apvalintų kampų ir rėmelio kaukės iš bibliotekos (sukuriamos vieną kartą)
+        corner_radius = round(40 * scale)
+        mask = MASKS.rounded_rect((square_size, square_size), corner_radius)
+        tile_mask, offset = MASKS.framed_tile((square_size, square_size), corner_radius, padding)
+        
+        # Juodas rėmelis su nuotrauka - galutiniame vaizde įklijuojamas vienu paste()
+        tile = Image.new('RGB', tile_mask.size, (0, 0, 0))
+        tile.paste(square_img, (offset, offset), mask)
+        
+        return {
+            'square': square_img,
+            'tile': tile,
+            'tile_mask': tile_mask,
+            'offset': offset,
+            'padding': padding
+        }
+    
+    def paste_artwork(self, final_image, framed, layout):
+        """Įklijuoja paruoštą nuotrauką su rėmeliu į galutinį vaizdą"""
+        offset = framed['offset']
+        final_image.paste(framed['tile'], (layout['x_pos'] - offset, layout['y_pos'] - offset), framed['tile_mask'])
+    
+    def draw_texts(self, draw, title, artist, layout, fill=(255, 255, 255)):
+        """Piešia atlikėjo vardą ir dainos pavadinimą"""
+        # Nustatyti elementų pradžios poziciją - ties centrinės nuotraukos kairiuoju kraštu
+        elements_start_x = layout['elements_start_x']
+        scale = layout['scale']
+        
+        # Teksto glodinimas pagal kokybės režimą ("1" - be glodinimo)
+        previous_fontmode = draw.fontmode
+        draw.fontmode = "L" if self.quality.text_antialias else "1"
+        
+        # Atlikėjo vardas - PAKELTI 200px į viršų
+        self.draw_text_left_aligned(draw, artist.upper(), elements_start_x, layout['artist_y'], round(60 * scale), fill)
+        
+        # Dainos pavadinimas - po atlikėjo vardu
+        self.draw_text_left_aligned(draw, title, elements_start_x, layout['title_y'], round(45 * scale), fill)
+        draw.fontmode = previous_fontmode
+    
+    def draw_chrome(self, draw, layout, progress_position=0.3, fill=(255, 255, 255)):
+        """Piešia progreso juostą ir medijos valdiklius"""
+        target_width = layout['target_width']
+        
+        # Progreso juosta - balta linija su tašku
+        if progress_position is not None:
+            self.draw_progress_bar(draw, target_width, layout['progress_y'], layout['elements_start_x'],
+                                   layout['square_size'], progress_position, fill, layout['scale'])
+        
+        # Medijos valdikliai
+        self.draw_media_controls(draw, target_width, layout['controls_y'], fill, layout['scale'])
+    
+    def template_layout(self, target_width=1080, target_height=1920):
+        """Grąžina šablono elementų pozicijas
+
+        Pikseliais nurodyti atstumai ir dydžiai skirti 1080 pločiui; kitam
+        pločiui jie keičiami pagal 'scale' (pvz., miniatiūroms).
+        """
+        scale = target_width / 1080
+        # Kvadrato dydis (~70% ekrano pločio)
+        square_size = int(target_width * 0.7)
+        x_pos = (target_width - square_size) // 2
+        y_pos = int(target_height * 0.3) - round(200 * scale)  # Pakelti 200px į viršų
+        artist_y = int(target_height * 0.75) - round(200 * scale)  # Pakelti 200px į viršų
+        title_y = artist_y + round(80 * scale)
+        progress_y = title_y + round(100 * scale)
+        controls_y = progress_y + round(80 * scale)
+        return {
+            'target_width': target_width,
+            'target_height': target_height,
+            'scale': scale,
+            'square_size': square_size,
+            'x_pos': x_pos,
+            'y_pos': y_pos,
+            'elements_start_x': x_pos,  # Kairysis nuotraukos kraštas
+            'artist_y': artist_y,
+            'title_y': title_y,
+            'progress_y': progress_y,
+            'controls_y': controls_y
+        }
+    
+    def progress_bar_box(self, layout=None):
+        """Grąžina progreso juostos juostelės ribas (left, top, right, bottom)"""
+        layout = layout or self.template_layout()
+        target_width = layout['target_width']
+        end_x = target_width - (target_width - layout['square_size']) // 2
+        margin = round(12 * layout['scale'])  # Taško spindulys + atsarga antialiasingui
+        return (layout['elements_start_x'] - margin, layout['progress_y'] - margin,
+                end_x + margin, layout['progress_y'] + margin)
+    
+    def load_source(self, image_path):
+        """Grąžina dekoduotą šaltinio vaizdą (kešuojama pagal turinio antspaudą)"""
+        fingerprint = self.fingerprinter.fingerprint(image_path)
+        if (self.cached_source is None or
+            not self.fingerprinter.same(image_path, self.cached_source_fingerprint, fingerprint)):
+            source = self.source_cache.get(fingerprint) if self.source_cache is not None else None
+            cache_result("source", source is not None)
+            if source is None:
+                with RENDER_SECONDS.time(stage="decode"):
+                    source = Image.open(image_path).convert("RGB")
+                if self.source_cache is not None:
+                    self.source_cache.put(fingerprint, source)
+            self.cached_source = source
+            self.cached_source_fingerprint = fingerprint
+        else:
+            cache_result("source", True)
+        return self.cached_source
+    
+    def crop_to_square(self, image):
+        """Apkarpo vaizdą iki kvadrato (1:1 santykio)"""
+        width, height = image.size
+        if width > height:
+            left = (width - height) // 2
+            right = left + height
+            top = 0
+            bottom = height
+        else:
+            top = (height - width) // 2
+            bottom = top + width
+            left = 0
+            right = width
+        
+        return image.crop((left, top, right, bottom))
+    
+    def draw_text_left_aligned(self, draw, text, x, y, font_size, fill=(255, 255, 255)):
+        """Piešia tekstą, lygiuojant jį pagal kairę pusę"""
+        # Gauti šriftą
+        font = self.get_font(font_size)
+        
+        # Piešti tekstą (be centravimo)
+        draw.text((x, y), text, fill=fill, font=font)
+    
+    def get_font(self, size):
+        """Gauna šriftą (kešuojama pagal šrifto failo antspaudą ir dydį)"""
+        cached = self.font_cache.get(size)
+        if cached is not None:
+            font_path, font_fingerprint, font = cached
+            if font_path is None:
+                cache_result("font", True)
+                return font
+            try:
+                if self.fingerprinter.quick(font_path) == font_fingerprint:
+                    cache_result("font", True)
+                    return font
+            except OSError:
+                pass
+        
+        cache_result("font", False)
+        font_path, font = self.find_font(size)
+        font_fingerprint = self.fingerprinter.quick(font_path) if font_path else None
+        self.font_cache[size] = (font_path, font_fingerprint, font)
+        return font
+    
+    def find_font(self, size):
+        """Ieško šrifto failo ir grąžina (kelias, šriftas)"""
+        font_options = [
+            "GOTHICB.TTF", "GOTH.TTF", "arial.ttf", "arialbd.ttf", 
+            "GOTHIC.TTF", "impact.ttf", "IMPACT.TTF"
+        ]
+        
+        font_dirs = [
+            "",  # Dabartinis katalogas
+            "C:/Windows/Fonts/",  # Windows šriftai
+            "/usr/share/fonts/",  # Linux šriftai
+            "/System/Library/Fonts/"  # Mac šriftai
+        ]
+        
+        # Bandome rasti šriftą
+        for font_name in font_options:
+            for font_dir in font_dirs:
+                try:
+                    font_path = os.path.join(font_dir, font_name)
+                    return font_path, ImageFont.truetype(font_path, size)
+                except (IOError, OSError):
+                    continue
+        
+        return None, ImageFont.load_default()
+    
+    def draw_progress_bar(self, draw, target_width, y_position, start_x=None, square_size=None,
+                          progress_position=0.3, fill=(255, 255, 255), scale=1):
+        """Piešia progreso juostą su nurodytu pradžios tašku"""
+        # Jei start_x nenurodyta, naudoti numatytąją reikšmę (80px nuo krašto)
+        if start_x is None:
+            start_x = 80
+        
+        # Jei square_size nenurodyta, apskaičiuojame numatytąją reikšmę
+        if square_size is None:
+            square_size = int(target_width * 0.7)  # Numatytoji reikšmė (~70% ekrano pločio)
+        
+        # Nustatyti progreso juostos parametrus
+        end_x = target_width - (target_width - square_size) // 2  # Ties dešiniuoju nuotraukos kraštu
+        progress_bar_length = end_x - start_x
+        
+        # Piešti baltą liniją
+        draw.line(
+            [(start_x, y_position), (end_x, y_position)],
+            fill=fill,
+            width=max(1, round(5 * scale))
+        )
+        
+        # Apskaičiuoti taško poziciją
+        dot_x = start_x + progress_bar_length * progress_position
+        
+        # Piešti tašką
+        dot_radius = 8 * scale
+        draw.ellipse(
+            [(dot_x - dot_radius, y_position - dot_radius),
+             (dot_x + dot_radius, y_position + dot_radius)],
+            fill=fill
+        )
+    
+    def draw_media_controls(self, draw, width, y_pos, fill=(255, 255, 255), scale=1):
+        # Medijos valdikliai - ankstesnis, atkurti/pristabdyti, kitas
+        center_x = width // 2
+        button_spacing = width // 6
+        
+        # Ankstesnis mygtukas (kairėje) - dvigubas trikampis
+        prev_x = center_x - button_spacing
+        prev_size = round(25 * scale)
+        
+        # Pirmas trikampis
+        draw.polygon([
+            (prev_x - prev_size//2, y_pos),
+            (prev_x + prev_size//2, y_pos - prev_size),
+            (prev_x + prev_size//2, y_pos + prev_size)
+        ], fill=fill)
+        
+        # Atkurti/Pristabdyti mygtukas (centre) - apskritimas su dviem linijomis
+        play_x = center_x
+        play_size = round(40 * scale)
+        
+        # Apskritimas
+        draw.ellipse([
+            (play_x - play_size, y_pos - play_size),
+            (play_x + play_size, y_pos + play_size)
+        ], outline=fill, width=max(1, round(3 * scale)))
+        
+        # Dvi vertikalios linijos (pauzės simbolis)
+        line_width = max(1, round(6 * scale))
+        line_height = play_size
+        spacing = round(8 * scale)
+        
+        draw.rectangle([
+            (play_x - spacing - line_width//2, y_pos - line_height//2),
+            (play_x - spacing + line_width//2, y_pos + line_height//2)
+        ], fill=fill)
+        
+        draw.rectangle([
+            (play_x + spacing - line_width//2, y_pos - line_height//2),
+            (play_x + spacing + line_width//2, y_pos + line_height//2)
+        ], fill=fill)
+        
+        # Kitas mygtukas (dešinėje) - dvigubas trikampis
+        next_x = center_x + button_spacing
+        next_size = round(25 * scale)
+        
+        # Pirmas trikampis
+        draw.polygon([
+            (next_x + next_size//2, y_pos),
+            (next_x - next_size//2, y_pos - next_size),
+            (next_x - next_size//2, y_pos + next_size)
+        ], fill=fill)
@@ -0,0 +1,77 @@
+import os
+import sys
+import tarfile
+import zipfile
+import subprocess
+import pytest
+from archive_sink import open_sink
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Procesas įrašo du įrašus, pradeda trečią ir nutraukiamas neuždaręs archyvo
+INTERRUPTED_RUN = """
+import os, sys
+sys.path.insert(0, {root!r})
+from archive_sink import open_sink
+sink = open_sink({path!r})
+sink.write("a.png", b"A" * 3000)
+sink.write("b.png", b"B" * 5000)
+sink.write("c.png", b"C" * 7000)
+fp = sink.archive.fp if hasattr(sink.archive, "fp") else sink.archive.fileobj
+fp.flush()
+# Trečias įrašas įrašytas tik iš dalies
+os.truncate({path!r}, os.path.getsize({path!r}) - {cut})
+os._exit(0)
+"""
+
+
+def interrupt(path, cut):
+    subprocess.run([sys.executable, "-c", INTERRUPTED_RUN.format(root=ROOT, path=path, cut=cut)], check=True)
+
+
+def read_archive(path):
+    if path.endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            assert archive.testzip() is None
+            return {name: archive.read(name) for name in archive.namelist()}
+    with tarfile.open(path) as archive:
+        return {member.name: archive.extractfile(member).read() for member in archive.getmembers()}
+
+
+@pytest.mark.parametrize("extension", [".zip", ".tar"])
+@pytest.mark.parametrize("cut", [0, 2500])
+@pytest.mark.parametrize("resumed", [False, True])
+def test_interrupted_archive_resumes(tmp_path, extension, cut, resumed):
+    path = str(tmp_path / f"covers{extension}")
+    expected = {}
+    if resumed:
+        # Nutraukiamas jau anksčiau tvarkingai uždaryto archyvo papildymas
+        sink = open_sink(path)
+        sink.write("z.png", b"Z" * 10)
+        sink.close()
+        expected["z.png"] = b"Z" * 10
+    interrupt(path, cut)
+
+    sink = open_sink(path)
+    assert sink.contains("a.png") and sink.contains("b.png")
+    # Nepilnas įrašas atmetamas ir rašomas iš naujo
+    assert sink.contains("c.png") == (cut == 0)
+    if not sink.contains("c.png"):
+        sink.write("c.png", b"C" * 7000)
+    sink.write("d.png", b"D" * 100)
+    sink.close()
+
+    expected.update({"a.png": b"A" * 3000, "b.png": b"B" * 5000, "c.png": b"C" * 7000, "d.png": b"D" * 100})
+    assert read_archive(path) == expected
+
+
+def test_resume_after_clean_close(tmp_path):
+    path = str(tmp_path / "covers.zip")
+    sink = open_sink(path)
+    sink.write("a.png", b"A")
+    sink.close()
+    sink = open_sink(path)
+    assert sink.contains("a.png")
+    sink.write("b.png", b"B")
+    sink.close()
+    assert read_archive(path) == {"a.png": b"A", "b.png": b"B"}
@@ -0,0 +1,56 @@
+import os
+from PIL import Image
+from batch_pipeline import BatchPipeline, BatchJob, assign_unique_stems
+from render_cache import DiskRenderCache
+
+
+def test_colliding_stems_get_unique_names():
+    jobs = assign_unique_stems([BatchJob(path, "A", "B") for path in
+                                ("d1/x.jpg", "d2/x.png", "d3/X.webp", "x_1.jpg", "y.jpg")])
+    assert [job.stem for job in jobs] == ["x", "x_1", "X_2", "x_1_3", "y"]
+
+
+def test_same_stem_from_two_directories_exports_both(tmp_path):
+    paths = []
+    for directory, colour, extension in (("d1", (200, 30, 30), "jpg"), ("d2", (30, 30, 200), "png")):
+        os.makedirs(tmp_path / directory)
+        path = str(tmp_path / directory / f"x.{extension}")
+        Image.new("RGB", (300, 200), colour).save(path)
+        paths.append(path)
+    output = str(tmp_path / "out")
+
+    def run():
+        pipeline = BatchPipeline(output, render_workers=1, encode_workers=1,
+                                 disk_cache=DiskRenderCache(str(tmp_path / "cache"), max_bytes=0))
+        try:
+            return pipeline.run([BatchJob(path, "A", "B") for path in paths])
+        finally:
+            pipeline.close()
+
+    first = run()
+    assert [job.error for job in first] == [None, None]
+    assert not any(job.skipped for job in first)
+    assert sorted(os.listdir(output)) == ["x.png", "x_1.png", "x_1_paprasta.png", "x_paprasta.png"]
+    # Skirtingi šaltiniai - skirtingi viršeliai
+    assert Image.open(os.path.join(output, "x.png")).getpixel((5, 5)) != \
+        Image.open(os.path.join(output, "x_1.png")).getpixel((5, 5))
+
+    # Paleidus iš naujo abu praleidžiami kaip jau eksportuoti
+    assert all(job.skipped for job in run())
+
+
+def test_process_workers_use_pipeline_disk_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path / "default"))
+    path = str(tmp_path / "source.png")
+    Image.new("RGB", (300, 200), (40, 160, 90)).save(path)
+    cache_dir = tmp_path / "cache"
+    pipeline = BatchPipeline(str(tmp_path / "out"), processes=1, encode_workers=1,
+                             disk_cache=DiskRenderCache(str(cache_dir), max_bytes=0))
+    try:
+        jobs = pipeline.run([BatchJob(path, "A", "B")])
+    finally:
+        pipeline.close()
+    assert jobs[0].error is None and len(jobs[0].paths) == 2
+    # max_bytes=0 - darbininkai nieko nepaliko kešo kataloge, o numatytasis kešas neliestas
+    assert not any(name.endswith(".npy") for name in os.listdir(cache_dir))
+    assert not (tmp_path / "default").exists()
@@ -0,0 +1,46 @@
+import numpy as np
+from PIL import Image
+import effects
+from effects import EffectPipeline, EffectSettings, write_identity_cube
+
+
+def reference_mask(size, strength):
+    width, height = size
+    x = np.linspace(-1.0, 1.0, width, dtype=np.float32)
+    y = np.linspace(-1.0, 1.0, height, dtype=np.float32)
+    distance = (x[np.newaxis, :] ** 2 + y[:, np.newaxis] ** 2) / 2.0
+    return (1.0 - strength * np.clip(distance * 1.5 - 0.25, 0.0, 1.0) ** 1.5).astype(np.float32)
+
+
+def test_scaled_unit_caches_match_direct_computation():
+    pipeline = EffectPipeline()
+    np.testing.assert_allclose(pipeline.vignette_mask((64, 48), 0.6), reference_mask((64, 48), 0.6), atol=1e-6)
+    expected = np.random.default_rng(3).standard_normal((48, 64), dtype=np.float32) * np.float32(0.3 * 24.0)
+    np.testing.assert_array_equal(pipeline.grain_noise((64, 48), 0.3, 3), expected)
+
+
+def test_strength_changes_do_not_grow_caches():
+    pipeline = EffectPipeline(max_entries=2)
+    image = Image.new("RGB", (32, 24), (120, 120, 120))
+    for step in range(1, 20):
+        pipeline.apply(image, EffectSettings(vignette=step / 20, grain=step / 20))
+    assert len(pipeline.vignettes) == 1 and len(pipeline.grains) == 1
+
+    for width in range(10, 16):
+        pipeline.apply(image.resize((width, 8)), EffectSettings(vignette=0.5, grain=0.5))
+    assert len(pipeline.vignettes) == 2 and len(pipeline.grains) == 2
+
+
+def test_lut_hashed_once(tmp_path, monkeypatch):
+    lut_path = str(tmp_path / "identity.cube")
+    write_identity_cube(lut_path, size=2)
+    calls = []
+    original = effects.file_content_hash
+    monkeypatch.setattr(effects, "file_content_hash", lambda path: calls.append(path) or original(path))
+
+    settings = EffectSettings(vignette=0.2, lut_path=lut_path)
+    assert settings.params()['lut'] == settings.params()['lut'] == original(lut_path)
+    assert len(calls) == 1
+
+    known = EffectSettings(lut_path=lut_path, lut_hash="abc")
+    assert known.params()['lut'] == "abc" and len(calls) == 1
@@ -0,0 +1,27 @@
+import threading
+import fingerprint
+from fingerprint import Fingerprinter
+
+
+def test_callbacks_registered_while_hash_is_pending_are_called(tmp_path, monkeypatch):
+    path = tmp_path / "source.jpg"
+    path.write_bytes(b"image bytes")
+    release = threading.Event()
+    original = fingerprint.file_content_hash
+
+    def slow_hash(file_path, *args):
+        release.wait(5)
+        return original(file_path, *args)
+
+    monkeypatch.setattr(fingerprint, "file_content_hash", slow_hash)
+    fingerprinter = Fingerprinter()
+    calls = []
+    thread = fingerprinter.hash_async(str(path), lambda p, fp: calls.append(("first", fp)))
+    assert fingerprinter.hash_async(str(path), lambda p, fp: calls.append(("second", fp))) is thread
+    assert fingerprinter.fingerprint(str(path)).startswith("s:")
+
+    release.set()
+    thread.join(5)
+    expected = fingerprinter.content(str(path))
+    assert sorted(calls) == [("first", expected), ("second", expected)]
+    assert fingerprinter.waiters == {}
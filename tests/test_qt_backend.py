@@ -0,0 +1,25 @@
+import math
+import pytest
+from PyQt5.QtGui import QGuiApplication
+from qt_backend import parity
+
+# Mažiausias leistinas PSNR (dB) kiekvienai sričiai; tekstas ir valdikliai skiriasi tik glodinimu
+PSNR_FLOORS = {
+    'viskas': 35.0,
+    'tekstas': 28.0,
+    'juosta': 28.0,
+    'valdikliai': 27.0,
+}
+
+
+@pytest.fixture(scope="module")
+def qt_app():
+    return QGuiApplication.instance() or QGuiApplication([])
+
+
+def test_qpainter_frame_matches_pillow(qt_app):
+    results = parity()
+    # Įrėmintas nuotraukos blokas įklijuojamas tuo pačiu Pillow paveikslu - turi sutapti tiksliai
+    assert math.isinf(results['nuotrauka'])
+    for region, floor in PSNR_FLOORS.items():
+        assert results[region] >= floor, f"{region}: {results[region]:.2f} dB < {floor} dB"
@@ -0,0 +1,45 @@
+import json
+import http.client
+import pytest
+from PIL import Image
+from render_cache import DiskRenderCache
+from render_service import start_server
+
+
+@pytest.fixture
+def server(tmp_path):
+    server, thread = start_server(disk_cache=DiskRenderCache(str(tmp_path / "cache"), max_bytes=0), workers=1)
+    yield server
+    server.shutdown()
+    server.server_close()
+    server.service.shutdown()
+
+
+def post(server, body):
+    connection = http.client.HTTPConnection(*server.server_address[:2], timeout=60)
+    connection.request("POST", "/render", body=json.dumps(body), headers={'Content-Type': 'application/json'})
+    response = connection.getresponse()
+    data = response.read()
+    connection.close()
+    return response.status, data
+
+
+@pytest.mark.parametrize("fields", [
+    {'format': 5},
+    {'format': None, 'title': ["a"]},
+    {'blur_amount': [1]},
+    {'blur_amount': "60"},
+    {'artist': {'x': 1}},
+    {'variant': 1},
+])
+def test_malformed_fields_get_400(server, tmp_path, fields):
+    image_path = tmp_path / "source.png"
+    Image.new("RGB", (64, 64)).save(image_path)
+    status, data = post(server, dict({'image_path': str(image_path)}, **fields))
+    assert status == 400
+    assert json.loads(data)['error']
+
+
+@pytest.mark.parametrize("body", [[], "x", 5, {'image_path': 7}])
+def test_non_object_or_bad_path_gets_400(server, body):
+    assert post(server, body)[0] == 400
@@ -0,0 +1,32 @@
+import os
+import sys
+import json
+import subprocess
+from PIL import Image
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_stdout_carries_only_json_lines(tmp_path):
+    # LOCALAPPDATA rodo į failą - disko kešas negali sukurti katalogo ir spausdina klaidą
+    blocker = tmp_path / "not_a_directory"
+    blocker.write_text("")
+    image_path = tmp_path / "source.png"
+    Image.new("RGB", (320, 240), (30, 90, 160)).save(image_path)
+    requests = [
+        {'id': 1, 'image_path': str(image_path), 'title': "A", 'artist': "B", 'output': str(tmp_path / "out.png")},
+        {'id': 2, 'image_path': str(tmp_path / "missing.png")},
+        {'id': 3, 'cmd': 'stats'},
+    ]
+    stdin = "".join(json.dumps(request) + "\n" for request in requests) + "[]\n"
+    result = subprocess.run([sys.executable, os.path.join(ROOT, "render_worker.py"), "--workers", "1"],
+                            input=stdin, capture_output=True, text=True, timeout=120, cwd=ROOT,
+                            env=dict(os.environ, LOCALAPPDATA=str(blocker)))
+
+    responses = [json.loads(line) for line in result.stdout.splitlines()]
+    by_id = {response['id']: response for response in responses}
+    assert by_id[1]['ok'] and os.path.exists(by_id[1]['path'])
+    assert not by_id[2]['ok']
+    assert by_id[3]['ok']
+    assert not by_id[None]['ok']
+    assert "Klaida inicializuojant disko kešą" in result.stderr
@@ -0,0 +1,103 @@
+import os
+import time
+import queue
+import pytest
+from PIL import Image
+from render_cache import DiskRenderCache
+from shm_transport import FrameRing, ProcessBatchRenderer, _render_job
+
+
+def free_slots(ring):
+    """Visi šiuo metu laisvi slotai (grąžinami atgal į žiedą)"""
+    slots = []
+    while True:
+        try:
+            slots.append(ring.acquire(timeout=0.2))
+        except queue.Empty:
+            break
+    for slot in slots:
+        ring.release(slot)
+    return sorted(slots)
+
+
+class FailingSimpleRenderer:
+    """Viršelis telpa į slotą, o paprasta versija - ne"""
+    def render_template(self, image_path, title, artist, blur_amount):
+        return Image.new("RGB", (4, 4), (10, 20, 30)), None
+
+    def render_simple(self, image_path):
+        return Image.new("RGB", (64, 64)), None
+
+
+@pytest.fixture
+def rings():
+    ring = FrameRing(3, (8, 8, 3))
+    sources = FrameRing(2, (8, 8, 3))
+    yield ring, sources
+    ring.close()
+    sources.close()
+
+
+def test_failed_write_releases_result_slots(rings):
+    ring, sources = rings
+    job_id, processed, simple, error = _render_job(ring, sources, FailingSimpleRenderer(),
+                                                   (7, "x.jpg", "A", "B", 60, None, None))
+    assert job_id == 7 and processed is None and simple is None
+    assert "netelpa" in error
+    assert free_slots(ring) == [0, 1, 2]
+
+
+def test_source_slot_released_when_render_fails(rings):
+    ring, sources = rings
+    source_ref = sources.write_image(Image.new("RGB", (8, 8), (1, 2, 3)))
+    job = (1, "/nera/tokio/failo.jpg", "A", "B", 60, source_ref, "c:0")
+
+    class BrokenRenderer:
+        fingerprinter = None  # remember() iškvietimas nepavyksta po šaltinio nuskaitymo
+
+    _, processed, _, error = _render_job(ring, sources, BrokenRenderer(), job)
+    assert processed is None and error
+    assert free_slots(sources) == [0, 1]
+    assert free_slots(ring) == [0, 1, 2]
+
+
+def test_process_renderer_uses_decoded_source_and_frees_slots(tmp_path, monkeypatch):
+    # Numatytasis kešas neturi būti naudojamas - darbininkai gauna koordinatoriaus kešą
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path / "default"))
+    path = tmp_path / "source.png"
+    source = Image.new("RGB", (600, 400), (200, 40, 40))
+    source.save(path)
+    cache_dir = tmp_path / "cache"
+    renderer = ProcessBatchRenderer(workers=1, source_shape=(400, 600, 3),
+                                    disk_cache=DiskRenderCache(str(cache_dir)))
+    try:
+        lease = renderer.submit(str(path), "A", "B", 60, source=source, fingerprint="c:test").result(60)
+        assert lease.processed.size == (1080, 1920) and lease.simple.size == (1080, 1920)
+        # Kadras nekopijuotas - vaizdas rodo tiesiai į žiedo slotą
+        view = renderer.ring.view(lease.refs[0])
+        view[0, 0, :3] = (1, 2, 3)
+        assert lease.processed.getpixel((0, 0))[:3] == (1, 2, 3)
+        del view
+        assert len(free_slots(renderer.ring)) == renderer.ring.slot_count - 2
+        lease.release()
+        assert free_slots(renderer.ring) == list(range(renderer.ring.slot_count))
+        with pytest.raises(RuntimeError):
+            renderer.submit(str(tmp_path / "nera.png"), "A", "B", 60).result(60)
+        results = list(renderer.render([(str(path), "A", "B", 60), (str(tmp_path / "nera.png"), "A", "B", 60)]))
+        assert [(job_id, error is None) for job_id, _, _, error in results] == [(0, True), (1, False)]
+
+        # Nutraukus generatorių anksčiau visi slotai vis tiek grąžinami
+        frames = renderer.render([(str(path), "A", "B", 60)] * 3)
+        assert next(frames)[3] is None
+        frames.close()
+        # Palaukti, kol darbininkas baigs jau pateiktą užduotį
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline and (renderer.futures or
+                                               len(free_slots(renderer.ring)) < renderer.ring.slot_count):
+            time.sleep(0.05)
+        assert free_slots(renderer.ring) == list(range(renderer.ring.slot_count))
+        assert free_slots(renderer.sources) == list(range(renderer.sources.slot_count))
+    finally:
+        renderer.close()
+    assert any(name.endswith(".npy") for name in os.listdir(cache_dir))
+    assert not (tmp_path / "default").exists()
@@ -0,0 +1,23 @@
+import numpy as np
+from PIL import Image
+from render_cache import DiskRenderCache
+from template_renderer import TemplateRenderer
+from quality_presets import PRESETS
+
+
+def test_thumbnail_is_drawn_at_thumbnail_size(tmp_path):
+    source = tmp_path / "source.png"
+    Image.linear_gradient("L").resize((800, 1000)).convert("RGB").save(source)
+    renderer = TemplateRenderer(disk_cache=DiskRenderCache(str(tmp_path / "cache"), max_bytes=0))
+    renderer.quality = PRESETS['draft']
+
+    thumbnail = renderer.create_thumbnail(str(source), "TITLE", "ARTIST", 60, reduce=6)
+    reference = renderer.create_template(str(source), "TITLE", "ARTIST", 60).reduce(6)
+
+    assert thumbnail.size == reference.size == (180, 320)
+    layout = renderer.template_layout(180, 320)
+    # Fonas ir nuotrauka sutampa su sumažintu viršeliu (skiriasi tik kraštų glodinimas)
+    artwork_bottom = layout['y_pos'] + layout['square_size'] + 5
+    difference = np.abs(np.asarray(thumbnail, dtype=np.int16) - np.asarray(reference, dtype=np.int16))
+    assert difference[:artwork_bottom].mean() < 4
+    assert renderer.template_layout()['scale'] == 1
@@ -0,0 +1,135 @@
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageFilter
+
+
+def default_workers():
+    return max(1, os.cpu_count() or 1)
+
+
+class TiledExecutor:
+    """Sunkių pikselių operacijų vykdymas juostomis keliose gijose
+
+    Vaizdas dalijamas į horizontalias juostas su persidengimu (halo),
+    kiekviena juosta apdorojama gijų telkinyje, o rezultatas sudedamas
+    atgal. Pillow resize/filter operacijos atleidžia GIL, todėl juostos
+    iš tikrųjų apdorojamos lygiagrečiai.
+    """
+    def __init__(self, workers=None, min_tile_height=64):
+        self.workers = workers or default_workers()
+        self.min_tile_height = min_tile_height
+        self.pool = ThreadPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+
+    def bands(self, height):
+        """Padalija aukštį į juostas (y0, y1)"""
+        count = min(self.workers, max(1, height // self.min_tile_height))
+        step = -(-height // count)
+        return [(y, min(y + step, height)) for y in range(0, height, step)]
+
+    def map_bands(self, func, height):
+        """Įvykdo func(y0, y1) kiekvienai juostai ir grąžina rezultatus"""
+        bands = self.bands(height)
+        if self.pool is None or len(bands) == 1:
+            return bands, [func(y0, y1) for y0, y1 in bands]
+        return bands, list(self.pool.map(lambda band: func(*band), bands))
+
+    def stitch(self, mode, size, bands, tiles):
+        """Sudeda juostas į vieną vaizdą"""
+        result = Image.new(mode, size)
+        for (y0, _), tile in zip(bands, tiles):
+            result.paste(tile, (0, y0))
+        return result
+
+    def resize(self, image, size, resample=Image.LANCZOS, reducing_gap=None):
+        """Keičia dydį juostomis; kiekviena juosta skaito savo šaltinio sritį"""
+        if self.pool is None:
+            return image.resize(size, resample, reducing_gap=reducing_gap)
+        width, height = size
+        scale_y = image.height / height
+
+        def resize_band(y0, y1):
+            # Pillow naudoja pikselius už box ribų filtro atramai, todėl siūlių nėra
+            box = (0, y0 * scale_y, image.width, y1 * scale_y)
+            return image.resize((width, y1 - y0), resample, box=box, reducing_gap=reducing_gap)
+
+        bands, tiles = self.map_bands(resize_band, height)
+        return self.stitch(image.mode, size, bands, tiles)
+
+    def gaussian_blur(self, image, radius):
+        """Gauso suliejimas juostomis su persidengimu"""
+        if self.pool is None or radius <= 0:
+            return image.filter(ImageFilter.GaussianBlur(radius=radius))
+        # Pillow Gauso blur yra trys box blur praėjimai, kiekvienas ne platesnis nei radius + 1
+        halo = int(3 * (radius + 1)) + 2
+
+        def blur_band(y0, y1):
+            top = max(0, y0 - halo)
+            bottom = min(image.height, y1 + halo)
+            band = image.crop((0, top, image.width, bottom))
+            band = band.filter(ImageFilter.GaussianBlur(radius=radius))
+            return band.crop((0, y0 - top, image.width, y1 - top))
+
+        bands, tiles = self.map_bands(blur_band, image.height)
+        return self.stitch(image.mode, image.size, bands, tiles)
+
+    def pointwise(self, image, func, mode=None):
+        """Taiko pikselinę operaciją func(juosta) kiekvienai juostai (be persidengimo)"""
+        if self.pool is None:
+            return func(image)
+
+        def apply_band(y0, y1):
+            return func(image.crop((0, y0, image.width, y1)))
+
+        bands, tiles = self.map_bands(apply_band, image.height)
+        return self.stitch(mode or tiles[0].mode, image.size, bands, tiles)
+
+    def darken(self, image, alpha):
+        """Uždeda juodą permatomą sluoksnį (alpha 0-255)"""
+        def darken_band(band):
+            overlay = Image.new("RGBA", band.size, (0, 0, 0, alpha))
+            return Image.alpha_composite(band.convert("RGBA"), overlay).convert("RGB")
+
+        return self.pointwise(image, darken_band, "RGB")
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False)
+
+
+def benchmark(image_path=None, worker_counts=None, repeats=3, blur_amount=60):
+    """Išmatuoja foninio vaizdo apdorojimo pagreitėjimą pagal gijų skaičių"""
+    if image_path:
+        source = Image.open(image_path).convert("RGB")
+    else:
+        # Sintetinis didelės raiškos vaizdas
+        source = Image.effect_noise((3000, 4000), 64).convert("RGB")
+
+    worker_counts = worker_counts or sorted({1, 2, 4, default_workers()})
+    target = (1080, 1920)
+    results = {}
+    for workers in worker_counts:
+        executor = TiledExecutor(workers)
+        best = None
+        for _ in range(repeats):
+            start = time.perf_counter()
+            background = executor.resize(source, target)
+            small = executor.resize(background, (target[0] // 2, target[1] // 2))
+            small = executor.gaussian_blur(small, blur_amount / 10)
+            background = executor.resize(small, target)
+            executor.darken(background, 100)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        executor.shutdown()
+        results[workers] = best
+
+    baseline = results[worker_counts[0]]
+    for workers in worker_counts:
+        print(f"{workers:>3} gijos: {results[workers] * 1000:8.1f} ms  "
+              f"pagreitėjimas x{baseline / results[workers]:.2f}")
+    return results
+
+
+if __name__ == "__main__":
+    benchmark(sys.argv[1] if len(sys.argv) > 1 else None)
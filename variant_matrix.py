@@ -0,0 +1,138 @@
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from itertools import product
+from template_renderer import TemplateRenderer, DEFAULT_BLUR_AMOUNT
+from render_graph import build_template_graph
+
+TEMPLATES = ('template', 'simple')
+DEFAULT_TEXT = ("TAU MICH AUF", "NIKLAS DEE")
+
+
+class VariantMatrix:
+    """Parametrų matrica: visi blur, teksto porų ir šablonų deriniai"""
+    def __init__(self, blur_amounts=None, texts=None, templates=None):
+        self.blur_amounts = [int(value) for value in (blur_amounts or [DEFAULT_BLUR_AMOUNT])]
+        self.texts = [tuple(pair) for pair in (texts or [DEFAULT_TEXT])]
+        self.templates = list(templates or ['template'])
+        for template in self.templates:
+            if template not in TEMPLATES:
+                raise ValueError(f"Nežinomas šablonas: {template}")
+
+    @classmethod
+    def from_dict(cls, data):
+        """Sukuria matricą iš JSON žodyno ({"blur": [...], "texts": [[title, artist], ...], "templates": [...]})"""
+        return cls(data.get('blur'), data.get('texts'), data.get('templates'))
+
+    def combinations(self):
+        """Visi variantai; blur išorinis ciklas, kad vienu metu būtų laikomas tik vienas fonas"""
+        variants = []
+        if 'simple' in self.templates:
+            # Paprasta versija nuo blur ir teksto nepriklauso - vienas variantas
+            variants.append({'template': 'simple'})
+        if 'template' in self.templates:
+            for blur_amount, (title, artist) in product(self.blur_amounts, self.texts):
+                variants.append({'template': 'template', 'blur_amount': blur_amount,
+                                 'title': title, 'artist': artist})
+        return variants
+
+
+def variant_name(stem, variant):
+    """Failo pavadinimas variantui"""
+    if variant['template'] == 'simple':
+        return f"{stem}_simple"
+    slug = re.sub(r'[^0-9A-Za-z]+', '-', f"{variant['title']}_{variant['artist']}").strip('-').lower()
+    return f"{stem}_b{variant['blur_amount']}_{slug or 'tekstas'}"
+
+
+class VariantRenderer:
+    """Piešia visus matricos variantus vienu praėjimu
+
+    Variantai skaičiuojami per inkrementinį grafą, todėl dekoduotas
+    šaltinis, 9:16 versija, rėmelis ir valdikliai skaičiuojami vieną
+    kartą, o suliejtas fonas - vieną kartą kiekvienai blur reikšmei.
+    """
+    def __init__(self, renderer=None):
+        self.renderer = renderer or TemplateRenderer()
+        self.graph = build_template_graph(self.renderer)
+
+    def render(self, image_path, matrix):
+        """Generatorius, grąžinantis (variantas, vaizdas)"""
+        graph = self.graph
+        graph.set_input('image_path', image_path)
+        graph.set_input('source_fingerprint', self.renderer.fingerprinter.content(image_path))
+        for variant in matrix.combinations():
+            if variant['template'] == 'simple':
+                yield variant, graph.get('simple_preview')
+                continue
+            graph.set_input('title', variant['title'])
+            graph.set_input('artist', variant['artist'])
+            graph.set_input('blur_amount', variant['blur_amount'])
+            yield variant, graph.get('final')
+
+    def export(self, image_path, matrix, output_dir, image_format='png'):
+        """Išsaugo visus variantus kataloge; grąžina [(variantas, kelias)]"""
+        os.makedirs(output_dir, exist_ok=True)
+        stem = os.path.splitext(os.path.basename(image_path))[0]
+        extension = 'jpg' if image_format == 'jpeg' else image_format
+        results = []
+        used_names = set()
+        for variant, image in self.render(image_path, matrix):
+            name = variant_name(stem, variant)
+            if name in used_names:
+                # Skirtingi tekstai gali duoti tą patį pavadinimą (pvz., tik ne lotyniškos raidės)
+                name = f"{name}_{len(results)}"
+            used_names.add(name)
+            path = os.path.join(output_dir, f"{name}.{extension}")
+            if image_format == 'jpeg':
+                image.save(path, format='JPEG', quality=95)
+            else:
+                image.save(path, format='PNG')
+            results.append((variant, path))
+        return results
+
+
+def parse_text(value):
+    """"PAVADINIMAS|ATLIKĖJAS" -> (pavadinimas, atlikėjas)"""
+    title, separator, artist = value.partition('|')
+    if not separator:
+        raise argparse.ArgumentTypeError("Tekstas turi būti formatu PAVADINIMAS|ATLIKĖJAS")
+    return title, artist
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Viršelio variantų matricos eksportas")
+    parser.add_argument("image_path")
+    parser.add_argument("--blur", type=int, nargs='+', help="Blur reikšmės (pvz., 40 60 80)")
+    parser.add_argument("--text", type=parse_text, action='append', help="PAVADINIMAS|ATLIKĖJAS (galima kartoti)")
+    parser.add_argument("--template", nargs='+', choices=TEMPLATES, help="Šablonai")
+    parser.add_argument("--matrix", help="JSON failas su matrica (blur, texts, templates)")
+    parser.add_argument("--out", default="variants", help="Išvesties katalogas")
+    parser.add_argument("--format", choices=('png', 'jpeg'), default='png')
+    args = parser.parse_args(argv)
+
+    if args.matrix:
+        with open(args.matrix, encoding='utf-8') as f:
+            data = json.load(f)
+    else:
+        data = {}
+    matrix = VariantMatrix(args.blur or data.get('blur'), args.text or data.get('texts'),
+                           args.template or data.get('templates'))
+
+    start = time.perf_counter()
+    variant_renderer = VariantRenderer()
+    results = variant_renderer.export(args.image_path, matrix, args.out, args.format)
+    elapsed = time.perf_counter() - start
+    for _, path in results:
+        print(path)
+    print(f"Variantų: {len(results)}, laikas: {elapsed:.2f} s", file=sys.stderr)
+    for name, stats in variant_renderer.graph.stats().items():
+        print(f"  {name:15} skaičiuota {stats['misses']}, pakartotinai naudota {stats['hits']}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())